@@ -0,0 +1,257 @@
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.request
+from collections import deque
+from dataclasses import dataclass, asdict
+
+import numpy as np
+
+from config import TP_HALF, TP_FULL, SL_PCT, LADDER_STEP
+from portfolio import SHORT, LONG
+
+log = logging.getLogger(__name__)
+
+# ==========================================
+# 익절/손절 알림 엔진 (가격 레벨 정렬 인덱스 + 이진 탐색)
+# ==========================================
+# - 종목별로 '이 가격 이상이면' / '이 가격 이하면' 발동하는 레벨을 각각 정렬된 배열로 보관
+# - 시세 한 틱마다 searchsorted 한 번으로 새로 넘은 구간만 확인 -> 포지션 수와 무관하게 O(log n + 발동 수)
+# - 같은 트리거(장부, 키, 종류, 가격)는 한 번만 알림. 포지션이 바뀌어 인덱스를 다시 만들어도 유지
+#   시장 트리거(ExitLine)는 가격 대신 거래일로 구분 - 진행 중 일봉으로 MA200 이 조금씩 바뀌어도 하루 한 번
+MARKET = 'market'  # 포지션이 아닌 시장 트리거 (QQQ ExitLine)
+
+
+@dataclass
+class Alert:
+    symbol: str
+    kind: str       # TP_Half / TP_Full / SL / Ladder / ExitLine
+    book: str
+    key: int
+    level: float    # 트리거 가격
+    price: float    # 발동 시 시세
+    at: float       # time.time()
+
+    def message(self):
+        arrow = "▲" if self.kind in ('TP_Half', 'TP_Full', 'Ladder') else "▼"
+        who = f"#{self.key}" if self.book != MARKET else "시장"
+        return f"{arrow} {self.symbol} {self.kind} {who}: ${self.price:.2f} (기준 ${self.level:.2f})"
+
+
+def position_triggers(book, exit_line=None, day=None):
+    """
+    PositionBook 의 보유분 -> [(symbol, 방향 'up'/'down', 가격, kind, book, key)].
+    단기: 반익(Open 만)/완익/손절, 장기: 다음 익절 사다리 가격, 시장: QQQ ExitLine 붕괴 (key = 거래일 YYYYMMDD)
+    """
+    out = []
+    pos = book.positions(SHORT)
+    for r in pos.itertuples(index=False):
+        if r.Avg_Price <= 0 or r.Shares <= 0: continue
+        if r.Status == 'Open':
+            out.append((r.Ticker, 'up', r.Avg_Price * (1 + TP_HALF / 100), 'TP_Half', SHORT, int(r.Key)))
+        out.append((r.Ticker, 'up', r.Avg_Price * (1 + TP_FULL / 100), 'TP_Full', SHORT, int(r.Key)))
+        out.append((r.Ticker, 'down', r.Avg_Price * (1 + SL_PCT / 100), 'SL', SHORT, int(r.Key)))
+    pos = book.positions(LONG)
+    for r in pos.itertuples(index=False):
+        if r.Avg_Price <= 0 or r.Shares <= 0 or r.Ticker not in ('TQQQ', 'QLD'): continue
+        # ladder_target 과 같은 기준: 수익률이 (Level + 1) x 단계 이상이면 발동
+        out.append((r.Ticker, 'up', r.Avg_Price * (1 + (int(r.Level) + 1) * LADDER_STEP / 100), 'Ladder', LONG, int(r.Account)))
+    if exit_line is not None and np.isfinite(exit_line):
+        key = int(str(day)[:10].replace("-", "")) if day else 0
+        out.append(('QQQ', 'down', float(exit_line), 'ExitLine', MARKET, key))
+    return out
+
+
+class _LevelIndex:
+    """한 종목의 트리거. up 은 가격 오름차순, down 은 가격 오름차순 (아래에서부터 발동 대상이 줄어듦)"""
+
+    def __init__(self, rows):
+        up = sorted((r for r in rows if r[1] == 'up'), key=lambda r: r[2])
+        down = sorted((r for r in rows if r[1] == 'down'), key=lambda r: r[2])
+        self.up_px = np.array([r[2] for r in up], dtype='f8'); self.up = up
+        self.down_px = np.array([r[2] for r in down], dtype='f8'); self.down = down
+        self.up_done = 0              # up[:up_done] 은 이미 넘은 레벨
+        self.down_done = len(down)    # down[down_done:] 은 이미 깨진 레벨
+
+    def crossed(self, price):
+        """이번 가격으로 새로 넘은 트리거"""
+        hit = []
+        k = int(np.searchsorted(self.up_px, price, side='right'))
+        if k > self.up_done:
+            hit += self.up[self.up_done:k]; self.up_done = k
+        k = int(np.searchsorted(self.down_px, price, side='left'))
+        if k < self.down_done:
+            hit += self.down[k:self.down_done]; self.down_done = k
+        return hit
+
+
+class AlertEngine:
+    """
+    rebuild() 로 트리거 인덱스를 만들고, 시세가 올 때마다 on_tick() 을 부릅니다.
+    알림은 큐에 넣고 백그라운드 스레드가 sink 들로 보냅니다 (느린 webhook 이 틱 처리를 막지 않음).
+    """
+
+    def __init__(self, sinks=(), background=True, sent=()):
+        self.sinks = list(sinks)
+        self.index = {}   # symbol -> _LevelIndex
+        self.sent = set(sent)  # (book, key, kind, level) - 중복 알림 방지 (재시작 시 기록에서 복원)
+        self._lock = threading.Lock()
+        self._queue = None
+        if background:
+            self._queue = queue.Queue()
+            threading.Thread(target=self._deliver_loop, daemon=True, name="alert-sinks").start()
+
+    def rebuild(self, triggers):
+        """트리거 목록으로 인덱스 교체. 이미 보낸 알림 중 여전히 유효한 것만 기억합니다."""
+        by_sym = {}
+        for t in triggers:
+            by_sym.setdefault(t[0], []).append(t)
+        with self._lock:
+            self.index = {s: _LevelIndex(rows) for s, rows in by_sym.items()}
+            live = {_dedup_key(t) for t in triggers}
+            self.sent &= live
+
+    def on_tick(self, symbol, price, at=None):
+        """시세 한 틱 -> 새로 발동한 Alert 목록 (중복 제외, sink 로 전달 예약)"""
+        idx = self.index.get(symbol)
+        if idx is None or price is None or not np.isfinite(price):
+            return []
+        at = time.time() if at is None else at
+        fired = []
+        with self._lock:
+            for t in idx.crossed(float(price)):
+                k = _dedup_key(t)
+                if k in self.sent: continue
+                self.sent.add(k)
+                fired.append(Alert(t[0], t[3], t[4], t[5], round(float(t[2]), 4), float(price), at))
+        for a in fired:
+            if self._queue is not None: self._queue.put(a)
+            else: self._deliver(a)
+        return fired
+
+    def on_prices(self, prices, at=None):
+        """{symbol: price} 를 한 번에 -> 발동 Alert 목록"""
+        out = []
+        for s, p in prices.items():
+            out += self.on_tick(s, p, at)
+        return out
+
+    def flush(self, timeout=5.0):
+        """큐에 쌓인 알림을 다 보낼 때까지 대기 (종료/테스트용)"""
+        if self._queue is None: return
+        end = time.time() + timeout
+        while self._queue.unfinished_tasks and time.time() < end:
+            time.sleep(0.01)
+
+    def _deliver_loop(self):
+        while True:
+            a = self._queue.get()
+            try:
+                self._deliver(a)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, alert):
+        for sink in self.sinks:
+            try:
+                sink.send(alert)
+            except Exception as e:
+                log.warning("알림 전송 실패 (%s): %s", type(sink).__name__, e)
+
+
+def _dedup_key(t):
+    return _key(t[4], t[5], t[3], t[2])
+
+
+def _key(book, key, kind, level):
+    """중복 방지 키 - 시장 트리거는 가격 없이 (장부, 거래일, 종류)"""
+    return (book, key, kind, None if book == MARKET else round(float(level), 4))
+
+
+# --- 알림 전달 (sink) ---
+class FileSink:
+    """JSON 한 줄씩 추가 (대시보드 사이드바가 최근 알림을 읽음)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, alert):
+        line = json.dumps(dict(asdict(alert), message=alert.message()), ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+class WebhookSink:
+    """JSON 을 POST (로컬 봇/자동화 서버 등). 응답 본문은 보지 않음"""
+
+    def __init__(self, url, timeout=3):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        body = json.dumps(dict(asdict(alert), message=alert.message()), ensure_ascii=False).encode('utf-8')
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+class DesktopSink:
+    """데스크톱 알림 (plyer 가 있을 때만, 없으면 처음 한 번 경고 후 무시)"""
+
+    def __init__(self, title="TQQQ Master"):
+        self.title = title
+        self._notify = None
+        self._missing = False
+
+    def send(self, alert):
+        if self._notify is None and not self._missing:
+            try:
+                from plyer import notification
+                self._notify = notification.notify
+            except ImportError:
+                self._missing = True
+                log.warning("plyer 가 없어 데스크톱 알림을 건너뜁니다")
+        if self._notify is not None:
+            self._notify(title=self.title, message=alert.message(), timeout=10)
+
+
+class StubSink:
+    """오프라인용 - 받은 알림을 목록에 모아둡니다"""
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+def default_sinks(path=None, webhook=None, desktop=False):
+    sinks = []
+    if path: sinks.append(FileSink(path))
+    if webhook: sinks.append(WebhookSink(webhook))
+    if desktop: sinks.append(DesktopSink())
+    return sinks
+
+
+def sent_keys(path, n=1000):
+    """FileSink 기록의 중복 방지 키 - 워커를 다시 켜도 같은 알림을 또 보내지 않게"""
+    return {_key(a['book'], a['key'], a['kind'], a['level']) for a in recent_alerts(path, n)}
+
+
+def recent_alerts(path, n=10):
+    """FileSink 파일의 마지막 n 건 (최근 것이 앞)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = deque(f, maxlen=n)
+    except FileNotFoundError:
+        return []
+    out = []
+    for line in reversed(lines):
+        try:
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
@@ -1,9 +1,19 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import os
 from datetime import datetime
+from config import (JOURNAL_DB, SIGNAL_SNAPSHOT, ALERT_FILE, TIMING, RSI_P, SLOPE_LAG, TP_HALF, TP_FULL, SL_PCT,
+                    SCREEN_PAIRS, SEED_KRW, RISK_PATHS, RISK_YEARS, RISK_BLOCK, RISK_TARGET_KRW)
+from quotes import QuoteService
+from intraday import IntradayStore, IntradayQuoteProvider
+from alerts import recent_alerts
+from journal_store import JournalDB
+from ledger import Ledger, page_of
+from portfolio import PositionBook, SHORT, LONG
+from market_frame import SharedMarket
+import timing
+from signals import load_market_frame, first_view, late_data, SnapshotStore
+# 모드/탭 전용 모듈(plotly, 백테스트, 시뮬레이션, 스크리너, 차트)은 쓰는 곳에서 불러옴 -> 첫 화면을 늦추지 않음
 
 # ==========================================
 # 1. 기본 설정 및 스타일
@@ -22,205 +32,294 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# 파일 경로
-SHORT_JOURNAL = "short_term_journal.csv"
-LONG_PORTFOLIO = "long_term_portfolio.csv"
-LONG_BALANCE = "long_term_balance.csv"
-LONG_JOURNAL = "long_term_journal.csv" 
-
-# 파라미터
-RSI_P = 3
-SLOPE_LAG = 2
-TP_HALF = 6.0
-TP_FULL = 12.0
-SL_PCT = -6.0
-
 # ==========================================
 # 2. 데이터 로딩 (실시간 기능 강화)
 # ==========================================
-def get_live_price(ticker):
-    """
-    야후 파이낸스에서 가장 최신의 1분봉 데이터를 가져옵니다.
-    (장중, 프리마켓, 애프터마켓 포함)
-    """
-    try:
-        # prepost=True 옵션이 핵심 (장외 거래 포함)
-        data = yf.Ticker(ticker).history(period="1d", interval="1m", prepost=True)
-        if not data.empty:
-            return float(data['Close'].iloc[-1]) # 가장 최근 거래가 리턴
-        else:
-            return None
-    except:
-        return None
-
-@st.cache_data(ttl=300) # 5분 캐시
-def load_market_data():
-    start_date = "2010-02-15"
-    tickers = ["TQQQ", "QLD", "QQQ", "KRW=X"]
-    try:
-        # 1. 지표 계산용 일봉 데이터 (기존 방식)
-        df = yf.download(tickers, start=start_date, progress=False, group_by='ticker', auto_adjust=False)
-        if df is None or df.empty: return pd.DataFrame(), {}
-        
-        data = pd.DataFrame(index=df.index)
-        try:
-            data['T_Close'] = df['TQQQ']['Close']; data['Q_Close'] = df['QQQ']['Close']
-            
-            # 환율
-            if 'KRW=X' in df.columns or ('KRW=X', 'Close') in df.columns:
-                data['USDKRW'] = df['KRW=X']['Close']
-            else: data['USDKRW'] = 1450.0 
-        except: return pd.DataFrame(), {}
-
-        data['USDKRW'] = data['USDKRW'].ffill().fillna(1450.0)
-        data.dropna(subset=['T_Close', 'Q_Close'], inplace=True)
-        
-        # 지표 계산
-        data['Q_MA50'] = data['Q_Close'].rolling(window=50).mean()
-        data['Q_MA200'] = data['Q_Close'].rolling(window=200).mean()
-        data['ExitLine'] = data['Q_MA200'] * 0.975
-        
-        # RSI 3 (안정성 강화)
-        delta = data['Q_Close'].diff()
-        gain = delta.where(delta > 0, 0).rolling(window=3).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=3).mean()
-        loss = loss.replace(0, 0.00001)
-        rs = (gain / loss).replace([np.inf, -np.inf], np.nan)
-        data['Q_RSI3'] = 100 - (100 / (1 + rs))
-        data['Q_RSI3'] = data['Q_RSI3'].fillna(50)
-        
-        # 모멘텀
-        ma20 = data['Q_Close'].rolling(window=20).mean()
-        slope = ma20.pct_change() * 100
-        data['Slope_Accel'] = slope > slope.shift(2)
-        
-        final_df = data.dropna()
-        
-        # 2. 실시간 가격 가져오기 (Live)
-        live_prices = {
-            'TQQQ': get_live_price("TQQQ"),
-            'QLD': get_live_price("QLD"),
-            'QQQ': get_live_price("QQQ"),
-            'KRW': data['USDKRW'].iloc[-1]
-        }
-        
-        # 실시간 가격을 못 가져오면 일봉 종가로 대체
-        if live_prices['TQQQ'] is None: live_prices['TQQQ'] = final_df['T_Close'].iloc[-1]
-        if live_prices['QQQ'] is None: live_prices['QQQ'] = final_df['Q_Close'].iloc[-1]
-        # QLD는 데이터프레임에 없으므로 별도 처리 필요하지만 여기선 생략하거나 TQQQ 로직 따름
-        
-        return final_df, live_prices
-        
-    except Exception as e:
-        return pd.DataFrame(), {}
+@st.cache_resource # 종목별 1분봉 링버퍼 (새 분봉만 증분 조회)
+def get_intraday_store():
+    return IntradayStore()
+
+@st.cache_resource # 모든 세션이 같은 시세 서비스를 공유 (동시 요청 병합)
+def get_quote_service():
+    return QuoteService(IntradayQuoteProvider(get_intraday_store()))
+
+@st.cache_resource # 일봉/지표는 프로세스에 하나 (세션마다 복사하지 않고 읽기 전용 view 공유, 5분마다 교체)
+def get_shared_market():
+    # 처음엔 로컬 저장분으로 바로 만들고, 새 봉 다운로드는 백그라운드에서
+    return SharedMarket(load_market_frame, fallback=lambda: load_market_frame(fetch=False))
+
+@st.cache_resource # 신호 워커 스냅샷 (파일이 바뀌었을 때만 다시 읽음)
+def get_snapshot_store():
+    return SnapshotStore(SIGNAL_SNAPSHOT)
+
+def waiting_for(data, what):
+    """일봉/신호가 아직 없으면 (첫 실행 다운로드 중) 탭 자리에 안내만 -> True"""
+    if data is not None: return False
+    st.info(f"⏳ 일봉 데이터 불러오는 중 - 받는 대로 {what} 표시")
+    return True
+
+@st.cache_data(ttl=300) # 프레임 버전으로만 캐시 (_df 는 해시하지 않음)
+def cached_backtest(_df, version):
+    from backtest import run_backtest
+    return run_backtest(_df)
+
+@st.cache_data(ttl=3600, max_entries=8) # 같은 보유/조건이면 재사용 (_df 는 프레임 버전으로만)
+def cached_risk(_df, version, holdings, cash, prices, fx, years, n_paths, target):
+    from risk import simulate_risk
+    tickers, shares, avg, level = holdings
+    return simulate_risk(_df, list(tickers), shares, avg, level, cash, dict(prices), fx,
+                         years=years, n_paths=n_paths, block=RISK_BLOCK, target_krw=target)
+
+@st.cache_data(max_entries=32) # 구간/점 수별 축소 결과 (프레임 버전이 바뀌면 새로 계산)
+def cached_chart_series(_df, version, start, end, points):
+    from charts import decimated_series
+    return decimated_series(_df, start, end, points)
+
+@st.cache_data(max_entries=16) # 일지 매수/매도 표시 (DB 버전 + 구간별)
+def cached_markers(rev, start, end):
+    from charts import journal_markers
+    return journal_markers(get_ledger(rev).journal, start, end)
+
+@st.cache_resource # 일지 DB 는 프로세스에 하나 (처음 한 번 기존 CSV 이관)
+def get_journal_db():
+    jdb = JournalDB(JOURNAL_DB)
+    jdb.import_csvs()
+    jdb.ensure_defaults() # 초기화 데이터 (포트폴리오 1행 + 시드 잔고)
+    return jdb
+
+@st.cache_resource # 포지션/손익 요약도 프로세스에 하나 (거래 기록 시 증분 갱신)
+def get_position_book():
+    return PositionBook()
+
+@st.cache_resource(max_entries=4) # 종목 구성별 스크리너 (날짜 x 종목 종가 배열을 메모리에 보관)
+def get_screener(pairs):
+    from screener import Screener
+    return Screener(dict(pairs))
+
+@st.cache_data(ttl=300) # 5분마다 새 봉만 일괄 조회 후 재평가
+def run_screener(pairs):
+    sc = get_screener(pairs)
+    ok = sc.refresh()
+    return sc.run(), ok
+
+@st.cache_resource(max_entries=2) # DB 버전이 같으면 정렬/필터/집계 결과 재사용
+def get_ledger(rev):
+    return Ledger(db.short_journal())
 
 # ==========================================
 # 3. 메인 로직
 # ==========================================
+timing.enable(st.session_state.get("timing_on", TIMING)) # 사이드바 맨 아래 체크박스 (세션별)
+timing.begin_run()
+db = get_journal_db()
+book = get_position_book()
+with timing.stage("journal_sync", rev=db.revision()):
+    book.sync(db)
 st.sidebar.title("💎 TQQQ Master")
-mode = st.sidebar.radio("모드 선택", ["🏹 단기 스나이퍼", "🚜 장기 졸업 프로젝트"])
+mode = st.sidebar.radio("모드 선택", ["🏹 단기 스나이퍼", "🚜 장기 졸업 프로젝트", "🔭 스크리너"])
 
-with st.spinner("🚀 실시간 시세 조회 중..."):
-    df, live_data = load_market_data()
-
-if df.empty: st.error("데이터 로드 실패. 다시 시도해주세요."); st.stop()
-
-last = df.iloc[-1]
-curr_date = df.index[-1].date()
-usd_krw = live_data.get('KRW', 1450.0)
+# 첫 화면은 네트워크를 기다리지 않음: 로컬 일봉 / 캐시된 시세 / 신호 워커 스냅샷으로 바로 그리고
+# 새 일봉/시세는 맨 아래(5)에서 받아 온 뒤 다시 그림
+with timing.stage("market_data"):
+    market, market_loading = get_shared_market().get_nowait()
+if market is not None and market.df.empty and not market_loading:
+    st.error("데이터 로드 실패. 다시 시도해주세요."); st.stop()
+with timing.stage("snapshot_read"):
+    snap = get_snapshot_store().read()
+with timing.stage("first_view", symbols=len(book.symbols)):
+    view = first_view(market, snap, get_quote_service(), book)
 
 # ★ 핵심: 화면에 표시할 때는 '실시간 가격' 우선 사용
-tqqq_price = live_data.get('TQQQ', last['T_Close'])
-qqq_price_live = live_data.get('QQQ', last['Q_Close'])
-qld_price_live = live_data.get('QLD', 0.0) 
-if qld_price_live == 0.0 or qld_price_live is None: # QLD 실시간 실패시 보정
-     qld_price_live = tqqq_price * 0.7 # 임시 비율(단순 예시) 혹은 0처리
+if market is not None and not market.df.empty:
+    df, live_data, ind_engine = market.df, market.info, market.engine
+    last = df.iloc[-1]
+else: # 일봉이 아직 없음 (첫 실행 다운로드 중)
+    df, live_data, ind_engine, last = None, {'Stale': True}, None, None
+curr_date = pd.Timestamp(view['date']).date() if view['date'] else datetime.today().date()
+usd_krw = view['usd_krw']
+prices_now, stale_syms = view['prices'], view['stale']
+signal, tp_checks = view['signal'], view['checks']
+quotes_pending = view['source'] != 'snapshot' and (bool(stale_syms) or any(q.age() > get_quote_service().ttl for q in view['quotes'].values()))
+
+if view['source'] == 'snapshot':
+    st.sidebar.caption(f"📡 신호 워커 스냅샷 v{snap['version']} · {view['snap_age']:.0f}초 전")
+for sym, q in view['quotes'].items():
+    st.sidebar.caption(f"{sym} ${q.price:.2f} · {q.as_of:%H:%M} 체결 · {q.age():.0f}초 전 조회")
+tqqq_price = prices_now['TQQQ']
+qqq_price_live = prices_now['QQQ']
+qld_price_live = prices_now['QLD']
+if quotes_pending or (market_loading and live_data.get('Stale')): # 지금 화면이 지난 데이터 -> 본문 맨 위에 표시
+    basis = {'local': "저장된 일봉" + (" · 캐시 시세" if view['quotes'] else " 종가"), 'snapshot': "워커 스냅샷",
+             'old_snapshot': f"{view['snap_age'] / 60:.0f}분 전 스냅샷", 'none': "데이터 없음"}[view['source']]
+    st.info(f"⏳ 최신 데이터 불러오는 중 · 지금은 {basis} 기준")
+elif market_loading: st.sidebar.caption("🔄 일봉 갱신 중")
+elif live_data.get('Stale'): st.sidebar.warning("⚠️ 시세 갱신 실패 - 저장된 마지막 데이터 표시 중")
+elif stale_syms: st.sidebar.warning(f"⚠️ 실시간 시세 지연: {', '.join(stale_syms)} (마지막 가격 표시)")
+recent = recent_alerts(ALERT_FILE, 5) # 신호 워커가 보낸 익절/손절 알림
+if recent:
+    with st.sidebar.expander(f"🔔 최근 알림 ({len(recent)})", expanded=False):
+        for al in recent:
+            st.caption(f"{datetime.fromtimestamp(al['at']):%m-%d %H:%M} {al['message']}")
 
 # ==============================================================================
 # MODE A: 🏹 단기 스나이퍼
 # ==============================================================================
 if mode == "🏹 단기 스나이퍼":
     st.title("🏹 단기 스나이퍼 (Live)")
-    st.caption(f"기준 시간: {datetime.now().strftime('%H:%M:%S')} | TQQQ 현재가: ${tqqq_price:.2f}")
-    
-    # 저널 로드
-    def load_short_journal():
-        if not os.path.exists(SHORT_JOURNAL):
-            return pd.DataFrame(columns=['ID','Date','Type','Price','Shares','TP_Half','TP_Full','SL','Status','Profit','Note'])
-        return pd.read_csv(SHORT_JOURNAL)
+    st.caption(f"기준 시간: {datetime.now().strftime('%H:%M:%S')} | TQQQ 현재가: " + ("-" if pd.isna(tqqq_price) else f"${tqqq_price:.2f}"))
     
-    journal = load_short_journal()
+    def render_trade_row(row):
+        """거래 관리 리스트의 한 줄 (보유 중이면 매도/삭제 조작 포함)"""
+        with st.container(border=True):
+            col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 2, 3])
+            
+            if row['Type'] == 'Sell':
+                status_icon = "🔵"; type_str = "매도"
+            else:
+                status_icon = "🟢" if row['Status'] in ['Open', 'Half_Open'] else "⚪"; type_str = "매수"
+
+            col1.write(f"**#{row['ID']}** {status_icon}")
+            col2.write(f"{row['Date']}")
+            col3.write(f"{type_str}: ${row['Price']:.2f} ({row['Shares']}주)")
+            
+            if row['Status'] in ['Open', 'Half_Open'] and row['Type'] == 'Buy':
+                cur_price = row['Price'] if pd.isna(tqqq_price) else tqqq_price # 시세 불러오기 전이면 평단 기준
+                pnl_pct = (cur_price - row['Price']) / row['Price'] * 100
+                p_col = "green" if pnl_pct > 0 else "red"
+                col4.markdown(f"수익률: :{p_col}[{pnl_pct:.2f}%]")
+                
+                action = col5.selectbox("매도/관리", ["-", "반익절 (50%)", "전량 익절 (Win)", "전량 손절 (Loss)", "기록 삭제"], key=f"act_{row['ID']}")
+                
+                if action != "-" and action != "기록 삭제":
+                    exec_price = col5.number_input("실제 체결가($)", value=float(cur_price), key=f"pr_{row['ID']}")
+                    
+                    if st.button(f"실행 ({action})", key=f"btn_{row['ID']}"):
+                        if action == "반익절 (50%)":
+                            book.record_close(db, row['ID'], 'Half_Open', row['Shares'] / 2, exec_price)
+                        elif action in ["전량 익절 (Win)", "전량 손절 (Loss)"]:
+                            book.record_close(db, row['ID'], 'Closed', row['Shares'], exec_price)
+                        st.rerun()
+                
+                elif action == "기록 삭제":
+                    if st.button("삭제", key=f"del_{row['ID']}"):
+                        book.record_delete(db, row['ID']); st.rerun()
+            else:
+                p_col = "green" if row['Profit'] > 0 else "red"
+                col4.markdown(f"확정손익: :{p_col}[${row['Profit']:.2f}]")
+                if col5.button("🗑️ 삭제", key=f"del_c_{row['ID']}"):
+                    book.record_delete(db, row['ID']); st.rerun()
 
-    tab1, tab2, tab3 = st.tabs(["🏠 내 자산 현황", "🚦 오늘 판독기", "📒 매매일지"])
+    def render_intraday_chart(store, signal):
+        """QQQ(위, MA50/MA200/ExitLine 기준선) + TQQQ(아래) 오늘 세션 1분봉과 VWAP"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+        fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.06, subplot_titles=("QQQ", "TQQQ"))
+        summary = []
+        for r, sym in enumerate(["QQQ", "TQQQ"], 1):
+            bars = store.frame(sym)
+            if bars.empty: continue
+            stat = store.stats(sym)
+            fig.add_trace(go.Scatter(x=bars.index, y=bars['Close'], name=sym, line=dict(width=1.5)), row=r, col=1)
+            fig.add_hline(y=stat['vwap'], line=dict(color="gray", dash="dot"), annotation_text="VWAP", row=r, col=1)
+            b = stat['bar']
+            summary.append(f"{sym} 시 ${b['open']:.2f} · 고 ${stat['high']:.2f} · 저 ${stat['low']:.2f} · 현 ${stat['last']:.2f} · VWAP ${stat['vwap']:.2f}")
+        if not summary:
+            st.info("오늘 분봉이 아직 없습니다."); return
+        for name, y, color in [("MA50", signal['ma50'], "green"), ("MA200", signal['ma200'], "orange"), ("ExitLine", signal['exit_line'], "red")]:
+            fig.add_hline(y=y, line=dict(color=color, dash="dash"), annotation_text=name, row=1, col=1)
+        fig.update_layout(height=520, showlegend=False, margin=dict(l=10, r=10, t=30, b=10))
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(" | ".join(summary))
+
+    tab1, tab2, tab3, tab4 = st.tabs(["🏠 내 자산 현황", "🚦 오늘 판독기", "📒 매매일지", "📈 백테스트"])
 
     # --- Tab 1: 자산 현황 ---
     with tab1:
         st.header(f"💰 내 자산 현황")
         
-        open_trades = journal[journal['Status'].isin(['Open', 'Half_Open'])].copy()
-        total_invested = 0
-        current_val = 0
-        unrealized_pnl = 0
-        
-        if not open_trades.empty:
-            total_invested = (open_trades['Price'] * open_trades['Shares']).sum()
-            current_val = (tqqq_price * open_trades['Shares']).sum()
-            unrealized_pnl = current_val - total_invested
-
-        realized_profit = journal['Profit'].sum()
+        open_trades = book.positions(SHORT)
+        tot = book.totals(SHORT)
         
         m1, m2, m3, m4 = st.columns(4)
-        m1.metric("총 매수 금액", f"${total_invested:,.2f}")
-        m2.metric("총 평가 자산", f"${current_val:,.2f}", delta=f"${unrealized_pnl:,.2f}")
-        m3.metric("실현 수익금", f"${realized_profit:,.2f}", delta_color="normal")
-        
-        return_rate = (unrealized_pnl / total_invested * 100) if total_invested > 0 else 0
-        m4.metric("수익률", f"{return_rate:.2f}%")
+        m1.metric("총 매수 금액", f"${tot['cost']:,.2f}")
+        m2.metric("총 평가 자산", f"${tot['value']:,.2f}", delta=f"${tot['unrealized']:,.2f}")
+        m3.metric("실현 수익금", f"${tot['realized']:,.2f}", delta_color="normal")
+        m4.metric("수익률", f"{tot['return_pct']:.2f}%")
 
         st.divider()
         st.subheader("📦 보유 계좌 상세")
         if not open_trades.empty:
-            open_trades['Current_Price'] = tqqq_price
-            open_trades['Return(%)'] = (tqqq_price - open_trades['Price']) / open_trades['Price'] * 100
-            open_trades['Value($)'] = open_trades['Shares'] * tqqq_price
-            
-            display_df = open_trades[['ID', 'Date', 'Shares', 'Price', 'Current_Price', 'Return(%)', 'Value($)', 'Status']]
+            display_df = open_trades[['Key', 'Date', 'Shares', 'Avg_Price', 'Price', 'Return(%)', 'Value', 'Status']]
             display_df.columns = ['ID', '매수일', '수량', '평단가', '현재가', '수익률', '평가금액', '상태']
             
-            st.dataframe(
-                display_df.style.format({
-                    '평단가': '${:.2f}', '현재가': '${:.2f}', 
-                    '수익률': '{:.2f}%', '평가금액': '${:,.2f}'
-                }).applymap(lambda x: 'color: red' if x < 0 else 'color: green', subset=['수익률']),
-                use_container_width=True
-            )
+            with timing.stage("styler_positions", rows=len(display_df)):
+                st.dataframe(
+                    display_df.style.format({
+                        '평단가': '${:.2f}', '현재가': '${:.2f}', 
+                        '수익률': '{:.2f}%', '평가금액': '${:,.2f}'
+                    }).applymap(lambda x: 'color: red' if x < 0 else 'color: green', subset=['수익률']),
+                    use_container_width=True
+                )
         else:
             st.info("보유 중인 종목이 없습니다.")
 
     # --- Tab 2: 오늘 판독기 ---
     with tab2:
-        is_bull = last['Q_Close'] >= last['Q_MA200']
-        rsi_th = 90 if is_bull else 80
-        curr_rsi = last['Q_RSI3']
-        curr_slope = last['Slope_Accel']
+        if not waiting_for(signal, "오늘 신호"):
+            is_bull = signal['is_bull']
+            rsi_th = signal['rsi_th']
+            curr_rsi = signal['rsi']
         
-        # 지표는 일봉 기준(안정성), 가격은 실시간 표시
-        c1, c2, c3 = st.columns(3)
-        c1.metric("추세 (MA200)", "Bull" if is_bull else "Bear")
-        c2.metric(f"RSI(3)", f"{curr_rsi:.2f}", f"기준 {rsi_th}")
-        c3.metric("QQQ 현재가", f"${qqq_price_live:.2f}")
+            # 지표는 일봉 기준(안정성), 가격은 실시간 표시
+            c1, c2, c3 = st.columns(3)
+            c1.metric("추세 (MA200)", "Bull" if is_bull else "Bear")
+            c2.metric(f"RSI({RSI_P})", f"{curr_rsi:.2f}", f"기준 {rsi_th}")
+            c3.metric("QQQ 현재가", f"${qqq_price_live:.2f}")
         
-        st.divider()
-        if (curr_rsi < rsi_th) and curr_slope:
-            st.success("## 🔥 [진입 신호] 오늘 종가(LOC) 매수!")
-            st.markdown(f"**손절 {SL_PCT}% / 반익 {TP_HALF}% / 완익 {TP_FULL}%**")
-        else:
-            st.info("## 💤 [관망] 진입 조건 대기 중")
+            st.divider()
+            if signal['entry']:
+                st.success("## 🔥 [진입 신호] 오늘 종가(LOC) 매수!")
+                st.markdown(f"**손절 {SL_PCT}% / 반익 {TP_HALF}% / 완익 {TP_FULL}%**")
+            else:
+                st.info("## 💤 [관망] 진입 조건 대기 중")
+        
+            # 장중 가상 신호: 지금 가격이 오늘 종가라면
+            pv = signal['preview']
+            if pv is not None:
+                st.caption(f"⏱️ 지금 종가라면: RSI({RSI_P}) {pv['rsi']:.2f} (기준 {pv['rsi_th']}) | 기울기 가속 {'O' if pv['slope_accel'] else 'X'} → {'🔥 진입' if pv['entry'] else '💤 관망'}")
+        
+            # 장중 분봉 차트 (켰을 때만 분봉 갱신 - 워커 스냅샷을 쓰는 중이면 평소엔 조회 없음)
+            if st.toggle("📉 장중 분봉 차트", key="intraday_on"):
+                with timing.stage("intraday_chart"):
+                    get_quote_service().get(["QQQ", "TQQQ"])
+                    render_intraday_chart(get_intraday_store(), signal)
+
+            # 전체 기간 차트: 고른 구간만 잘라 화면 폭만큼의 점으로 줄여서 전송 (짧은 구간은 원본 해상도)
+            if df is not None and st.toggle("📊 전체 기간 차트", key="history_on"):
+                from charts import RANGES, DESKTOP_POINTS, PHONE_POINTS, range_start, history_figure
+                c1, c2 = st.columns([4, 1])
+                rng = c1.radio("구간", list(RANGES) + ["직접"], index=3, horizontal=True, key="history_range")
+                phone = c2.toggle("📱 모바일", key="history_phone")
+                h_start, h_end = range_start(df.index, rng), None
+                if rng == "직접":
+                    picked = st.date_input("구간 선택", value=((range_start(df.index, '1Y') or df.index[0]).date(), curr_date),
+                                           min_value=df.index[0].date(), max_value=curr_date, key="history_dates")
+                    if len(picked) == 2: h_start, h_end = picked
+                h_start = None if h_start is None else str(pd.Timestamp(h_start).date())
+                h_end = None if h_end is None else str(h_end)
+                points = PHONE_POINTS if phone else DESKTOP_POINTS
+                with timing.stage("history_chart", range=rng, points=points):
+                    series = cached_chart_series(df, market.version, h_start, h_end, points)
+                    markers = cached_markers(db.revision(), h_start, h_end)
+                    fig = history_figure(series, markers, height=480 if phone else 640)
+                st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': not phone})
+                shown = sum(len(v) for v in series.values())
+                st.caption(f"전송 {shown:,}점 · 매매 표시 {len(markers)}건")
             
         st.divider()
         st.subheader("📋 보유 포지션 분석")
         
-        open_trades = journal[journal['Status'].isin(['Open', 'Half_Open'])].copy()
+        open_trades = book.positions(SHORT).drop(columns='Price').rename(columns={'Key': 'ID', 'Avg_Price': 'Price'})
         
         if not open_trades.empty:
             open_trades['Date'] = pd.to_datetime(open_trades['Date'])
@@ -230,19 +329,19 @@ if mode == "🏹 단기 스나이퍼":
             open_trades['Exp_Half'] = open_trades['Price'] * (1 + TP_HALF/100)
             open_trades['Exp_Full'] = open_trades['Price'] * (1 + TP_FULL/100)
             open_trades['Exp_SL'] = open_trades['Price'] * (1 + SL_PCT/100)
-            open_trades['Return(%)'] = (tqqq_price - open_trades['Price']) / open_trades['Price'] * 100
             
             view_df = open_trades[['ID', 'Date', 'Price', 'Shares', 'Return(%)', 'Exp_Half', 'Exp_Full', 'Exp_SL', 'D-Day']]
             view_df['Date'] = view_df['Date'].dt.date
             view_df.columns = ['ID', '매수일', '평단가', '수량', '수익률', '반익절가', '완익절가', '손절가', '보유일']
             
-            st.dataframe(
-                view_df.style.format({
-                    '평단가': '${:.2f}', '반익절가': '${:.2f}', '완익절가': '${:.2f}', '손절가': '${:.2f}',
-                    '수익률': '{:.2f}%'
-                }).applymap(lambda x: 'color: red' if x < 0 else 'color: green', subset=['수익률']),
-                use_container_width=True
-            )
+            with timing.stage("styler_signal_positions", rows=len(view_df)):
+                st.dataframe(
+                    view_df.style.format({
+                        '평단가': '${:.2f}', '반익절가': '${:.2f}', '완익절가': '${:.2f}', '손절가': '${:.2f}',
+                        '수익률': '{:.2f}%'
+                    }).applymap(lambda x: 'color: red' if x < 0 else 'color: green', subset=['수익률']),
+                    use_container_width=True
+                )
 
     # --- Tab 3: 매매일지 ---
     with tab3:
@@ -254,14 +353,12 @@ if mode == "🏹 단기 스나이퍼":
             bp = c2.number_input("매수가($)", 0.0)
             bq = c3.number_input("수량", 1)
             if st.button("매수 저장"):
-                nid = len(journal)+1 if len(journal)>0 else 1
                 new_row = {
-                    'ID':nid, 'Date':bd, 'Type':'Buy', 'Price':bp, 'Shares':bq,
+                    'Date':bd, 'Type':'Buy', 'Price':bp, 'Shares':bq,
                     'TP_Half':bp*(1+TP_HALF/100), 'TP_Full':bp*(1+TP_FULL/100), 'SL':bp*(1+SL_PCT/100),
                     'Status':'Open', 'Profit':0.0, 'Note':'-'
                 }
-                journal = pd.concat([journal, pd.DataFrame([new_row])], ignore_index=True)
-                journal.to_csv(SHORT_JOURNAL, index=False)
+                book.record_buy(db, new_row)
                 st.rerun()
 
         with st.expander("➖ 매도(익절/손절) 기록 추가", expanded=False):
@@ -272,152 +369,124 @@ if mode == "🏹 단기 스나이퍼":
             sprofit = c4.number_input("실현손익($)", 0.0)
             
             if st.button("매도 기록 저장"):
-                nid = len(journal)+1 if len(journal)>0 else 1
                 new_row = {
-                    'ID':nid, 'Date':sd, 'Type':'Sell', 'Price':sp, 'Shares':sq,
+                    'Date':sd, 'Type':'Sell', 'Price':sp, 'Shares':sq,
                     'TP_Half':0, 'TP_Full':0, 'SL':0,
                     'Status':'Closed', 'Profit':sprofit, 'Note':'Manual Sell'
                 }
-                journal = pd.concat([journal, pd.DataFrame([new_row])], ignore_index=True)
-                journal.to_csv(SHORT_JOURNAL, index=False)
+                book.record_sell(db, new_row)
                 st.success("매도 기록 저장 완료"); st.rerun()
         
-        if not journal.empty:
+        with timing.stage("ledger_load"):
+            ledger = get_ledger(db.revision())
+        if len(ledger):
             st.markdown("##### 📜 거래 관리 리스트")
-            edit_df = journal.copy()
-            edit_df['PnL(%)'] = (tqqq_price - edit_df['Price']) / edit_df['Price'] * 100
+            with st.expander("🔎 필터 / 검색", expanded=False):
+                f1, f2, f3, f4 = st.columns(4)
+                f_range = f1.date_input("기간", value=(), key="lg_range")
+                f_types = f2.multiselect("구분", ["Buy", "Sell"], key="lg_types")
+                f_status = f3.multiselect("상태", ["Open", "Half_Open", "Closed"], key="lg_status")
+                f_search = f4.text_input("검색 (ID/날짜/메모)", key="lg_search")
+            f_start = f_range[0] if len(f_range) > 0 else None
+            f_end = f_range[1] if len(f_range) > 1 else f_start
+            with timing.stage("ledger_select", rows=len(ledger)):
+                open_rows, closed_rows, agg = ledger.select(f_start, f_end, f_types, f_status, f_search)
             
-            for idx, row in edit_df.sort_values('ID', ascending=False).iterrows():
-                with st.container(border=True):
-                    col1, col2, col3, col4, col5 = st.columns([1, 2, 2, 2, 3])
-                    
-                    if row['Type'] == 'Sell':
-                        status_icon = "🔵"; type_str = "매도"
-                    else:
-                        status_icon = "🟢" if row['Status'] in ['Open', 'Half_Open'] else "⚪"; type_str = "매수"
-
-                    col1.write(f"**#{row['ID']}** {status_icon}")
-                    col2.write(f"{row['Date']}")
-                    col3.write(f"{type_str}: ${row['Price']:.2f} ({row['Shares']}주)")
-                    
-                    if row['Status'] in ['Open', 'Half_Open'] and row['Type'] == 'Buy':
-                        p_col = "green" if row['PnL(%)'] > 0 else "red"
-                        col4.markdown(f"수익률: :{p_col}[{row['PnL(%)']:.2f}%]")
-                        
-                        action = col5.selectbox("매도/관리", ["-", "반익절 (50%)", "전량 익절 (Win)", "전량 손절 (Loss)", "기록 삭제"], key=f"act_{row['ID']}")
-                        
-                        if action != "-" and action != "기록 삭제":
-                            exec_price = col5.number_input("실제 체결가($)", value=float(tqqq_price), key=f"pr_{row['ID']}")
-                            
-                            if st.button(f"실행 ({action})", key=f"btn_{row['ID']}"):
-                                if action == "반익절 (50%)":
-                                    sold_shares = row['Shares'] / 2
-                                    profit = (exec_price - row['Price']) * sold_shares
-                                    journal.at[idx, 'Status'] = 'Half_Open'
-                                    journal.at[idx, 'Profit'] += profit
-                                    journal.at[idx, 'Shares'] = sold_shares 
-                                elif action in ["전량 익절 (Win)", "전량 손절 (Loss)"]:
-                                    profit = (exec_price - row['Price']) * row['Shares']
-                                    journal.at[idx, 'Status'] = 'Closed'
-                                    journal.at[idx, 'Profit'] += profit
-                                    journal.at[idx, 'Shares'] = 0
-                                journal.to_csv(SHORT_JOURNAL, index=False); st.rerun()
-                        
-                        elif action == "기록 삭제":
-                            if st.button("삭제", key=f"del_{row['ID']}"):
-                                journal = journal.drop(idx); journal.to_csv(SHORT_JOURNAL, index=False); st.rerun()
-                    else:
-                        p_col = "green" if row['Profit'] > 0 else "red"
-                        col4.markdown(f"확정손익: :{p_col}[${row['Profit']:.2f}]")
-                        if col5.button("🗑️ 삭제", key=f"del_c_{row['ID']}"):
-                            journal = journal.drop(idx); journal.to_csv(SHORT_JOURNAL, index=False); st.rerun()
+            a1, a2, a3, a4 = st.columns(4)
+            a1.metric("거래 수", f"{agg['count']:,}")
+            a2.metric("보유 중", f"{agg['open']:,}")
+            a3.metric("승 / 패", f"{agg['wins']:,} / {agg['losses']:,}")
+            a4.metric("실현손익 합계", f"${agg['realized']:,.2f}")
+            
+            # 보유 중 거래는 항상 먼저, 종료된 거래는 현재 페이지만 그림
+            with timing.stage("ledger_render"):
+                for _, row in open_rows.iterrows():
+                    render_trade_row(row)
+                if not closed_rows.empty:
+                    n_pages = page_of(closed_rows, 0)[1]
+                    pg = st.number_input(f"종료된 거래 페이지 (총 {n_pages}쪽, {len(closed_rows):,}건)", 1, n_pages, 1, key=f"lg_page_{n_pages}")
+                    for _, row in page_of(closed_rows, pg - 1)[0].iterrows():
+                        render_trade_row(row)
+
+    # --- Tab 4: 백테스트 ---
+    with tab4:
+        st.subheader("📈 현재 파라미터 과거 성과")
+        if not waiting_for(df, "백테스트"):
+            from backtest import LOT_USD
+            st.caption(f"RSI({RSI_P}) / 기울기 {SLOPE_LAG}일 / 반익 {TP_HALF}% / 완익 {TP_FULL}% / 손절 {SL_PCT}% · 신호일마다 ${LOT_USD:,.0f} 매수")
+            with timing.stage("backtest"):
+                bt_stats, bt_equity = cached_backtest(df, market.version)
+            b1, b2, b3, b4 = st.columns(4)
+            b1.metric("거래 수", f"{bt_stats['trades']:,}", f"반익절 {bt_stats['half_exits']:,}")
+            b2.metric("승률", f"{bt_stats['win_rate']:.1f}%")
+            b3.metric("누적 손익", f"${bt_stats['total_pnl']:,.0f}", f"평균 {bt_stats['avg_ret']:.2f}%")
+            b4.metric("최대 낙폭", f"${bt_stats['max_dd']:,.0f}", f"최대 동시 보유 {bt_stats['max_open']}")
+            st.line_chart(bt_equity)
 
 # ==============================================================================
 # MODE B: 🚜 장기 졸업 프로젝트
 # ==============================================================================
 elif mode == "🚜 장기 졸업 프로젝트":
     st.title("🚜 장기 졸업 프로젝트 (Live)")
+    from long_plan import simulate_plan, TICKER_COLS
     
-    if not os.path.exists(LONG_PORTFOLIO):
-        # 초기화 데이터
-        init_data = [{"Account": 1, "Ticker": "TQQQ", "Shares": 0, "Avg_Price": 0.0, "Level": 0}]
-        pd.DataFrame(init_data).to_csv(LONG_PORTFOLIO, index=False)
-    if not os.path.exists(LONG_BALANCE):
-        pd.DataFrame([{"KRW": 16000000}]).to_csv(LONG_BALANCE, index=False)
-    if not os.path.exists(LONG_JOURNAL):
-        pd.DataFrame(columns=['Date', 'Account', 'Type', 'Qty', 'Price', 'Amount', 'Note']).to_csv(LONG_JOURNAL, index=False)
-
-    pf_df = pd.read_csv(LONG_PORTFOLIO)
-    bal_df = pd.read_csv(LONG_BALANCE)
-    log_df = pd.read_csv(LONG_JOURNAL)
-    cash_krw = float(bal_df.iloc[0]['KRW'])
-
-    t1, t2, t3, t4 = st.tabs(["🏠 내 자산 현황", "🚦 오늘의 지령", "📒 매매일지", "⚙️ 관리"])
+    with timing.stage("long_journal_read"):
+        pf_df = db.portfolio()
+        log_df = db.long_journal()
+    cash_krw = book.cash_krw
+
+    t1, t2, t3, t4, t5, t6 = st.tabs(["🏠 내 자산 현황", "🚦 오늘의 지령", "📒 매매일지", "⚙️ 관리", "🧪 시뮬레이션", "🎲 리스크"])
 
     with t1:
         st.header("📦 계좌별 현황")
-        rows = []
-        total_invest_krw = 0; total_eval_krw = 0
-        
-        for idx, row in pf_df.iterrows():
-            ticker = row['Ticker']
-            shares = row['Shares']
-            avg = row['Avg_Price']
-            # 실시간 가격 적용
-            if ticker == 'TQQQ': cur_p = tqqq_price
-            elif ticker == 'QQQ': cur_p = qqq_price_live
-            elif ticker == 'QLD': cur_p = qld_price_live if qld_price_live else tqqq_price*0.7
-            else: cur_p = tqqq_price # 예외처리
-
-            invest_krw = shares * avg * usd_krw
-            eval_krw = shares * cur_p * usd_krw
-            total_invest_krw += invest_krw; total_eval_krw += eval_krw
-            pnl_pct = (cur_p - avg) / avg * 100 if avg > 0 else 0
-            
-            rows.append({
-                "계좌": f"#{row['Account']}", "종목": ticker, "수량": shares,
-                "평단": f"${avg:.2f}", "현재가": f"${cur_p:.2f}",
-                "수익률": f"{pnl_pct:.2f}%", "평가액": f"{eval_krw:,.0f}"
-            })
+        pos = book.positions(LONG)
+        tot = book.totals(LONG)
         
-        total_asset = cash_krw + total_eval_krw
-        total_pnl = total_eval_krw - total_invest_krw
-        total_ret = (total_pnl / total_invest_krw * 100) if total_invest_krw > 0 else 0
+        total_asset = cash_krw + tot['value_krw']
+        total_pnl = tot['unrealized_krw']
+        total_ret = tot['return_pct']
         
-        df_view = pd.DataFrame(rows)
+        # 종목별 실시간 가격은 가격 벡터에서 한 번에 (시세 없는 종목은 '-')
+        df_view = pd.DataFrame({
+            "계좌": "#" + pos['Account'].astype(str), "종목": pos['Ticker'], "수량": pos['Shares'],
+            "평단": pos['Avg_Price'].map("${:.2f}".format), "현재가": pos['Price'].map(lambda p: "-" if pd.isna(p) else f"${p:.2f}"),
+            "수익률": pos['Return(%)'].map(lambda r: "-" if pd.isna(r) else f"{r:.2f}%"), "평가액": pos['Value_KRW'].map(lambda v: "-" if pd.isna(v) else f"{v:,.0f}")
+        })
         c1, c2, c3 = st.columns(3)
         c1.metric("총 자산", f"{total_asset:,.0f} 원")
         c2.metric("보유 현금", f"{cash_krw:,.0f} 원")
         c3.metric("주식 수익", f"{total_ret:.2f}%", delta=f"{total_pnl:,.0f} 원")
         st.divider(); st.dataframe(df_view, use_container_width=True)
 
+        acc = book.summary(LONG)  # 계좌 x 종목 합계 (거래/시세가 바뀔 때만 다시 집계, 장기는 실현손익 없음)
+        if not acc.empty:
+            won = lambda v: "-" if pd.isna(v) else f"{v:,.0f}"
+            st.caption("계좌별 합계 (원)")
+            st.dataframe(pd.DataFrame({
+                "계좌": "#" + acc['Account'].astype(str), "종목": acc['Ticker'], "수량": acc['Shares'],
+                "원가": acc['Cost_KRW'].map(won), "평가액": acc['Value_KRW'].map(won),
+                "미실현": acc['Unrealized_KRW'].map(won),
+            }), use_container_width=True)
+
     with t2:
-        ma50 = last['Q_MA50']; ma200 = last['Q_MA200']; exit_l = last['ExitLine']
-        # 위치 판독은 실시간 QQQ 가격 기준
-        q_c = qqq_price_live 
+        if not waiting_for(signal, "위치 판독"):
+            ma50 = signal['ma50']; ma200 = signal['ma200']; exit_l = signal['exit_line']
+            # 위치 판독은 실시간 QQQ 가격 기준
+            q_c = signal['q_live']
         
-        st.subheader("📢 QQQ 위치 판독 (Live)")
-        status_data = [
-            {"지표": "MA50 (공격)", "기준": f"${ma50:.2f}", "현재": f"${q_c:.2f}", "상태": "🟢 위" if q_c > ma50 else "⚪ 아래"},
-            {"지표": "MA200 (방어)", "기준": f"${ma200:.2f}", "현재": f"${q_c:.2f}", "상태": "🟢 위" if q_c > ma200 else "🔴 아래"},
-            {"지표": "Exit Line", "기준": f"${exit_l:.2f}", "현재": f"${q_c:.2f}", "상태": "🟢 위" if q_c > exit_l else "🚨 붕괴"},
-        ]
-        st.dataframe(pd.DataFrame(status_data), use_container_width=True)
+            st.subheader("📢 QQQ 위치 판독 (Live)")
+            status_data = [
+                {"지표": "MA50 (공격)", "기준": f"${ma50:.2f}", "현재": f"${q_c:.2f}", "상태": "🟢 위" if signal['above_ma50'] else "⚪ 아래"},
+                {"지표": "MA200 (방어)", "기준": f"${ma200:.2f}", "현재": f"${q_c:.2f}", "상태": "🟢 위" if signal['above_ma200'] else "🔴 아래"},
+                {"지표": "Exit Line", "기준": f"${exit_l:.2f}", "현재": f"${q_c:.2f}", "상태": "🚨 붕괴" if signal['exit_breach'] else "🟢 위"},
+            ]
+            st.dataframe(pd.DataFrame(status_data), use_container_width=True)
         
-        st.subheader("💰 익절 체크")
-        cnt=0
-        for idx, row in pf_df.iterrows():
-            if row['Ticker'] == 'TQQQ': cur = tqqq_price
-            elif row['Ticker'] == 'QLD': cur = qld_price_live if qld_price_live else 0
-            else: cur = 0
-            
-            if cur > 0 and row['Avg_Price'] > 0:
-                pnl = (cur - row['Avg_Price'])/row['Avg_Price']*100
-                tgt = int(pnl/20)
-                if tgt > row['Level'] and row['Shares']>0:
-                    qty = int(row['Shares']*0.1)
-                    st.warning(f"🔔 #{row['Account']} 수익 {pnl:.1f}%! {qty}주 매도"); cnt+=1
-        if cnt==0: st.info("✅ 특이사항 없음")
+            st.subheader("💰 익절 체크")
+            ladder = [c for c in tp_checks if c['kind'] == 'Ladder']
+            for c in ladder:
+                st.warning(f"🔔 #{c['key']} 수익 {c['return_pct']:.1f}%! {int(c['shares'])}주 매도")
+            if not ladder: st.info("✅ 특이사항 없음")
 
     with t3:
         st.subheader("📒 매매 기록")
@@ -431,18 +500,125 @@ elif mode == "🚜 장기 졸업 프로젝트":
             if st.button("저장"):
                 amt = lq * lp
                 new_log = {'Date':ld, 'Account':la, 'Type':lt, 'Qty':lq, 'Price':lp, 'Amount':amt, 'Note':'-'}
-                log_df = pd.concat([log_df, pd.DataFrame([new_log])], ignore_index=True)
-                log_df.to_csv(LONG_JOURNAL, index=False); st.rerun()
+                book.record_long_log(db, new_log); st.rerun()
         if not log_df.empty:
-            st.dataframe(log_df.sort_index(ascending=False), use_container_width=True)
+            st.dataframe(log_df.sort_values('ID', ascending=False), use_container_width=True)
             if st.button("최근 기록 삭제"):
-                log_df = log_df[:-1]; log_df.to_csv(LONG_JOURNAL, index=False); st.rerun()
+                book.record_long_log(db); st.rerun()
 
     with t4:
         with st.expander("💵 현금 관리"):
             amt = st.number_input("금액", step=10000)
-            if st.button("입금"): bal_df.iloc[0]['KRW']+=amt; bal_df.to_csv(LONG_BALANCE, index=False); st.rerun()
-            if st.button("출금"): bal_df.iloc[0]['KRW']-=amt; bal_df.to_csv(LONG_BALANCE, index=False); st.rerun()
+            if st.button("입금"): book.record_cash(db, amt); st.rerun()
+            if st.button("출금"): book.record_cash(db, -amt); st.rerun()
         st.write("📊 데이터 수정")
         new_pf = st.data_editor(pf_df, num_rows="dynamic")
-        if st.button("저장"): new_pf.to_csv(LONG_PORTFOLIO, index=False); st.rerun()
+        if st.button("저장"): book.record_portfolio(db, new_pf); st.rerun()
+
+    with t5:
+        st.subheader("🧪 졸업 플랜 전체 기간 시뮬레이션 (KRW)")
+        st.caption("MA50+MA200 위 매수 / ExitLine 붕괴 전량 매도 / 수익 20%마다 10% 익절 · 시드는 계좌별 균등 분배")
+        if not waiting_for(df, "시뮬레이션"):
+            c1, c2 = st.columns(2)
+            sim_seed = c1.number_input("시드 (원)", value=SEED_KRW, step=1000000)
+            sim_tickers = c2.text_input("계좌별 종목", ", ".join(pf_df['Ticker'].astype(str)) or "TQQQ")
+            sim_tickers = [t.strip().upper() for t in sim_tickers.split(",") if t.strip().upper() in TICKER_COLS]
+            if sim_tickers and st.button("시뮬레이션 실행"):
+                with timing.stage("plan_simulation", accounts=len(sim_tickers)):
+                    summary, daily, events = simulate_plan(df, sim_tickers, seed_krw=sim_seed)
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("최종 자산", f"{summary['final_krw']:,.0f} 원")
+                m2.metric("연환산 수익률", f"{summary['cagr']:.2f}%")
+                m3.metric("최대 낙폭", f"{summary['max_dd']:.1f}%")
+                m4.metric("익절/청산", f"{summary['ladder_sells']} / {summary['exits']}")
+                st.line_chart(daily['Total'])
+                st.dataframe(events.sort_values('Date', ascending=False), use_container_width=True)
+
+    with t6:
+        st.subheader("🎲 미래 경로 리스크 (몬테카를로, KRW)")
+        st.caption(f"과거 TQQQ/QLD/QQQ/환율 일간 수익률을 {RISK_BLOCK}거래일 블록으로 섞어 만든 경로에 현재 보유 + 현금으로 졸업 플랜 규칙 적용")
+        if not waiting_for(df, "리스크 계산"):
+            pos = book.positions(LONG)
+            pos = pos[pos['Ticker'].isin(TICKER_COLS)]
+            c1, c2, c3 = st.columns(3)
+            risk_years = c1.number_input("기간 (년)", 1, 20, RISK_YEARS)
+            risk_paths = c2.number_input("경로 수", 1000, 200000, RISK_PATHS, step=10000)
+            risk_target = c3.number_input("목표 자산 (원)", value=RISK_TARGET_KRW, step=10000000)
+            if pos.empty: st.info("장기 계좌가 없습니다 (⚙️ 관리에서 포트폴리오 입력)")
+            elif st.button("리스크 계산"):
+                holdings = (tuple(pos['Ticker']), tuple(pos['Shares'].astype(float)), tuple(pos['Avg_Price'].astype(float)),
+                            tuple(pos['Level'].astype(float)))
+                prices = tuple((t, float(prices_now[t])) for t in TICKER_COLS if t in prices_now)
+                with st.spinner(f"{risk_paths:,}개 경로 계산 중..."), timing.stage("risk_simulation", paths=risk_paths, years=risk_years):
+                    rs, fan, _ = cached_risk(df, market.version, holdings, float(cash_krw), prices, float(usd_krw),
+                                             int(risk_years), int(risk_paths), float(risk_target))
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("현재 자산", f"{rs['start_krw']:,.0f} 원")
+                m2.metric(f"{risk_years}년 후 중앙값", f"{rs['median_final']:,.0f} 원")
+                m3.metric("손실 확률", f"{rs['loss_prob']:.1f}%")
+                if 'target_prob' in rs:
+                    m4.metric("목표 도달 확률", f"{rs['target_prob']:.1f}%",
+                              delta=None if rs['target_median_years'] is None else f"중앙 {rs['target_median_years']:.1f}년")
+                m1, m2, m3, m4 = st.columns(4)
+                m1.metric("VaR 95% (기간)", f"-{rs['var95']:.1f}%", delta=f"CVaR -{rs['cvar95']:.1f}%", delta_color="off")
+                m2.metric("VaR 99% (기간)", f"-{rs['var99']:.1f}%", delta=f"CVaR -{rs['cvar99']:.1f}%", delta_color="off")
+                if 'var95_1y' in rs:
+                    m3.metric("VaR 95% (1년)", f"-{rs['var95_1y']:.1f}%", delta=f"CVaR -{rs['cvar95_1y']:.1f}%", delta_color="off")
+                m4.metric("최대 낙폭 (중앙 / 하위 5%)", f"{rs['median_dd']:.1f}%", delta=f"{rs['p95_dd']:.1f}%", delta_color="off")
+                st.line_chart(fan)
+                tr = rs['trades_per_path']
+                st.caption(f"경로당 평균 매수 {tr['buy']:.1f} · 익절 {tr['ladder']:.1f} · ExitLine 청산 {tr['exit']:.1f} 회")
+
+# ==============================================================================
+# MODE C: 🔭 스크리너 (기초지수 -> 레버리지 ETF 쌍 전체에 같은 규칙 적용)
+# ==============================================================================
+elif mode == "🔭 스크리너":
+    st.title("🔭 레버리지 스크리너")
+    from screener import parse_pairs
+    st.caption(f"MA200 위 RSI({RSI_P}) < 90 / 아래 < 80 + 기울기 가속 = 진입 · 일봉 종가 기준 · 진입 신호 → RSI 여유 순")
+    c1, c2 = st.columns([3, 1])
+    pairs_text = c1.text_area("종목 (기초지수:레버리지, 쉼표 구분)", ", ".join(f"{u}:{l}" for u, l in SCREEN_PAIRS.items()), height=80)
+    only_entry = c2.checkbox("진입 신호만", value=False)
+    pairs = tuple(parse_pairs(pairs_text).items())
+    if pairs:
+        with st.spinner("📡 종목 데이터 갱신 중..."), timing.stage("screener", symbols=len(pairs)):
+            ranked, fetched_ok = run_screener(pairs)
+        if not fetched_ok: st.warning("⚠️ 일부 종목 갱신 실패 - 저장된 마지막 데이터 기준")
+        view = ranked[ranked['Entry']] if only_entry else ranked
+        m1, m2, m3 = st.columns(3)
+        m1.metric("종목 수", f"{len(ranked):,}")
+        m2.metric("🔥 진입 신호", f"{int(ranked['Entry'].sum()):,}")
+        m3.metric("🚨 ExitLine 붕괴", f"{int(ranked['Exit_Breach'].sum()):,}")
+        st.dataframe(
+            view.assign(
+                추세=np.where(view['Bull'], "Bull", "Bear"), 신호=np.where(view['Entry'], "🔥 진입", "💤 관망"),
+                **{"MA50 위치": np.where(view['Above_MA50'], "🟢 위", "⚪ 아래"), "MA200 위치": np.where(view['Above_MA200'], "🟢 위", "🔴 아래"),
+                   "ExitLine 위치": np.where(view['Exit_Breach'], "🚨 붕괴", "🟢 위")},
+            )[['Underlying', 'Leveraged', 'Date', 'Close', 'Lev_Close', '추세', 'RSI', 'RSI_Th', '신호', 'MA50 위치', 'MA200 위치', 'ExitLine 위치',
+               'MA50', 'MA200', 'ExitLine', 'Exit_Gap(%)', 'Score']]
+            .rename(columns={'Underlying': '기초', 'Leveraged': '레버리지', 'Date': '기준일', 'Close': '종가', 'Lev_Close': '레버리지 종가', 'RSI_Th': '기준'}),
+            use_container_width=True, hide_index=True,
+            column_config={'종가': st.column_config.NumberColumn(format="$%.2f"), '레버리지 종가': st.column_config.NumberColumn(format="$%.2f"),
+                           'RSI': st.column_config.NumberColumn(format="%.1f"), 'Exit_Gap(%)': st.column_config.NumberColumn(format="%.1f%%"),
+                           'Score': st.column_config.NumberColumn(format="%.1f"), 'MA50': st.column_config.NumberColumn(format="$%.2f"),
+                           'MA200': st.column_config.NumberColumn(format="$%.2f"), 'ExitLine': st.column_config.NumberColumn(format="$%.2f")}
+        )
+
+# ==========================================
+# 4. 성능 측정 패널 (이번 rerun 의 구간별 소요 시간)
+# ==========================================
+with st.sidebar.expander("⏱️ 성능 측정", expanded=False):
+    st.checkbox("구간별 시간 측정", value=TIMING, key="timing_on", help="켜면 다음 rerun 부터 기록 + timing.jsonl 에 한 줄씩 남김")
+    recs = timing.records()
+    if recs:
+        rec_df = pd.DataFrame(recs)[['stage', 'ms']]
+        st.dataframe(rec_df, use_container_width=True, hide_index=True)
+        st.caption(f"합계 {rec_df['ms'].sum():.1f} ms")
+
+# ==========================================
+# 5. 늦게 도착하는 데이터 (화면을 먼저 그린 뒤 새 일봉/시세를 받아 한 번 더 그림)
+# ==========================================
+if market_loading or quotes_pending:
+    with st.sidebar, st.spinner("🚀 실시간 시세 조회 중..."), timing.stage("late_data"):
+        changed = late_data(get_shared_market(), market, get_quote_service(), book, wait_market=market_loading)
+    if changed: st.rerun() # 받은 게 없으면(오프라인) 다시 그리지 않음 -> 무한 rerun 없음
@@ -0,0 +1,194 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import RSI_P, SLOPE_LAG, TP_HALF, TP_FULL, SL_PCT
+from indicators import compute_indicators
+
+# ==========================================
+# 단기 스나이퍼 백테스트 (배열 연산 + 병렬 파라미터 스윕)
+# ==========================================
+# 규칙 (app.py 단기 모드와 동일)
+# - 진입: 일봉 종가 기준 RSI < (MA200 위 90 / 아래 80) 그리고 Slope_Accel -> 당일 종가(LOC) 매수
+# - 신호가 뜬 날마다 1 로트(lot_usd 달러)씩 매수, 로트별로 따로 청산
+# - 반익절: 종가가 +TP_HALF% 이상 -> 절반 매도 (Half_Open)
+# - 완익절: 종가가 +TP_FULL% 이상 -> 남은 수량 전부 매도 (반익절 전이면 한 번에 전량)
+# - 손절: 종가가 SL_PCT% 이하 -> 남은 수량 전부 매도
+# - 끝까지 청산 안 된 로트는 마지막 종가로 평가
+LOT_USD = 1000.0
+
+STAT_COLS = ['rsi_p', 'slope_lag', 'tp_half', 'tp_full', 'sl_pct', 'trades', 'closed', 'half_exits',
+             'win_rate', 'avg_ret', 'total_pnl', 'max_dd', 'max_open']
+
+
+def entry_signals(q_close, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+    """QQQ 종가 -> (진입 신호 bool 배열, MA200 유효 구간 bool 배열)"""
+    ind = compute_indicators(pd.DataFrame({'Q_Close': q_close}), rsi_p, slope_lag)
+    valid = ind['Q_MA200'].notna().to_numpy()
+    is_bull = (ind['Q_Close'] >= ind['Q_MA200']).to_numpy()
+    rsi_th = np.where(is_bull, 90, 80)
+    signal = (ind['Q_RSI3'].to_numpy() < rsi_th) & ind['Slope_Accel'].to_numpy() & valid
+    return signal, valid
+
+
+def first_hit(close, level, up=True):
+    """
+    각 i 에 대해 close[j] >= close[i]*level (up) 또는 <= (down) 인 첫 j > i.
+    끝까지 없으면 len(close). 아직 안 맞은 i 만 남겨가며 하루씩 앞으로 비교합니다.
+    """
+    n = len(close)
+    out = np.full(n, n, dtype=np.int64)
+    target = close * level
+    pending = np.arange(n - 1)
+    d = 1
+    while len(pending):
+        pending = pending[pending + d < n]
+        fut = close[pending + d]
+        hit = fut >= target[pending] if up else fut <= target[pending]
+        out[pending[hit]] = pending[hit] + d
+        pending = pending[~hit]
+        d += 1
+    return out
+
+
+class ExitTable:
+    """TP/SL 수준별 first_hit 결과 캐시 (진입 신호와 무관하므로 스윕 전체에서 재사용)"""
+
+    def __init__(self, close):
+        self.close = close
+        self._cache = {}
+
+    def get(self, pct):
+        if pct not in self._cache:
+            self._cache[pct] = first_hit(self.close, 1 + pct / 100, up=pct > 0)
+        return self._cache[pct]
+
+
+def simulate(close, signal, exits, tp_half=TP_HALF, tp_full=TP_FULL, sl_pct=SL_PCT, lot_usd=LOT_USD):
+    """
+    신호 배열 하나 + TP/SL 한 세트에 대한 결과.
+    반환: (요약 dict, 일별 손익 곡선 float32 배열)
+    """
+    n = len(close)
+    entry = np.flatnonzero(signal)
+    price = close[entry]
+    shares = lot_usd / price
+
+    t_sl = exits.get(sl_pct)[entry]
+    t_half = exits.get(tp_half)[entry]
+    t_full = exits.get(tp_full)[entry]
+
+    # 반익절이 손절보다 먼저 (같은 날 완익절까지 닿으면 한 번에 전량)
+    half_first = (t_half < t_sl) & (t_half < t_full)
+    # 남은 수량(또는 전량) 청산일
+    t_exit = np.where(half_first, np.minimum(t_full, t_sl), np.where(t_half < t_sl, t_full, t_sl))
+    rest = np.where(half_first, shares / 2, shares)
+
+    # 날짜별 주식 수 / 현금 변화 (매수, 반익절, 청산 이벤트를 한 번에 집계)
+    closed = t_exit < n
+    x_idx = t_exit[closed]
+    x_sh = rest[closed]
+    half_idx = t_half[half_first]
+    half_sh = shares[half_first] / 2
+    ev_idx = np.concatenate([entry, x_idx, half_idx])
+    d_shares = np.bincount(ev_idx, np.concatenate([shares, -x_sh, -half_sh]), n)
+    d_cash = np.bincount(ev_idx, np.concatenate([np.full(len(entry), -lot_usd), x_sh * close[x_idx], half_sh * close[half_idx]]), n)
+
+    equity = np.cumsum(d_cash) + np.cumsum(d_shares) * close
+    lots = np.bincount(np.concatenate([entry, x_idx]), np.concatenate([np.ones(len(entry)), -np.ones(len(x_idx))]), n)
+    open_lots = np.cumsum(lots)
+
+    # 청산 완료된 로트 수익률
+    proceeds = x_sh * close[x_idx] + np.where(half_first[closed], shares[closed] / 2 * close[np.minimum(t_half[closed], n - 1)], 0)
+    ret = proceeds / lot_usd - 1
+    peak = np.maximum.accumulate(equity) if n else equity
+
+    stats = {
+        'trades': int(len(entry)),
+        'closed': int(closed.sum()),
+        'half_exits': int(half_first.sum()),
+        'win_rate': float((ret > 0).mean() * 100) if len(ret) else 0.0,
+        'avg_ret': float(ret.mean() * 100) if len(ret) else 0.0,
+        'total_pnl': float(equity[-1]) if n else 0.0,
+        'max_dd': float((equity - peak).min()) if n else 0.0,
+        'max_open': int(open_lots.max()) if n else 0,
+    }
+    return stats, equity.astype(np.float32)
+
+
+def run_backtest(df, rsi_p=RSI_P, slope_lag=SLOPE_LAG, tp_half=TP_HALF, tp_full=TP_FULL, sl_pct=SL_PCT, lot_usd=LOT_USD):
+    """load_market_data() 결과(T_Close/Q_Close 포함)로 한 세트 백테스트 -> (요약 dict, 손익 곡선 Series)"""
+    signal, valid = entry_signals(df['Q_Close'].to_numpy(dtype='f8'), rsi_p, slope_lag)
+    close = df['T_Close'].to_numpy(dtype='f8')
+    stats, equity = simulate(close, signal, ExitTable(close), tp_half, tp_full, sl_pct, lot_usd)
+    stats = {'rsi_p': rsi_p, 'slope_lag': slope_lag, 'tp_half': tp_half, 'tp_full': tp_full, 'sl_pct': sl_pct, **stats}
+    return stats, pd.Series(equity, index=df.index, name='PnL')
+
+
+# --- 병렬 스윕 (워커마다 종가 배열과 ExitTable 을 한 번만 준비) ---
+_W = {}
+
+
+def _init_worker(t_close, q_close, lot_usd):
+    _W['close'] = t_close
+    _W['q_close'] = q_close
+    _W['exits'] = ExitTable(t_close)
+    _W['lot_usd'] = lot_usd
+
+
+def _run_chunk(rsi_p, slope_lag, levels, keep_equity):
+    signal, _ = entry_signals(_W['q_close'], rsi_p, slope_lag)
+    rows, curves = [], []
+    for tp_half, tp_full, sl_pct in levels:
+        stats, equity = simulate(_W['close'], signal, _W['exits'], tp_half, tp_full, sl_pct, _W['lot_usd'])
+        rows.append({'rsi_p': rsi_p, 'slope_lag': slope_lag, 'tp_half': tp_half, 'tp_full': tp_full, 'sl_pct': sl_pct, **stats})
+        if keep_equity: curves.append(equity)
+    return rows, curves
+
+
+def sweep(df, rsi_ps=(RSI_P,), slope_lags=(SLOPE_LAG,), tp_halfs=(TP_HALF,), tp_fulls=(TP_FULL,), sl_pcts=(SL_PCT,),
+          lot_usd=LOT_USD, keep_equity=True, workers=None, chunk=500):
+    """
+    파라미터 격자 전체를 프로세스 풀로 돌립니다.
+    반환: (요약 DataFrame, 손익 곡선 2D float32 배열 [실행 x 날짜] 또는 None)
+    """
+    t_close = df['T_Close'].to_numpy(dtype='f8')
+    q_close = df['Q_Close'].to_numpy(dtype='f8')
+    levels = [(h, f, s) for h, f, s in itertools.product(tp_halfs, tp_fulls, sl_pcts) if f >= h]
+    tasks = [(r, l, levels[i:i + chunk]) for r, l in itertools.product(rsi_ps, slope_lags)
+             for i in range(0, len(levels), chunk)]
+
+    rows, curves = [], []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        _init_worker(t_close, q_close, lot_usd)
+        results = [_run_chunk(r, l, lv, keep_equity) for r, l, lv in tasks]
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(t_close, q_close, lot_usd)) as ex:
+            futs = [ex.submit(_run_chunk, r, l, lv, keep_equity) for r, l, lv in tasks]
+            results = [f.result() for f in futs]
+    for r, c in results:
+        rows.extend(r); curves.extend(c)
+
+    stats = pd.DataFrame(rows, columns=STAT_COLS)
+    equity = np.vstack(curves) if keep_equity and curves else None
+    return stats, equity
+
+
+if __name__ == "__main__":
+    # 저장된 일봉으로 기본 격자 스윕 (python backtest.py)
+    import time
+    from market_store import BarStore
+    from config import MARKET_DIR
+
+    closes = BarStore(MARKET_DIR).closes(["TQQQ", "QQQ"]).dropna()
+    df = pd.DataFrame({'T_Close': closes['TQQQ'], 'Q_Close': closes['QQQ']})
+    t0 = time.perf_counter()
+    stats, _ = sweep(df, rsi_ps=(2, 3, 4, 5), slope_lags=(1, 2, 3),
+                     tp_halfs=np.arange(3.0, 10.0, 1.0), tp_fulls=np.arange(8.0, 20.0, 2.0), sl_pcts=np.arange(-10.0, -3.0, 1.0),
+                     keep_equity=False)
+    print(f"{len(stats)}개 조합 {time.perf_counter() - t0:.2f}초")
+    print(stats.sort_values('total_pnl', ascending=False).head(20).to_string(index=False))
@@ -0,0 +1,486 @@
+import argparse
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from config import TICKERS, START_DATE, BENCH_BASELINE, FIRST_PAINT_MS
+from alerts import AlertEngine, FileSink, StubSink, position_triggers, sent_keys
+from backtest import run_backtest
+from indicators import check_engine
+from intraday import IntradayStore, StubMinuteProvider, NY
+from charts import DESKTOP_POINTS, PHONE_POINTS, decimated_series
+from journal_store import JournalDB, SHORT_COLS, LONG_COLS, PORTFOLIO_COLS
+from ledger import Ledger, page_of
+from market_frame import SharedMarket
+from market_store import BarStore, StubProvider
+from portfolio import PositionBook, SHORT, LONG
+from quotes import QuoteService, StubQuoteProvider
+from signals import load_market_frame, evaluate_signal, take_profit_checks, first_view, late_data
+
+# ==========================================
+# 오프라인 벤치마크 (python bench.py)
+# ==========================================
+# 가짜 yfinance(StubProvider) + 합성 일봉 + 합성 일지(100 ~ 100,000행)로
+# rerun 의 주요 구간을 돌려 구간별 소요 시간/메모리 피크를 재고, 저장된 기준과 비교합니다.
+# 속도와 함께 결과가 맞는지도 확인 (run_checks) - 하나라도 틀리면 종료 코드 1
+SIZES = (100, 1000, 10000, 100000)
+TOLERANCE = 0.3     # 기준보다 30% 이상 느려지면 회귀
+MIN_DELTA_MS = 2.0  # 이 정도 차이는 측정 잡음으로 보고 무시
+MEM_TOLERANCE = 0.5
+# 첫 화면: app.py 가 시작할 때 불러오는 모듈 (streamlit 제외) / 그 전에 불려오면 안 되는 무거운 모듈
+APP_IMPORTS = "config, quotes, intraday, alerts, journal_store, ledger, portfolio, market_frame, timing, signals"
+LAZY_MODULES = ('yfinance', 'plotly', 'backtest', 'risk', 'screener', 'charts')
+SLOW_NET_SEC = 1.0   # 첫 화면 측정 때 가짜 네트워크 지연 (기다리면 목표를 바로 넘김)
+FIRST_PAINT_ROWS = 1000
+ENGINE_PARAMS = ((3, 2), (2, 1), (5, 3), (14, 0))  # 스트리밍 지표 엔진 확인용 (rsi_p, slope_lag)
+
+
+def synthetic_bars(years=40, seed=0):
+    """QQQ 랜덤워크 + 2배/3배 일일 레버리지 + 환율 -> {ticker: yfinance 형식 DataFrame}"""
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=int(years * 252))
+    r = rng.normal(0.0004, 0.013, len(idx))
+    rets = {'QQQ': r, 'QLD': 2 * r, 'TQQQ': 3 * r, 'KRW=X': rng.normal(0, 0.004, len(idx))}
+    base = {'QQQ': 100.0, 'QLD': 50.0, 'TQQQ': 30.0, 'KRW=X': 1300.0}
+    frames = {}
+    for t in TICKERS:
+        c = base[t] * np.exp(np.cumsum(rets[t]))
+        frames[t] = pd.DataFrame({'Open': c, 'High': c * 1.01, 'Low': c * 0.99, 'Close': c,
+                                  'Adj Close': c, 'Volume': 1e6}, index=idx)
+    return frames
+
+
+def synthetic_journal(n, price=50.0, seed=0):
+    """단기 일지 n행 (대부분 종료, 약 2% 보유 중) + 장기 일지/포트폴리오/잔고"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=n).strftime('%Y-%m-%d')
+    px = np.round(price * np.exp(rng.normal(0, 0.1, n)), 2)
+    is_sell = rng.random(n) < 0.2
+    status = np.where(is_sell, 'Closed', rng.choice(['Closed', 'Open', 'Half_Open'], n, p=[0.98, 0.015, 0.005]))
+    short = pd.DataFrame({
+        'ID': np.arange(1, n + 1), 'Date': dates, 'Type': np.where(is_sell, 'Sell', 'Buy'), 'Price': px,
+        'Shares': rng.integers(1, 50, n), 'TP_Half': px * 1.06, 'TP_Full': px * 1.12, 'SL': px * 0.94,
+        'Status': status, 'Profit': np.where(status == 'Closed', np.round(rng.normal(5, 40, n), 2), 0.0),
+        'Note': np.where(rng.random(n) < 0.1, 'memo', '-'),
+    }, columns=SHORT_COLS)
+    m = max(1, n // 10)
+    long = pd.DataFrame({
+        'ID': np.arange(1, m + 1), 'Date': dates[:m], 'Account': rng.integers(1, 5, m), 'Type': '매수',
+        'Qty': rng.integers(1, 20, m), 'Price': px[:m], 'Amount': px[:m] * 10, 'Note': '-',
+    }, columns=LONG_COLS)
+    portfolio = pd.DataFrame([[a, t, 100, price * 0.8, 0] for a, t in enumerate(['TQQQ', 'TQQQ', 'QLD', 'QLD'], 1)],
+                             columns=PORTFOLIO_COLS)
+    return short, long, portfolio
+
+
+class Bench:
+    """구간 이름 -> {'ms': 최소 소요 시간, 'peak_kb': tracemalloc 피크}"""
+
+    def __init__(self, repeat=3):
+        self.repeat = repeat
+        self.results = {}
+
+    def run(self, name, fn, repeat=None):
+        """fn 을 repeat 번 돌려 최소 시간을 쓰고, 한 번 더 돌려 메모리 피크를 잽니다 (결과는 마지막 값)"""
+        best = float('inf')
+        for _ in range(repeat or self.repeat):
+            t0 = time.perf_counter()
+            out = fn()
+            best = min(best, time.perf_counter() - t0)
+        tracemalloc.start()
+        out = fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.results[name] = {'ms': round(best * 1000, 3), 'peak_kb': round(peak / 1024, 1)}
+        return out
+
+    def skip(self, name, reason):
+        self.results[name] = {'ms': None, 'peak_kb': None, 'skipped': reason}
+
+    def table(self):
+        return pd.DataFrame.from_dict(self.results, orient='index').rename_axis('stage')
+
+
+def bench_market(b, work, years):
+    frames = synthetic_bars(years)
+    provider = StubProvider(frames)
+    start = min(START_DATE, str(frames['QQQ'].index[0].date()))
+
+    def cold():
+        root = tempfile.mkdtemp(dir=work)
+        BarStore(root, provider).update(TICKERS, start=start)
+        return root
+    root = b.run(f"bars_update_cold[{years}y]", cold)
+    store = BarStore(root, provider)
+    b.run(f"bars_update_warm[{years}y]", lambda: store.update(TICKERS, start=start))
+    df, info, engine = b.run(f"indicators[{years}y]", lambda: load_market_frame(store))
+    shared = SharedMarket(lambda: (df, info, engine), root=os.path.join(work, "frame"))
+    frame = b.run(f"shared_frame_build[{years}y]", shared.refresh)
+    b.run("shared_frame_get", shared.get, repeat=1000)
+    b.run(f"backtest[{years}y]", lambda: run_backtest(frame.df), repeat=1)
+    b.run(f"chart_series_full[{years}y]", lambda: decimated_series(frame.df, points=DESKTOP_POINTS))
+    b.run("chart_series_1y_phone", lambda: decimated_series(frame.df, frame.df.index[-252], points=PHONE_POINTS))
+    return frame
+
+
+def bench_quotes(b, last):
+    prices = {'TQQQ': float(last['T_Close']), 'QLD': float(last['L_Close']), 'QQQ': float(last['Q_Close'])}
+    b.run("quotes_fetch", lambda: QuoteService(StubQuoteProvider(prices, delay=0.0), ttl=0).get(list(prices)))
+    service = QuoteService(StubQuoteProvider(prices), ttl=60)
+    service.get(list(prices))
+    b.run("quotes_cached", lambda: service.get(list(prices)), repeat=1000)
+    return prices
+
+
+def bench_journal(b, work, n, frame, prices):
+    d = tempfile.mkdtemp(dir=work)
+    short, long, portfolio = synthetic_journal(n, price=prices['TQQQ'])
+    paths = _journal_csvs(d, short, long, portfolio)
+
+    def fresh_import():
+        db = JournalDB(os.path.join(tempfile.mkdtemp(dir=d), "journal.db"))
+        db.import_csvs(**paths)
+        return db
+    db = b.run(f"journal_import[{n}]", fresh_import, repeat=1)
+    b.run(f"journal_read[{n}]", db.short_journal)
+
+    def sync():
+        book = PositionBook()
+        book.sync(db)
+        book.set_quotes(prices, 1300.0)
+        return book
+    book = b.run(f"journal_sync[{n}]", sync)
+    fx = itertools.cycle([1300.0, 1301.0])  # 환율이 바뀌면 전 포지션 재평가
+
+    def revalue():
+        book.set_quotes(prices, next(fx))
+        return book.totals(SHORT)
+    b.run(f"positions_eval[{n}]", revalue)
+    b.run(f"signal_checks[{n}]", lambda: (evaluate_signal(frame.df.iloc[-1], frame.engine, prices['QQQ']),
+                                          take_profit_checks(book)))
+
+    ledger = b.run(f"ledger_build[{n}]", lambda: Ledger(db.short_journal()))
+    b.run(f"ledger_build_select[{n}]", lambda: Ledger(ledger.journal).select(types=('Buy',), search="memo"))
+    b.run(f"ledger_select_cached[{n}]", lambda: ledger.select(types=('Buy',), search="memo"))
+    _, closed, _ = ledger.select()
+    b.run(f"ledger_page[{n}]", lambda: page_of(closed, 0))
+
+    row = {'Date': '2026-01-02', 'Type': 'Buy', 'Price': prices['TQQQ'], 'Shares': 1, 'Status': 'Open', 'Profit': 0.0, 'Note': '-'}
+    b.run(f"record_buy[{n}]", lambda: book.record_buy(db, row))
+    bench_styler(b, n, book)
+
+
+def cold_import():
+    """새 프로세스에서 APP_IMPORTS 소요 시간(ms)과 그때 이미 불려온 LAZY_MODULES"""
+    code = (f"import json, sys, time; t = time.perf_counter(); import {APP_IMPORTS}; "
+            f"print(json.dumps([(time.perf_counter() - t) * 1000, [m for m in {LAZY_MODULES!r} if m in sys.modules]]))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(out.stdout)
+
+
+def bench_first_paint(b, work, frames, prices, repeat=3):
+    """
+    첫 화면 = 새 프로세스 import + 일지 동기화 + 로컬 일봉 프레임(get_nowait) + 캐시 시세로 신호(first_view).
+    일봉/시세 공급자는 SLOW_NET_SEC 씩 걸리게 해 둠 -> 네트워크를 기다리면 바로 드러남.
+    반환: (첫 화면 ms, 미리 불려온 무거운 모듈)
+    """
+    runs = [cold_import() for _ in range(repeat)]
+    b.results['cold_import'] = {'ms': round(min(r[0] for r in runs), 3), 'peak_kb': 0.0}
+    eager = sorted({m for r in runs for m in r[1]})
+
+    root = tempfile.mkdtemp(dir=work)
+    start = min(START_DATE, str(frames['QQQ'].index[0].date()))
+    BarStore(root, StubProvider(frames)).update(TICKERS, start=start)  # 지난번에 받아 둔 일봉
+    slow = BarStore(root, StubProvider(frames, delay=SLOW_NET_SEC))
+    quotes = QuoteService(StubQuoteProvider(prices, delay=SLOW_NET_SEC))
+    short, long, portfolio = synthetic_journal(FIRST_PAINT_ROWS, price=prices['TQQQ'])
+    db = JournalDB(os.path.join(root, "journal.db"))
+    db.import_csvs(**_journal_csvs(root, short, long, portfolio))
+    started = []
+
+    def paint():
+        book = PositionBook()
+        book.sync(db)
+        sm = SharedMarket(lambda: load_market_frame(slow), root=os.path.join(tempfile.mkdtemp(dir=work), "frame"),
+                          fallback=lambda: load_market_frame(slow, fetch=False))
+        started.append(sm)
+        market, _ = sm.get_nowait()
+        return first_view(market, None, quotes, book)
+    b.run(f"first_view[{FIRST_PAINT_ROWS}]", paint, repeat=repeat)
+    for sm in started:
+        sm.wait()  # 백그라운드 다운로드가 다른 구간 측정에 끼지 않게
+    return b.results['cold_import']['ms'] + b.results[f"first_view[{FIRST_PAINT_ROWS}]"]['ms'], eager
+
+
+def _journal_csvs(d, short, long, portfolio):
+    paths = {k: os.path.join(d, f"{k}.csv") for k in ('short', 'long', 'portfolio', 'balance')}
+    short.to_csv(paths['short'], index=False); long.to_csv(paths['long'], index=False)
+    portfolio.to_csv(paths['portfolio'], index=False); pd.DataFrame({'KRW': [1e7]}).to_csv(paths['balance'], index=False)
+    return paths
+
+
+def bench_styler(b, n, book):
+    """보유 포지션 표 Styler 렌더링 (jinja2 가 없으면 건너뜀)"""
+    try:
+        import jinja2  # noqa: F401  (pandas Styler 필요)
+    except ImportError:
+        b.skip(f"styler_render[{n}]", "jinja2 없음")
+        return
+    pos = book.positions(SHORT)
+    view = pos[['Key', 'Date', 'Shares', 'Avg_Price', 'Price', 'Return(%)', 'Value', 'Status']]
+
+    def render():
+        st = view.style.format({'Avg_Price': '${:.2f}', 'Price': '${:.2f}', 'Return(%)': '{:.2f}%', 'Value': '${:,.2f}'})
+        colour = getattr(st, 'map', None) or st.applymap
+        return colour(lambda x: 'color: red' if x < 0 else 'color: green', subset=['Return(%)']).to_html()
+    b.run(f"styler_render[{n}]", render)
+
+
+def check_indicators(frames):
+    """스트리밍 지표 엔진 == pandas 기준 구현 (여러 rsi_p / slope_lag 조합)"""
+    closes = frames['QQQ']['Close']
+    return [(f"indicator_engine[rsi={p},lag={lag}]", check_engine(closes, p, lag)) for p, lag in ENGINE_PARAMS]
+
+
+def check_bars(work, frames):
+    """일봉 증분 갱신: 환율처럼 마지막 날짜가 다른 티커가 있어도 갱신 한 번에 요청 한 번, 겹치는 봉은 중복 없이"""
+    frames = dict(frames, **{'KRW=X': frames['KRW=X'].iloc[:-3]})  # 환율만 3일 늦게 끝남
+    start = min(START_DATE, str(frames['QQQ'].index[0].date()))
+    provider = StubProvider(frames)
+    store = BarStore(tempfile.mkdtemp(dir=work), provider)
+    store.update(TICKERS, start=start)
+    store.update(TICKERS, start=start)
+    ok = len(provider.calls) == 2 and all(len(store.read(t)) == len(frames[t]) for t in TICKERS)
+    return [("bars_single_request", bool(ok))]
+
+
+def synthetic_minutes(symbols, end, minutes=120, seed=0):
+    """end(미국 동부)까지 1분봉 -> {symbol: yfinance 형식 DataFrame}"""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range(end=end, periods=minutes, freq="min")
+    frames = {}
+    for s in symbols:
+        c = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, minutes)))
+        frames[s] = pd.DataFrame({'Open': c, 'High': c * 1.001, 'Low': c * 0.999, 'Close': c, 'Volume': 1e4}, index=idx)
+    return frames
+
+
+def check_intraday():
+    """
+    분봉 증분 갱신: 마지막 분봉 시각이 종목마다 달라도 분봉 있는 종목은 갱신 한 번에 요청 한 번,
+    겹치는 분봉은 중복 없이 덮어써서 링버퍼 = 원본 분봉.
+    분봉이 없는 종목(ZZZ)은 한 번 비어 온 뒤로 요청에서 빠지고, 새로 추가된 종목(SOXL)만 오늘 하루치를 따로.
+    """
+    end = pd.Timestamp.now(tz=NY).floor("min") - pd.Timedelta(minutes=5)
+    full = synthetic_minutes(['QQQ', 'TQQQ', 'QLD', 'SOXL'], end)
+    provider = StubMinuteProvider({s: f.iloc[:-30] for s, f in full.items()})
+    provider.frames['QLD'] = full['QLD'].iloc[:-32]  # QLD 만 마지막 분봉이 2분 늦음
+    store = IntradayStore(provider, capacity=100)  # 120분 -> 링버퍼가 한 바퀴 넘게 돎
+    syms = ['QQQ', 'TQQQ', 'QLD', 'ZZZ']
+    store.update(syms)
+    provider.frames = full
+    added = store.update(syms)
+    ok = provider.calls == [(tuple(syms), None), (('QQQ', 'TQQQ', 'QLD'), full['QLD'].index[-33].tz_convert("UTC"))]
+    ok &= added == {'QQQ': 30, 'TQQQ': 30, 'QLD': 32}
+    store.update(syms + ['SOXL'])
+    ok &= provider.calls[2:] == [(('QQQ', 'TQQQ', 'QLD'), full['QQQ'].index[-1].tz_convert("UTC")), (('SOXL',), None)]
+    for s, f in full.items():
+        ring = store.rings[s].view()
+        ok &= bool(np.array_equal(ring['close'], f['Close'].to_numpy()[-100:]))
+        ok &= store.stats(s)['last'] == float(f['Close'].iloc[-1])
+    return [("intraday_single_request", bool(ok))]
+
+
+def check_journal(work):
+    """
+    일지 쓰기 + 포지션 요약: 오래된 화면에서 같은 거래를 두 번 청산/반익절/삭제해도 한 번만 반영되고,
+    증분 갱신한 요약(totals/positions)이 DB 및 DB 에서 새로 읽은 요약과 같은지.
+    """
+    db = JournalDB(os.path.join(tempfile.mkdtemp(dir=work), "journal.db"))
+    book = PositionBook()
+    book.sync(db)
+    buy = {'Date': '2026-01-02', 'Type': 'Buy', 'Price': 50.0, 'Shares': 10, 'Status': 'Open', 'Profit': 0.0, 'Note': '-'}
+    a, b, c = (book.record_buy(db, buy) for _ in range(3))
+    book.record_close(db, a, 'Closed', 10, 55.0); book.record_close(db, a, 'Closed', 10, 55.0)
+    book.record_close(db, b, 'Half_Open', 5, 56.0); book.record_close(db, b, 'Half_Open', 5, 56.0)
+    book.record_close(db, b, 'Closed', 10, 57.0)  # 반익절 뒤 남은 수량보다 많이 -> 반영 안 됨
+    sell = dict(buy, Type='Sell', Status='Closed', Profit=100.0)
+    d = book.record_sell(db, sell)
+    book.record_sell(db, sell)
+    book.record_delete(db, d); book.record_delete(db, d)
+    book.record_delete(db, c)
+
+    fresh = PositionBook()
+    fresh.sync(db)
+    open_db = db.open_trades().set_index('ID')
+    for bk in (book, fresh):
+        bk.set_quotes({'TQQQ': 60.0}, 1300.0)
+    pos = book.positions(SHORT).set_index('Key')
+    ok = book.totals(SHORT) == fresh.totals(SHORT)
+    ok &= abs(book.totals(SHORT)['realized'] - db.realized_profit()) < 1e-9 and db.realized_profit() == 50.0 + 30.0 + 100.0
+    ok &= list(pos.index) == list(open_db.index) == [b]
+    ok &= bool((pos['Shares'].to_numpy() == open_db['Shares'].to_numpy()).all()) and pos.loc[b, 'Status'] == 'Half_Open'
+    return [("journal_double_close_delete", bool(ok))]
+
+
+DAY = "2026-01-05"  # 알림 확인용 거래일
+
+
+def check_alerts(work):
+    """
+    알림 엔진: 단기 TP/SL, 장기 사다리, QQQ ExitLine 이 한 번씩만 발동하고,
+    인덱스를 다시 만들거나 (기록 파일로) 다시 시작해도 같은 알림을 또 보내지 않으며,
+    청산된 포지션의 기록은 rebuild 때 잊는지 확인.
+    ExitLine 은 진행 중 일봉으로 값이 조금씩 바뀌며 여러 번 rebuild 돼도 거래일마다 한 번만.
+    """
+    d = tempfile.mkdtemp(dir=work)
+    db = JournalDB(os.path.join(d, "journal.db"))
+    book = PositionBook()
+    book.sync(db)
+    tid = book.record_buy(db, {'Date': '2026-01-02', 'Type': 'Buy', 'Price': 50.0, 'Shares': 10,
+                               'Status': 'Open', 'Profit': 0.0, 'Note': '-'})
+    book.record_portfolio(db, pd.DataFrame([[1, 'TQQQ', 10, 40.0, 0]], columns=PORTFOLIO_COLS))
+    path = os.path.join(d, "alerts.jsonl")
+    stub = StubSink()
+    engine = AlertEngine([stub, FileSink(path)])
+    engine.rebuild(position_triggers(book, exit_line=300.0, day=DAY))
+    fired = [a.kind for p in (52.0, 53.5, 54.0, 46.0, 53.5, 57.0) for a in engine.on_tick('TQQQ', p)]
+    fired += [a.kind for a in engine.on_prices({'QQQ': 290.0})]
+    engine.rebuild(position_triggers(book, exit_line=300.0, day=DAY))  # 같은 포지션으로 다시 -> 중복 없음
+    fired += [a.kind for a in engine.on_prices({'TQQQ': 60.0, 'QQQ': 280.0})]
+    for drift in (300.013, 300.027, 300.04):  # 같은 날 MA200 이 조금씩 바뀜 -> 다시 보내지 않음
+        engine.rebuild(position_triggers(book, exit_line=drift, day=DAY))
+        fired += [a.kind for a in engine.on_prices({'QQQ': 290.0})]
+    engine.flush()
+    ok = sorted(fired) == ['ExitLine', 'Ladder', 'SL', 'TP_Full', 'TP_Half'] and len(stub.alerts) == 5
+
+    restarted = AlertEngine(sinks=[stub], background=False, sent=sent_keys(path))  # 워커 재시작
+    restarted.rebuild(position_triggers(book, exit_line=300.0, day=DAY))
+    ok &= restarted.on_prices({'TQQQ': 60.0, 'QQQ': 280.0}) == []
+    restarted.rebuild(position_triggers(book, exit_line=300.05, day="2026-01-06"))  # 다음 거래일에도 붕괴 중 -> 한 번 더
+    ok &= [a.kind for a in restarted.on_prices({'QQQ': 280.0})] == ['ExitLine']
+
+    book.record_close(db, tid, 'Closed', 10, 57.0)  # 청산 -> 단기 트리거가 사라지면 그 알림 기록도 지움
+    restarted.rebuild(position_triggers(book, exit_line=300.05, day="2026-01-06"))
+    ok &= not any(k[0] == SHORT for k in restarted.sent) and any(k[0] == LONG for k in restarted.sent)
+    return [("alerts_dedup_rebuild", bool(ok))]
+
+
+def check_late_data(work, frames, prices):
+    """
+    첫 화면 뒤 늦은 데이터 단계 (app.py 5): 로컬 일봉 + 캐시 없는 시세로 그린 다음
+    late_data() 가 새 프레임/시세를 받아 rerun 을 요청하고, 다음 rerun 은 실시간 시세로 그려지는지.
+    오프라인(일봉/시세 모두 실패)이면 저장본으로 다시 만든 프레임 때문에 한 번만 rerun 하고 멈추는지 (무한 rerun 방지).
+    """
+    root = tempfile.mkdtemp(dir=work)
+    start = min(START_DATE, str(frames['QQQ'].index[0].date()))
+    BarStore(root, StubProvider(frames)).update(TICKERS, start=start)
+    book = PositionBook()
+    book.sync(JournalDB(os.path.join(root, "journal.db")))
+    out = []
+    for name, online in (("late_data_rerun", True), ("late_data_offline", False)):
+        store = BarStore(root, StubProvider(frames, fail=not online))
+        service = QuoteService(StubQuoteProvider(prices, fail=0 if online else 99), retries=1)
+        sm = SharedMarket(lambda: load_market_frame(store), root=os.path.join(root, f"frame_{name}"),
+                          fallback=lambda: load_market_frame(store, fetch=False))
+        market, loading = sm.get_nowait()
+        first = first_view(market, None, service, book)
+        changed = late_data(sm, market, service, book, wait_market=loading)
+        if online:
+            again = first_view(sm.get_nowait()[0], None, service, book)
+            ok = first['source'] == 'local' and first['stale'] and changed and not again['stale']
+        else:
+            market, loading = sm.get_nowait()  # rerun 한 번 뒤: 프레임은 최신(TTL 안), 시세는 실패 후 TTL 동안 재요청 안 함
+            ok = first['source'] == 'local' and not loading and not late_data(sm, market, service, book, wait_market=loading)
+        out.append((name, bool(ok)))
+    return out
+
+
+def run_checks(frames, work, prices):
+    """속도와 별개로 결과가 맞는지 확인 -> [(이름, 통과 여부)]"""
+    return (check_bars(work, frames) + check_indicators(frames) + check_intraday() + check_journal(work) + check_alerts(work)
+            + check_late_data(work, frames, prices))
+
+
+def compare(current, baseline, tolerance=TOLERANCE):
+    """기준보다 느려지거나 메모리가 늘어난 구간 -> [(구간, 항목, 기준, 현재)]"""
+    bad = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base or cur.get('ms') is None or base.get('ms') is None:
+            continue
+        if cur['ms'] > base['ms'] * (1 + tolerance) and cur['ms'] - base['ms'] > MIN_DELTA_MS:
+            bad.append((name, 'ms', base['ms'], cur['ms']))
+        if cur['peak_kb'] > base['peak_kb'] * (1 + MEM_TOLERANCE) and cur['peak_kb'] - base['peak_kb'] > 64:
+            bad.append((name, 'peak_kb', base['peak_kb'], cur['peak_kb']))
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 (가짜 시세 + 합성 일지)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="단기 일지 행 수")
+    parser.add_argument("--years", type=int, default=40, help="합성 일봉 기간(년)")
+    parser.add_argument("--repeat", type=int, default=3, help="구간별 반복 횟수 (최소값 사용)")
+    parser.add_argument("--baseline", default=BENCH_BASELINE, help="비교 기준 JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="이번 결과를 기준으로 저장")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="허용 지연 비율")
+    parser.add_argument("--json", help="결과를 JSON 으로도 저장")
+    parser.add_argument("--first-paint-ms", type=float, default=FIRST_PAINT_MS, help="첫 화면 목표 (ms)")
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="tqqq_bench_")
+    b = Bench(args.repeat)
+    try:
+        frame = bench_market(b, work, args.years)
+        prices = bench_quotes(b, frame.df.iloc[-1])
+        for n in args.sizes:
+            bench_journal(b, work, n, frame, prices)
+        frames = synthetic_bars(args.years)
+        first_paint, eager = bench_first_paint(b, work, frames, prices, args.repeat)
+        checks = run_checks(frames, work, prices)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    print(b.table().to_string())
+    print("\n정합성 확인:")
+    for name, ok in checks:
+        print(f"  {'✅' if ok else '❌'} {name}")
+    checks_ok = all(ok for _, ok in checks)
+    # 첫 화면 목표는 기준 파일과 상관없이 항상 확인
+    paint_ok = first_paint <= args.first_paint_ms and not eager
+    print(f"\n{'✅' if paint_ok else '⚠️'} 첫 화면 {first_paint:.0f} ms (목표 {args.first_paint_ms:.0f} ms)"
+          + (f" · 시작 때 불려온 무거운 모듈: {', '.join(eager)}" if eager else ""))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(b.results, f, ensure_ascii=False, indent=1)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(b.results, f, ensure_ascii=False, indent=1)
+        print(f"\n기준 저장: {args.baseline}")
+        return 0 if paint_ok and checks_ok else 1
+    if not os.path.exists(args.baseline):
+        print(f"\n기준 파일 없음 ({args.baseline}) - --save-baseline 으로 먼저 저장하세요")
+        return 0 if paint_ok and checks_ok else 1
+    with open(args.baseline, encoding='utf-8') as f:
+        bad = compare(b.results, json.load(f), args.tolerance)
+    if not bad:
+        print("\n✅ 기준 대비 회귀 없음")
+        return 0 if paint_ok and checks_ok else 1
+    print("\n⚠️ 회귀:")
+    for name, what, base, cur in bad:
+        print(f"  {name} {what}: {base} -> {cur}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 전체 기간 차트 (서버에서 모양 보존 축소 후 전송)
+# ==========================================
+# - 보이는 구간만 잘라서, 점이 화면 폭(points)보다 많을 때만 줄임 -> 좁게 확대하면 원본 해상도 그대로
+# - 가격: 버킷마다 최저/최고 두 점 (급락/급등 꼭짓점을 잃지 않음)
+# - 지표(MA/RSI): LTTB (Largest Triangle Three Buckets) - 선 모양을 가장 잘 남기는 점 하나씩
+# - 결과는 (프레임 버전, 구간, 점 수) 별로 app.py 에서 캐시 -> rerun 때는 다시 계산하지 않음
+RANGES = {"1M": 21, "3M": 63, "6M": 126, "1Y": 252, "3Y": 756, "5Y": 1260, "전체": None}  # 거래일
+DESKTOP_POINTS = 1200
+PHONE_POINTS = 400
+MAX_MARKERS = 300
+PRICE_COLS = ['Q_Close', 'T_Close']
+LINE_COLS = ['Q_MA50', 'Q_MA200', 'ExitLine', 'Q_RSI3']
+BUY_TYPES = ('Buy', '매수')
+
+
+def minmax_indices(y, n_out):
+    """버킷마다 최저/최고 위치 (처음/끝 포함, 시간순). 점이 n_out 이하면 전부"""
+    n = len(y)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+    nb = (n_out - 2) // 2
+    edges = np.linspace(1, n - 1, nb + 1).astype(np.int64)  # 처음/끝 점을 뺀 구간을 nb 개로
+    width = int(np.diff(edges).max())
+    idx = np.minimum(edges[:-1, None] + np.arange(width), edges[1:, None] - 1)  # 짧은 버킷은 마지막 점 반복
+    v = y[idx]
+    nan = np.isnan(v)
+    rows = np.arange(nb)
+    lo = idx[rows, np.where(nan, np.inf, v).argmin(axis=1)]
+    hi = idx[rows, np.where(nan, -np.inf, v).argmax(axis=1)]
+    return np.unique(np.concatenate([[0], lo, hi, [n - 1]]))
+
+
+def lttb_indices(y, n_out):
+    """
+    LTTB: 버킷마다 (앞에서 고른 점, 다음 버킷 평균) 과 만드는 삼각형이 가장 큰 점 하나.
+    x 는 거래일 순번 (등간격). NaN 구간(MA 계산 전)은 삼각형 0 으로 취급.
+    """
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+    yz = np.nan_to_num(y, nan=0.0)
+    cy = np.concatenate([[0.0], np.cumsum(yz)])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # 가운데 n_out - 2 개 버킷
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for k in range(n_out - 2):
+        s, e = edges[k], edges[k + 1]
+        if k + 2 < len(edges):
+            ns, ne = edges[k + 1], edges[k + 2]
+            ax, ay = (ns + ne - 1) / 2, (cy[ne] - cy[ns]) / (ne - ns)
+        else:
+            ax, ay = n - 1, yz[n - 1]
+        xs = np.arange(s, e)
+        area = np.abs((a - ax) * (yz[s:e] - yz[a]) - (a - xs) * (ay - yz[a]))
+        a = s + int(area.argmax())
+        out[k + 1] = a
+    return out
+
+
+def window(index, start=None, end=None):
+    """날짜 index 에서 [start, end] 구간 slice (이진 탐색)"""
+    i = 0 if start is None else int(index.searchsorted(pd.Timestamp(start), side='left'))
+    j = len(index) if end is None else int(index.searchsorted(pd.Timestamp(end), side='right'))
+    return slice(i, j)
+
+
+def range_start(index, key):
+    """RANGES 키 -> 시작 날짜 (전체면 None)"""
+    days = RANGES.get(key)
+    return None if days is None or days >= len(index) else index[-days]
+
+
+def decimated_series(df, start=None, end=None, points=DESKTOP_POINTS):
+    """구간 안의 가격/지표 열 -> {열: Series} (열마다 따로 줄임, 구간이 짧으면 원본 그대로)"""
+    sl = window(df.index, start, end)
+    idx = df.index[sl]
+    out = {}
+    for c in PRICE_COLS + LINE_COLS:
+        if c not in df.columns: continue
+        y = df[c].to_numpy(dtype='f8')[sl]
+        keep = minmax_indices(y, points) if c in PRICE_COLS else lttb_indices(y, points)
+        out[c] = pd.Series(y[keep], index=idx[keep], name=c)
+    return out
+
+
+def journal_markers(journal, start=None, end=None, limit=MAX_MARKERS):
+    """일지(Date/Type/Price) -> 구간 안의 매수/매도 표시 DataFrame (많으면 고르게 limit 개로)"""
+    if journal is None or journal.empty:
+        return pd.DataFrame(columns=['Date', 'Price', 'Buy'])
+    m = pd.DataFrame({'Date': pd.to_datetime(journal['Date'], errors='coerce'),
+                      'Price': pd.to_numeric(journal['Price'], errors='coerce'),
+                      'Buy': journal['Type'].isin(BUY_TYPES)}).dropna()
+    if start is not None: m = m[m['Date'] >= pd.Timestamp(start)]
+    if end is not None: m = m[m['Date'] <= pd.Timestamp(end)]
+    m = m.sort_values('Date', kind='stable')
+    if len(m) > limit:
+        m = m.iloc[np.linspace(0, len(m) - 1, limit).astype(int)]
+    return m.reset_index(drop=True)
+
+
+def history_figure(series, markers=None, height=640, rsi_lines=(80, 90)):
+    """QQQ(+MA50/MA200/ExitLine) / TQQQ(+일지 매수/매도) / RSI 3단 차트 (plotly 는 그릴 때만 불러옴)"""
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=[0.45, 0.35, 0.2])
+    lines = [('Q_Close', "QQQ", 1, dict(width=1.2)), ('Q_MA50', "MA50", 1, dict(width=1, color="green")),
+             ('Q_MA200', "MA200", 1, dict(width=1, color="orange")), ('ExitLine', "ExitLine", 1, dict(width=1, color="red", dash="dash")),
+             ('T_Close', "TQQQ", 2, dict(width=1.2)), ('Q_RSI3', "RSI", 3, dict(width=1, color="purple"))]
+    for col, name, row, line in lines:
+        s = series.get(col)
+        if s is None or s.empty: continue
+        fig.add_trace(go.Scatter(x=s.index, y=s.to_numpy(), name=name, line=line, hoverinfo="x+y"), row=row, col=1)
+    if markers is not None and not markers.empty:
+        for buy, name, symbol, color in [(True, "매수", "triangle-up", "green"), (False, "매도", "triangle-down", "red")]:
+            m = markers[markers['Buy'] == buy]
+            if m.empty: continue
+            fig.add_trace(go.Scatter(x=m['Date'], y=m['Price'], name=name, mode="markers",
+                                     marker=dict(symbol=symbol, color=color, size=8)), row=2, col=1)
+    for y in rsi_lines:
+        fig.add_hline(y=y, line=dict(color="gray", dash="dot", width=1), row=3, col=1)
+    fig.update_layout(height=height, showlegend=False, margin=dict(l=10, r=10, t=10, b=10),
+                      hovermode="x unified", uirevision="history")  # rerun 해도 확대/범례 상태 유지
+    return fig
@@ -0,0 +1,61 @@
+# ==========================================
+# 공통 설정 (app.py 및 보조 모듈에서 같이 사용)
+# ==========================================
+
+# 파일 경로
+SHORT_JOURNAL = "short_term_journal.csv"
+LONG_PORTFOLIO = "long_term_portfolio.csv"
+LONG_BALANCE = "long_term_balance.csv"
+LONG_JOURNAL = "long_term_journal.csv"
+MARKET_DIR = "market_data" # 일봉 저장소
+JOURNAL_DB = "journal.db" # 일지/포트폴리오 DB (위 CSV 는 최초 1회 이관용)
+SIGNAL_SNAPSHOT = "signal_snapshot.json" # 신호 워커가 내보내는 스냅샷
+
+# 시장 데이터
+START_DATE = "2010-02-15"
+TICKERS = ["TQQQ", "QLD", "QQQ", "KRW=X"]
+DEFAULT_USDKRW = 1450.0
+QUOTE_STALE_SEC = 60 # 실시간 시세가 이보다 오래되면 지연 표시
+INTRADAY_CAPACITY = 1920 # 종목별 1분봉 보관 수 (04:00~20:00 16시간 x 2세션)
+MARKET_TTL_SEC = 300 # 공유 일봉/지표 프레임 갱신 주기
+MARKET_MEM_MB = 32 # 공유 프레임 메모리 한도 (넘으면 오래된 날짜부터 제외)
+
+# 신호 워커 (signal_worker.py)
+WORKER_OPEN_SEC = 60 # 미국 장중(프리/애프터 포함) 갱신 주기
+WORKER_CLOSED_SEC = 1800 # 장외 갱신 주기
+SNAPSHOT_STALE_SEC = 180 # 스냅샷이 이보다 오래되면 화면에서 직접 계산
+
+# 익절/손절 알림 (signal_worker.py 에서 발송)
+ALERT_FILE = "alerts.jsonl" # 알림 기록 (사이드바에 최근 알림 표시)
+ALERT_WEBHOOK = "" # 예: "http://127.0.0.1:8080/alert" (비우면 사용 안 함)
+ALERT_DESKTOP = False # 데스크톱 알림 (plyer 필요)
+ALERT_TICK_SEC = 5 # 장중 알림 확인 주기
+
+# 성능 측정 (timing.py, bench.py)
+TIMING = False # 기본값 - 사이드바에서 세션별로 켤 수 있음
+TIMING_LOG = "timing.jsonl" # 측정 기록 (구간마다 JSON 한 줄, 비우면 파일에 남기지 않음)
+BENCH_BASELINE = "bench_baseline.json" # bench.py 비교 기준
+FIRST_PAINT_MS = 1500 # 첫 화면 목표 (import + 일지 + 로컬 일봉/캐시 시세로 신호, 네트워크 대기 없음)
+
+# 파라미터
+RSI_P = 3
+SLOPE_LAG = 2
+TP_HALF = 6.0
+TP_FULL = 12.0
+SL_PCT = -6.0
+EXIT_RATIO = 0.975 # ExitLine = MA200 * 0.975
+
+# 스크리너 (기초지수 -> 레버리지 ETF)
+SCREEN_PAIRS = {"QQQ": "TQQQ", "SPY": "UPRO", "SOXX": "SOXL", "IWM": "TNA", "DIA": "UDOW",
+                "XLK": "TECL", "XLF": "FAS", "XLE": "ERX", "XBI": "LABU"}
+
+# 장기 졸업 프로젝트
+SEED_KRW = 16000000 # 시드 잔고
+LADDER_STEP = 20.0 # 수익률 20% 마다
+LADDER_SELL = 0.1 # 보유 수량의 10% 익절
+
+# 리스크 시뮬레이션 (블록 부트스트랩 몬테카를로)
+RISK_PATHS = 50000 # 경로 수
+RISK_YEARS = 5 # 기간 (년)
+RISK_BLOCK = 20 # 블록 길이 (거래일) - 추세/변동성 뭉침을 유지
+RISK_TARGET_KRW = 100000000 # 목표 자산 (도달 확률/기간 계산)
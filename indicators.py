@@ -0,0 +1,195 @@
+import math
+import numpy as np
+import pandas as pd
+from config import RSI_P, SLOPE_LAG, EXIT_RATIO
+
+# ==========================================
+# 지표 계산 (pandas 일괄 계산 + O(1) 스트리밍 엔진)
+# ==========================================
+INDICATOR_COLS = ['Q_MA50', 'Q_MA200', 'ExitLine', 'Q_RSI3', 'Slope_Accel']
+
+
+def indicator_values(close, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+    """
+    종가(Series 한 종목 또는 날짜 x 종목 DataFrame) -> 지표 dict (같은 모양).
+    DataFrame 이면 모든 종목을 한 번에 계산합니다 (종목별 결과는 Series 로 계산한 것과 동일).
+    """
+    ma50 = close.rolling(window=50).mean()
+    ma200 = close.rolling(window=200).mean()
+
+    # RSI (안정성 강화)
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=rsi_p).mean()
+    loss = -delta.where(delta < 0, 0).rolling(window=rsi_p).mean()
+    loss = loss.replace(0, 0.00001)
+    rs = (gain / loss).replace([np.inf, -np.inf], np.nan)
+    rsi = (100 - (100 / (1 + rs))).fillna(50)
+
+    # 모멘텀
+    ma20 = close.rolling(window=20).mean()
+    slope = ma20.pct_change() * 100
+    return {
+        'Q_MA50': ma50, 'Q_MA200': ma200, 'ExitLine': ma200 * EXIT_RATIO,
+        'Q_RSI3': rsi, 'Slope_Accel': slope > slope.shift(slope_lag),
+    }
+
+
+def compute_indicators(data, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+    """Q_Close 컬럼 기준으로 지표 컬럼을 추가합니다 (기준 구현)"""
+    for col, v in indicator_values(data['Q_Close'], rsi_p, slope_lag).items():
+        data[col] = v
+    return data
+
+
+class RollingMean:
+    """
+    pandas rolling(window).mean() 과 같은 방식(Kahan 보정 누적합)의 O(1) 이동평균.
+    덧셈 순서까지 같으므로 결과가 비트 단위로 일치합니다.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.buf = [math.nan] * window
+        self.pos = 0
+        self.count = 0
+        # (nobs, sum_x, comp_add, comp_remove, neg_ct, same_ct, prev_value)
+        # pandas 와 같이 더하기/빼기 보정값을 따로 둡니다
+        self.state = (0, 0.0, 0.0, 0.0, 0, 0, math.nan)
+
+    @staticmethod
+    def _remove(state, val):
+        nobs, sum_x, comp_add, comp_rm, neg_ct, same_ct, prev = state
+        if val == val:
+            nobs -= 1
+            y = -val - comp_rm
+            t = sum_x + y
+            comp_rm = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, val) < 0: neg_ct -= 1
+        return (nobs, sum_x, comp_add, comp_rm, neg_ct, same_ct, prev)
+
+    @staticmethod
+    def _add(state, val):
+        nobs, sum_x, comp_add, comp_rm, neg_ct, same_ct, prev = state
+        if val == val:
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if math.copysign(1.0, val) < 0: neg_ct += 1
+            same_ct = same_ct + 1 if val == prev else 1
+            prev = val
+        return (nobs, sum_x, comp_add, comp_rm, neg_ct, same_ct, prev)
+
+    def _mean(self, state):
+        nobs, sum_x, _, _, neg_ct, same_ct, prev = state
+        if nobs < self.window:
+            return math.nan
+        if same_ct >= nobs:
+            return prev
+        result = sum_x / nobs
+        if neg_ct == 0 and result < 0: result = 0.0
+        elif neg_ct == nobs and result > 0: result = 0.0
+        return result
+
+    def _step(self, val):
+        state = self.state
+        if self.count >= self.window:
+            state = self._remove(state, self.buf[self.pos])
+        return self._add(state, val)
+
+    def push(self, val):
+        self.state = self._step(val)
+        self.buf[self.pos] = val
+        self.pos = (self.pos + 1) % self.window
+        self.count += 1
+        return self._mean(self.state)
+
+    def preview(self, val):
+        """val 이 다음 값이라면의 평균 (상태는 바꾸지 않음)"""
+        return self._mean(self._step(val))
+
+
+class IndicatorEngine:
+    """
+    봉 하나씩 받아 compute_indicators() 와 같은 값을 O(1)로 갱신하는 상태 엔진.
+    update() 는 확정 봉을 반영하고, preview() 는 장중 가격을 '지금 종가라면'으로 계산만 합니다.
+    """
+
+    def __init__(self, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+        self.rsi_p = rsi_p
+        self.slope_lag = slope_lag
+        self.ma50 = RollingMean(50)
+        self.ma200 = RollingMean(200)
+        self.ma20 = RollingMean(20)
+        self.gain = RollingMean(rsi_p)
+        self.loss = RollingMean(rsi_p)
+        self.prev_close = math.nan
+        self.prev_ma20 = math.nan
+        self.slopes = [math.nan] * slope_lag  # 최근 slope_lag 개 기울기 (링 버퍼)
+        self.slope_pos = 0
+        self.last = None
+
+    @classmethod
+    def warm(cls, closes, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+        """과거 종가 전체로 상태를 채운 엔진"""
+        eng = cls(rsi_p, slope_lag)
+        for c in np.asarray(closes, dtype='f8'):
+            eng.update(float(c))
+        return eng
+
+    def _calc(self, close, commit):
+        delta = close - self.prev_close
+        g = delta if delta > 0 else 0.0
+        l = -(delta if delta < 0 else 0.0)
+
+        f = 'push' if commit else 'preview'
+        ma50 = getattr(self.ma50, f)(close)
+        ma200 = getattr(self.ma200, f)(close)
+        ma20 = getattr(self.ma20, f)(close)
+        gain = getattr(self.gain, f)(g)
+        loss = getattr(self.loss, f)(l)
+
+        if loss == 0: loss = 0.00001
+        rs = gain / loss
+        if math.isinf(rs): rs = math.nan
+        rsi = 100 - (100 / (1 + rs))
+        if rsi != rsi: rsi = 50.0
+
+        slope = (ma20 / self.prev_ma20 - 1) * 100
+        accel = bool(slope > self.slopes[self.slope_pos]) if self.slope_lag > 0 else False
+
+        if commit:
+            self.prev_close = close
+            self.prev_ma20 = ma20
+            if self.slope_lag > 0:
+                self.slopes[self.slope_pos] = slope
+                self.slope_pos = (self.slope_pos + 1) % self.slope_lag
+
+        return {
+            'Q_MA50': ma50, 'Q_MA200': ma200, 'ExitLine': ma200 * EXIT_RATIO,
+            'Q_RSI3': rsi, 'Slope_Accel': accel,
+        }
+
+    def update(self, close):
+        self.last = self._calc(close, commit=True)
+        return self.last
+
+    def preview(self, close):
+        return self._calc(close, commit=False)
+
+
+def check_engine(closes, rsi_p=RSI_P, slope_lag=SLOPE_LAG):
+    """스트리밍 엔진 결과가 pandas 기준 구현과 정확히 같은지 확인합니다"""
+    ref = compute_indicators(pd.DataFrame({'Q_Close': closes}), rsi_p, slope_lag)
+    eng = IndicatorEngine(rsi_p, slope_lag)
+    rows = [eng.update(float(c)) for c in np.asarray(closes, dtype='f8')]
+    got = pd.DataFrame(rows, index=ref.index)
+    for col in INDICATOR_COLS:
+        a = ref[col].to_numpy(); b = got[col].to_numpy()
+        if col == 'Slope_Accel':
+            if not (a == b).all(): return False
+        elif not np.array_equal(a, b, equal_nan=True):
+            return False
+    return True
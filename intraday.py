@@ -0,0 +1,229 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from config import INTRADAY_CAPACITY
+
+# ==========================================
+# 장중 1분봉 저장소 (종목별 고정 크기 링버퍼, 새 분봉만 증분 조회)
+# ==========================================
+# - 프리마켓/정규장/애프터마켓 분봉을 종목별 링버퍼 하나에 보관 (넘치면 가장 오래된 분봉부터 덮어씀)
+# - 조회는 마지막으로 가진 분봉부터만 (그 분봉은 아직 진행 중일 수 있어 다시 받아 덮어씀)
+# - 마지막가/세션 VWAP/고저/진행 중 일봉은 오늘 세션 분봉만으로 계산
+MINUTE_DTYPE = np.dtype([('ts', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+                         ('close', '<f8'), ('volume', '<f8')])  # ts: UTC epoch ns
+NY = "America/New_York"
+REGULAR_OPEN, REGULAR_CLOSE = 9 * 60 + 30, 16 * 60  # 분 (미국 동부)
+MAX_GAP = timedelta(days=7)  # 이보다 오래 비었으면 처음부터 (오늘 하루치) 다시
+EMPTY_RETRY = timedelta(minutes=30)  # 분봉이 없는 종목(장기 포트폴리오의 비상장/오타 등)을 다시 묻는 간격
+
+
+class MinuteRing:
+    """분봉 링버퍼. 시간순으로 append 하고 view() 로 오래된 것부터 읽습니다."""
+
+    def __init__(self, capacity=INTRADAY_CAPACITY):
+        self.buf = np.zeros(capacity, dtype=MINUTE_DTYPE)
+        self.start = 0  # 가장 오래된 분봉 위치
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return len(self.buf)
+
+    def __len__(self):
+        return self.size
+
+    def last_ts(self):
+        return int(self.buf['ts'][(self.start + self.size - 1) % self.capacity]) if self.size else None
+
+    def append(self, bars):
+        """
+        시간순 분봉 배열 추가 -> 새로 늘어난 분봉 수.
+        마지막 분봉과 같은 시각은 덮어쓰고(진행 중 분봉 갱신), 그보다 이른 분봉은 무시합니다.
+        """
+        last = self.last_ts()
+        if last is not None and len(bars):
+            if bars['ts'][0] <= last:
+                same = bars[bars['ts'] == last]
+                if len(same):
+                    self.buf[(self.start + self.size - 1) % self.capacity] = same[-1]
+                bars = bars[bars['ts'] > last]
+        bars = bars[-self.capacity:]
+        n = len(bars)
+        if n == 0:
+            return 0
+        pos = (self.start + self.size + np.arange(n)) % self.capacity
+        self.buf[pos] = bars
+        overflow = max(0, self.size + n - self.capacity)
+        self.size = min(self.capacity, self.size + n)
+        self.start = (self.start + overflow) % self.capacity
+        return n
+
+    def view(self):
+        """오래된 것부터 정렬된 사본 (최대 capacity 행)"""
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.buf[self.start:end].copy()
+        return np.concatenate([self.buf[self.start:], self.buf[:end - self.capacity]])
+
+
+def frame_to_minutes(df):
+    """yfinance 분봉 DataFrame -> MINUTE_DTYPE 배열 (시각순)"""
+    df = df.dropna(subset=['Close'])
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is None:
+        idx = idx.tz_localize(NY)
+    bars = np.zeros(len(df), dtype=MINUTE_DTYPE)
+    bars['ts'] = idx.tz_convert("UTC").as_unit("ns").asi8
+    for f, c in [('open', 'Open'), ('high', 'High'), ('low', 'Low'), ('close', 'Close'), ('volume', 'Volume')]:
+        bars[f] = df[c].to_numpy(dtype='f8') if c in df.columns else df['Close'].to_numpy(dtype='f8')
+    bars = bars[np.argsort(bars['ts'], kind='stable')]
+    return bars
+
+
+def minutes_to_frame(bars):
+    idx = pd.to_datetime(bars['ts'], utc=True).tz_convert(NY)
+    return pd.DataFrame({'Open': bars['open'], 'High': bars['high'], 'Low': bars['low'],
+                         'Close': bars['close'], 'Volume': bars['volume']}, index=idx)
+
+
+class YahooMinuteProvider:
+    """여러 종목의 1분봉(프리/애프터 포함)을 start 이후만 한 번에 받아옵니다 (start 없으면 오늘 하루)."""
+
+    def __init__(self, timeout=5):
+        self.timeout = timeout
+
+    def fetch(self, symbols, start=None):
+        import yfinance as yf
+        kw = {'period': "1d"} if start is None else {'start': start}
+        df = yf.download(list(symbols), interval="1m", prepost=True, group_by='ticker', auto_adjust=False,
+                         progress=False, threads=True, timeout=self.timeout, **kw)
+        if df is None or df.empty:
+            return {}
+        return {s: df[s] for s in symbols if s in df.columns.get_level_values(0)}
+
+
+class StubMinuteProvider:
+    """오프라인용 - 미리 준비한 분봉에서 start 이후만 잘라 돌려줍니다. 호출 기록을 남깁니다."""
+
+    def __init__(self, frames, fail=False):
+        self.frames = frames
+        self.fail = fail
+        self.calls = []
+
+    def fetch(self, symbols, start=None):
+        self.calls.append((tuple(symbols), start))
+        if self.fail:
+            raise ConnectionError("stub minute provider offline")
+        out = {}
+        for s in symbols:
+            if s not in self.frames:
+                continue
+            f = self.frames[s]
+            out[s] = f if start is None else f[f.index >= start]
+        return out
+
+
+class IntradayStore:
+    """
+    종목별 MinuteRing 모음. update() 는 분봉이 있는 종목을 한 번에, 가장 늦은 마지막 분봉 이후만 조회합니다.
+    읽기(stats/frame)는 사본으로 돌려주므로 갱신 중에도 안전합니다.
+    """
+
+    def __init__(self, provider=None, capacity=INTRADAY_CAPACITY):
+        self.provider = provider or YahooMinuteProvider()
+        self.capacity = capacity
+        self.rings = {}
+        self._lock = threading.Lock()
+        self._empty = {}  # 분봉 없이 돌아온 종목 -> 그때 시각 (EMPTY_RETRY 동안 요청에서 뺌)
+
+    def _ring(self, symbol):
+        if symbol not in self.rings:
+            self.rings[symbol] = MinuteRing(self.capacity)
+        return self.rings[symbol]
+
+    def update(self, symbols):
+        """
+        새 분봉만 받아 반영 -> {symbol: 새로 늘어난 분봉 수}. 조회 실패는 예외 그대로 (호출 쪽에서 재시도)
+        분봉이 있는 종목은 한 번에 - 가장 늦은 종목의 마지막 분봉부터 (앞선 종목의 겹치는 분봉은 append 가 버림).
+        분봉이 없는 종목만 오늘 하루치를 따로 한 번. 받아도 비어 있던 종목은 EMPTY_RETRY 동안 다시 묻지 않음.
+        """
+        now = pd.Timestamp.now(tz="UTC")
+        with self._lock:
+            lasts = {s: self._ring(s).last_ts() for s in symbols}
+            retry = {s for s, at in self._empty.items() if now - at < EMPTY_RETRY}
+        known = [s for s in symbols if lasts[s] is not None]
+        start = pd.Timestamp(min(lasts[s] for s in known), tz="UTC") if known else None
+        if start is not None and now - start > MAX_GAP:
+            known, start = [], None  # 오래 비었으면 오늘 하루치부터 다시
+        requests = [(known, start)] if known else []
+        new = [s for s in symbols if s not in known and s not in retry]
+        if new:
+            requests.append((new, None))
+
+        added = {}
+        for syms, since in requests:
+            got = self.provider.fetch(syms, start=since)
+            for s in syms:
+                bars = frame_to_minutes(got[s]) if s in got else np.zeros(0, dtype=MINUTE_DTYPE)
+                with self._lock:
+                    if not len(bars) and lasts[s] is None:
+                        self._empty[s] = now
+                        continue
+                    self._empty.pop(s, None)
+                    added[s] = self._ring(s).append(bars)
+        return added
+
+    def session(self, symbol):
+        """마지막 분봉이 속한 (미국 동부 날짜 기준) 세션의 분봉 배열"""
+        with self._lock:
+            ring = self.rings.get(symbol)
+            bars = ring.view() if ring is not None else np.zeros(0, dtype=MINUTE_DTYPE)
+        if not len(bars):
+            return bars
+        day = pd.to_datetime(bars['ts'], utc=True).tz_convert(NY).normalize()
+        return bars[day == day[-1]]
+
+    def stats(self, symbol):
+        """
+        오늘 세션 요약 dict (분봉이 없으면 None):
+        last, as_of, vwap, high, low, 그리고 정규장 기준 진행 중 일봉 bar{open, high, low, close, volume}
+        """
+        bars = self.session(symbol)
+        if not len(bars):
+            return None
+        vol = bars['volume']
+        typical = (bars['high'] + bars['low'] + bars['close']) / 3
+        vwap = float((typical * vol).sum() / vol.sum()) if vol.sum() > 0 else float(typical.mean())
+        t = pd.to_datetime(bars['ts'], utc=True).tz_convert(NY)
+        minute = t.hour * 60 + t.minute
+        reg = bars[(minute >= REGULAR_OPEN) & (minute < REGULAR_CLOSE)]
+        day = reg if len(reg) else bars  # 정규장 전이면 프리마켓 분봉으로 임시 일봉
+        return {
+            'last': float(bars['close'][-1]), 'as_of': t[-1],
+            'vwap': vwap, 'high': float(bars['high'].max()), 'low': float(bars['low'].min()),
+            'bar': {'open': float(day['open'][0]), 'high': float(day['high'].max()), 'low': float(day['low'].min()),
+                    'close': float(bars['close'][-1]), 'volume': float(day['volume'].sum())},
+        }
+
+    def frame(self, symbol):
+        """오늘 세션 분봉 DataFrame (차트용, 미국 동부 시각)"""
+        return minutes_to_frame(self.session(symbol))
+
+
+class IntradayQuoteProvider:
+    """QuoteService 용 공급자 - 분봉 저장소를 증분 갱신하고 마지막 체결가를 돌려줍니다."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def fetch(self, symbols):
+        self.store.update(symbols)
+        out = {}
+        for s in symbols:
+            st = self.store.stats(s)
+            if st is not None:
+                out[s] = (st['last'], st['as_of'])
+        return out
@@ -0,0 +1,224 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from config import JOURNAL_DB, SHORT_JOURNAL, LONG_JOURNAL, LONG_PORTFOLIO, LONG_BALANCE, SEED_KRW
+
+# ==========================================
+# 매매일지 / 포트폴리오 저장소 (SQLite, WAL 모드)
+# ==========================================
+# - 추가/수정/삭제는 해당 행만 건드림 (CSV 전체 재작성 없음)
+# - ID 는 AUTOINCREMENT -> 삭제 후에도 재사용되지 않고 계속 증가
+# - Status(Open/Half_Open) 인덱스로 보유 포지션만 바로 조회
+SHORT_COLS = ['ID', 'Date', 'Type', 'Price', 'Shares', 'TP_Half', 'TP_Full', 'SL', 'Status', 'Profit', 'Note']
+LONG_COLS = ['ID', 'Date', 'Account', 'Type', 'Qty', 'Price', 'Amount', 'Note']
+PORTFOLIO_COLS = ['Account', 'Ticker', 'Shares', 'Avg_Price', 'Level']
+OPEN_STATUS = ('Open', 'Half_Open')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS short_journal (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Date TEXT, Type TEXT, Price REAL, Shares REAL,
+    TP_Half REAL, TP_Full REAL, SL REAL,
+    Status TEXT, Profit REAL DEFAULT 0, Note TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_short_status ON short_journal(Status);
+CREATE TABLE IF NOT EXISTS long_journal (
+    ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Date TEXT, Account INTEGER, Type TEXT, Qty REAL, Price REAL, Amount REAL, Note TEXT
+);
+CREATE TABLE IF NOT EXISTS long_portfolio (
+    Account INTEGER, Ticker TEXT, Shares REAL, Avg_Price REAL, Level INTEGER
+);
+CREATE TABLE IF NOT EXISTS long_balance (
+    id INTEGER PRIMARY KEY CHECK (id = 1), KRW REAL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY, value TEXT
+);
+"""
+
+
+class JournalDB:
+    """단기/장기 일지, 장기 포트폴리오, 현금 잔고를 하나의 SQLite 파일로 관리합니다."""
+
+    def __init__(self, path=JOURNAL_DB):
+        self.path = path
+        self._local = threading.local()  # Streamlit 세션(스레드)마다 연결 하나
+        with self._conn() as con:
+            con.executescript(SCHEMA)
+
+    def _connect(self):
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    @contextmanager
+    def _conn(self):
+        """트랜잭션 하나 - 블록 안의 여러 행 변경은 한 번에 커밋되거나 전부 취소됩니다"""
+        con = self._connect()
+        before = con.total_changes
+        try:
+            yield con
+            if con.total_changes != before:  # 실제 변경이 있었으면 버전 증가 (화면 캐시 무효화용)
+                con.execute("INSERT INTO meta VALUES ('rev', 1) ON CONFLICT(key) DO UPDATE SET value = value + 1")
+            con.commit()
+        except Exception:
+            con.rollback()
+            raise
+
+    def _frame(self, sql, params=(), cols=None):
+        df = pd.read_sql_query(sql, self._connect(), params=params)
+        return df if cols is None else df.reindex(columns=cols)
+
+    def revision(self):
+        """변경이 커밋될 때마다 1씩 증가하는 DB 버전"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()
+        return int(row[0]) if row else 0
+
+    # --- 단기 일지 ---
+    def short_journal(self):
+        return self._frame("SELECT * FROM short_journal ORDER BY ID", cols=SHORT_COLS)
+
+    def open_trades(self):
+        return self._frame(f"SELECT * FROM short_journal WHERE Status IN ({','.join('?' * len(OPEN_STATUS))}) ORDER BY ID",
+                           OPEN_STATUS, SHORT_COLS)
+
+    def realized_profit(self):
+        return float(self._connect().execute("SELECT COALESCE(SUM(Profit), 0) FROM short_journal").fetchone()[0])
+
+    def add_short(self, row):
+        """새 거래 추가 -> 부여된 ID"""
+        fields = [c for c in SHORT_COLS if c != 'ID' and c in row]
+        with self._conn() as con:
+            cur = con.execute(f"INSERT INTO short_journal ({','.join(fields)}) VALUES ({','.join('?' * len(fields))})",
+                              [_sql_value(row[c]) for c in fields])
+            return cur.lastrowid
+
+    def close_short(self, trade_id, status, sold_shares, exec_price):
+        """
+        반익절/전량 청산을 한 번에 반영 (상태, 실현손익 누적, 남은 수량).
+        UPDATE 한 문장이 조건 확인까지 하므로 두 세션이 같은 행을 동시에 눌러도 한 번만 반영됩니다:
+        보유 중이고(반익절은 Open 일 때만) 남은 수량이 sold_shares 이상일 때만.
+        반환: 이번 매도 실현손익 (이미 삭제/청산됐거나 수량이 바뀐 거래면 None, 아무것도 바꾸지 않음)
+        """
+        allowed = ('Open',) if status == 'Half_Open' else OPEN_STATUS
+        tid, sold = int(trade_id), float(sold_shares)
+        with self._conn() as con:
+            cur = con.execute(f"UPDATE short_journal SET Status = ?, Profit = Profit + (? - Price) * ?, Shares = Shares - ? "
+                              f"WHERE ID = ? AND Status IN ({','.join('?' * len(allowed))}) AND Shares >= ?",
+                              (status, float(exec_price), sold, sold, tid, *allowed, sold))
+            if cur.rowcount == 0:
+                return None
+            price = con.execute("SELECT Price FROM short_journal WHERE ID = ?", (tid,)).fetchone()[0]  # 같은 트랜잭션 (쓰기 잠금 보유)
+            return (float(exec_price) - price) * sold
+
+    def delete_short(self, trade_id):
+        """거래 삭제 -> 지워진 행의 실현손익 (이미 없는 거래면 None)"""
+        with self._conn() as con:
+            con.execute("BEGIN IMMEDIATE")  # 읽고 지우는 사이에 다른 세션이 바꾸지 못하게 쓰기 잠금부터
+            row = con.execute("SELECT Profit FROM short_journal WHERE ID = ?", (int(trade_id),)).fetchone()
+            if row is None:
+                return None
+            con.execute("DELETE FROM short_journal WHERE ID = ?", (int(trade_id),))
+            return float(row[0] or 0.0)
+
+    # --- 장기 일지 ---
+    def long_journal(self):
+        return self._frame("SELECT * FROM long_journal ORDER BY ID", cols=LONG_COLS)
+
+    def add_long(self, row):
+        fields = [c for c in LONG_COLS if c != 'ID' and c in row]
+        with self._conn() as con:
+            cur = con.execute(f"INSERT INTO long_journal ({','.join(fields)}) VALUES ({','.join('?' * len(fields))})",
+                              [_sql_value(row[c]) for c in fields])
+            return cur.lastrowid
+
+    def delete_last_long(self):
+        with self._conn() as con:
+            con.execute("DELETE FROM long_journal WHERE ID = (SELECT MAX(ID) FROM long_journal)")
+
+    # --- 장기 포트폴리오 / 현금 ---
+    def portfolio(self):
+        return self._frame("SELECT * FROM long_portfolio ORDER BY rowid", cols=PORTFOLIO_COLS)
+
+    def save_portfolio(self, df):
+        """포트폴리오 표 전체를 한 트랜잭션으로 교체 (data_editor 저장)"""
+        rows = [[_sql_value(v) for v in r] for r in df.reindex(columns=PORTFOLIO_COLS).itertuples(index=False)]
+        with self._conn() as con:
+            con.execute("DELETE FROM long_portfolio")
+            con.executemany("INSERT INTO long_portfolio VALUES (?, ?, ?, ?, ?)", rows)
+
+    def cash(self):
+        row = self._connect().execute("SELECT KRW FROM long_balance WHERE id = 1").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def add_cash(self, delta):
+        with self._conn() as con:
+            con.execute("INSERT INTO long_balance (id, KRW) VALUES (1, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET KRW = KRW + excluded.KRW", (float(delta),))
+
+    # --- 초기화 / CSV 이관 ---
+    def ensure_defaults(self):
+        """장기 모드 첫 실행 시 기본 포트폴리오와 시드 잔고"""
+        with self._conn() as con:
+            if con.execute("SELECT COUNT(*) FROM long_portfolio").fetchone()[0] == 0:
+                con.execute("INSERT INTO long_portfolio VALUES (1, 'TQQQ', 0, 0.0, 0)")
+            con.execute("INSERT OR IGNORE INTO long_balance (id, KRW) VALUES (1, ?)", (float(SEED_KRW),))
+
+    def import_csvs(self, short=SHORT_JOURNAL, long=LONG_JOURNAL, portfolio=LONG_PORTFOLIO, balance=LONG_BALANCE):
+        """
+        기존 CSV 를 한 번만 가져옵니다 (meta 에 기록, 다시 호출해도 중복 없음).
+        단기 일지에서 중복된 ID(len+1 방식의 충돌)는 뒤쪽 행에 새 ID 를 붙입니다.
+        """
+        with self._conn() as con:
+            if con.execute("SELECT 1 FROM meta WHERE key = 'csv_imported'").fetchone():
+                return False
+
+            if os.path.exists(short):
+                df = pd.read_csv(short).reindex(columns=SHORT_COLS)
+                ids = pd.to_numeric(df['ID'], errors='coerce')
+                dup = ids.duplicated() | ids.isna()
+                next_id = int(ids.max()) + 1 if ids.notna().any() else 1
+                df.loc[dup, 'ID'] = range(next_id, next_id + int(dup.sum()))
+                con.executemany(f"INSERT INTO short_journal VALUES ({','.join('?' * len(SHORT_COLS))})",
+                                [[_sql_value(v) for v in r] for r in df.itertuples(index=False)])
+
+            if os.path.exists(long):
+                df = pd.read_csv(long).reindex(columns=LONG_COLS[1:])
+                con.executemany(f"INSERT INTO long_journal ({','.join(LONG_COLS[1:])}) VALUES ({','.join('?' * (len(LONG_COLS) - 1))})",
+                                [[_sql_value(v) for v in r] for r in df.itertuples(index=False)])
+
+            if os.path.exists(portfolio):
+                df = pd.read_csv(portfolio).reindex(columns=PORTFOLIO_COLS)
+                con.executemany("INSERT INTO long_portfolio VALUES (?, ?, ?, ?, ?)",
+                                [[_sql_value(v) for v in r] for r in df.itertuples(index=False)])
+
+            if os.path.exists(balance):
+                krw = pd.read_csv(balance).iloc[0]['KRW']
+                con.execute("INSERT OR REPLACE INTO long_balance (id, KRW) VALUES (1, ?)", (float(krw),))
+
+            con.execute("INSERT INTO meta VALUES ('csv_imported', datetime('now'))")
+            return True
+
+
+def _sql_value(v):
+    """numpy/pandas 값을 sqlite 가 받는 파이썬 값으로 (날짜는 YYYY-MM-DD)"""
+    if isinstance(v, str):
+        return v
+    if pd.isna(v):
+        return None
+    if isinstance(v, date):
+        return v.isoformat()[:10]
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from journal_store import OPEN_STATUS
+
+# ==========================================
+# 거래 관리 리스트 (정렬/필터/집계 결과를 메모리에 보관, 페이지 단위 렌더링)
+# ==========================================
+PAGE_SIZE = 20
+CACHE_SIZE = 32  # 필터 조합별 결과 보관 개수
+
+
+class Ledger:
+    """
+    일지 한 버전(DB revision)에 대한 정렬된 사본.
+    필터 결과와 집계는 조합별로 기억해 두고 다음 rerun 에서 그대로 씁니다.
+    여러 세션이 같은 객체를 쓰므로 (st.cache_resource) 결과 캐시는 잠금 안에서만 읽고 바꿉니다.
+    """
+
+    def __init__(self, journal):
+        j = journal.sort_values('ID', ascending=False, kind='stable').reset_index(drop=True)
+        self.journal = j
+        self.dates = pd.to_datetime(j['Date'], errors='coerce').to_numpy()
+        self.is_open = (j['Status'].isin(OPEN_STATUS) & (j['Type'] == 'Buy')).to_numpy()
+        self.types = j['Type'].astype(str).to_numpy()
+        self.status = j['Status'].astype(str).to_numpy()
+        # 검색용 문자열 (ID, 날짜, 메모)
+        self.text = ("#" + j['ID'].astype(str) + " " + j['Date'].astype(str) + " " + j['Note'].fillna('').astype(str)).str.lower().to_numpy(dtype=str)
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.journal)
+
+    def select(self, start=None, end=None, types=(), statuses=(), search=""):
+        """
+        필터 적용 -> (보유 중 거래, 종료된 거래, 집계 dict).
+        보유 중 거래는 항상 위에, 종료된 거래는 ID 내림차순.
+        """
+        key = (start, end, tuple(types), tuple(statuses), search.strip().lower())
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        mask = np.ones(len(self.journal), dtype=bool)
+        if start is not None: mask &= self.dates >= np.datetime64(pd.Timestamp(start))
+        if end is not None: mask &= self.dates < np.datetime64(pd.Timestamp(end) + pd.Timedelta(days=1))
+        if types: mask &= np.isin(self.types, list(types))
+        if statuses: mask &= np.isin(self.status, list(statuses))
+        if key[4]: mask &= np.char.find(self.text, key[4]) >= 0
+
+        open_rows = self.journal[mask & self.is_open]
+        closed_rows = self.journal[mask & ~self.is_open]
+        profit = self.journal.loc[mask, 'Profit'].fillna(0)
+        agg = {
+            'count': int(mask.sum()),
+            'open': len(open_rows),
+            'closed': len(closed_rows),
+            'realized': float(profit.sum()),
+            'wins': int((closed_rows['Profit'] > 0).sum()),
+            'losses': int((closed_rows['Profit'] < 0).sum()),
+        }
+        result = (open_rows, closed_rows, agg)
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return result
+
+
+def page_of(df, page, page_size=PAGE_SIZE):
+    """page 번째(0부터) 구간만 잘라서 -> (구간 DataFrame, 전체 페이지 수)"""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = min(max(page, 0), n_pages - 1)
+    return df.iloc[page * page_size:(page + 1) * page_size], n_pages
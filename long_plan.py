@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from config import SEED_KRW, LADDER_STEP, LADDER_SELL
+
+# ==========================================
+# 장기 졸업 프로젝트 규칙 + 다계좌 시뮬레이션 (KRW 기준)
+# ==========================================
+# 규칙 (app.py 장기 모드의 위치 판독 / 익절 체크와 동일)
+# - MA50 (공격): QQQ 종가가 MA50 과 MA200 위이면, 보유 없는 계좌는 계좌 현금 전부로 매수 (Level 0 부터)
+# - MA200 (방어): QQQ 가 MA200 아래면 신규 매수 없이 보유만 유지
+# - Exit Line 붕괴: QQQ 가 ExitLine 아래면 모든 계좌 전량 매도
+# - 익절 사다리: 평단 대비 수익률 20% 마다 (int(pnl/20) > Level) 보유 수량의 10% 매도, Level 갱신
+TICKER_COLS = {'TQQQ': 'T_Close', 'QLD': 'L_Close', 'QQQ': 'Q_Close'}
+
+
+def ladder_target(price, avg, level, shares, step=LADDER_STEP, sell=LADDER_SELL):
+    """
+    익절 사다리 판정 (스칼라/배열 모두 가능).
+    반환: (수익률%, 새 Level, 발동 여부, 매도 수량)
+    """
+    price = np.asarray(price, dtype='f8'); avg = np.asarray(avg, dtype='f8')
+    shares = np.asarray(shares, dtype='f8'); level = np.asarray(level, dtype='f8')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl = np.where((avg > 0) & (price > 0), (price - avg) / avg * 100, 0.0)
+    tgt = np.trunc(pnl / step)
+    hit = (tgt > level) & (shares > 0)
+    qty = np.where(hit, np.floor(shares * sell), 0.0)
+    return pnl, np.where(hit, tgt, level), hit, qty
+
+
+def position_status(q, ma50, ma200, exit_line):
+    """QQQ 위치 판독 -> (공격, 방어선 위, ExitLine 붕괴)"""
+    return q > ma50, q > ma200, q < exit_line
+
+
+def simulate_plan(df, tickers, seed_krw=SEED_KRW, shares=None, avg=None, level=None, cash=None):
+    """
+    df: load_market_data() 결과 (T_Close/L_Close/Q_Close/USDKRW/Q_MA50/Q_MA200/ExitLine)
+    tickers: 계좌별 종목 리스트 (예: ['TQQQ', 'TQQQ', 'QLD', 'QLD'])
+    시작 보유(shares/avg/level)와 계좌별 현금(cash)을 주지 않으면 seed_krw 를 균등 분배해 빈 계좌로 시작합니다.
+    하루 단위 루프 안에서는 모든 계좌를 배열로 한 번에 처리합니다.
+    반환: (요약 dict, 일별 DataFrame, 매매 이벤트 DataFrame)
+    """
+    n_acc = len(tickers)
+    prices = np.column_stack([df[TICKER_COLS[t]].to_numpy(dtype='f8') for t in tickers])
+    fx = df['USDKRW'].to_numpy(dtype='f8')
+    attack, above200, breach = position_status(*(df[c].to_numpy(dtype='f8') for c in ['Q_Close', 'Q_MA50', 'Q_MA200', 'ExitLine']))
+    enter = attack & above200 & ~breach
+
+    sh = np.zeros(n_acc) if shares is None else np.asarray(shares, dtype='f8').copy()
+    av = np.zeros(n_acc) if avg is None else np.asarray(avg, dtype='f8').copy()
+    lv = np.zeros(n_acc) if level is None else np.asarray(level, dtype='f8').copy()
+    cs = np.full(n_acc, seed_krw / n_acc) if cash is None else np.asarray(cash, dtype='f8').copy()
+
+    n = len(df)
+    value = np.empty((n, n_acc))
+    cash_hist = np.empty(n)
+    events = []  # (일자 인덱스, 계좌 인덱스, 구분, 수량, 가격)
+
+    for t in range(n):
+        px = prices[t]
+        rate = fx[t]
+        ok = ~np.isnan(px)
+
+        if breach[t]:
+            sell = ok & (sh > 0)
+            if sell.any():
+                cs += np.where(sell, sh * px * rate, 0.0)
+                events += [(t, i, 'Exit', sh[i], px[i]) for i in np.flatnonzero(sell)]
+                sh[sell] = 0; av[sell] = 0; lv[sell] = 0
+        else:
+            _, new_lv, hit, qty = ladder_target(px, av, lv, sh)
+            hit &= ok
+            if hit.any():
+                cs += np.where(hit, qty * px * rate, 0.0)
+                sh -= np.where(hit, qty, 0.0)
+                lv = np.where(hit, new_lv, lv)
+                events += [(t, i, 'Ladder', qty[i], px[i]) for i in np.flatnonzero(hit & (qty > 0))]
+
+            if enter[t]:
+                with np.errstate(invalid='ignore'):
+                    buy_qty = np.where(ok & (sh == 0), np.floor(cs / (px * rate)), 0.0)
+                buy = buy_qty > 0
+                if buy.any():
+                    cs -= np.where(buy, buy_qty * px * rate, 0.0)
+                    sh += buy_qty; av = np.where(buy, px, av); lv = np.where(buy, 0, lv)
+                    events += [(t, i, 'Buy', buy_qty[i], px[i]) for i in np.flatnonzero(buy)]
+
+        value[t] = cs + np.where(ok, sh * px * rate, 0.0)
+        cash_hist[t] = cs.sum()
+
+    total = value.sum(axis=1)
+    daily = pd.DataFrame(value, index=df.index, columns=[f"#{i + 1} {t}" for i, t in enumerate(tickers)])
+    daily['Cash'] = cash_hist
+    daily['Total'] = total
+
+    ev = pd.DataFrame(events, columns=['t', 'Account', 'Type', 'Qty', 'Price'])
+    ev.insert(0, 'Date', df.index[ev['t'].to_numpy()] if len(ev) else pd.DatetimeIndex([]))
+    ev['Account'] += 1
+    ev['Amount_KRW'] = ev['Qty'] * ev['Price'] * fx[ev['t'].to_numpy()] if len(ev) else []
+    ev = ev.drop(columns='t')
+
+    start = total[0] if n else 0.0
+    years = (df.index[-1] - df.index[0]).days / 365.25 if n > 1 else 0.0
+    peak = np.maximum.accumulate(total) if n else total
+    summary = {
+        'start_krw': float(start),
+        'final_krw': float(total[-1]) if n else 0.0,
+        'cagr': float(((total[-1] / start) ** (1 / years) - 1) * 100) if years > 0 and start > 0 else 0.0,
+        'max_dd': float(((total - peak) / peak).min() * 100) if n else 0.0,
+        'buys': int((ev['Type'] == 'Buy').sum()),
+        'ladder_sells': int((ev['Type'] == 'Ladder').sum()),
+        'exits': int((ev['Type'] == 'Exit').sum()),
+    }
+    return summary, daily, ev
@@ -0,0 +1,159 @@
+import glob
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import MARKET_DIR, MARKET_TTL_SEC, MARKET_MEM_MB
+from market_store import atomic_write
+
+log = logging.getLogger(__name__)
+
+# ==========================================
+# 공유 시장 데이터 (세션마다 복사하지 않는 읽기 전용 프레임)
+# ==========================================
+# - 가격/지표는 float64 한 덩어리(컬럼 x 날짜)로 .npy 에 저장하고 memory-map 으로 엽니다
+#   -> 모든 세션(과 같은 파일을 여는 다른 프로세스)이 같은 페이지를 공유
+# - 모든 열이 신호 판단(MA200/ExitLine/RSI 비교, 백테스트/시뮬레이션)에 쓰이므로 float32 로 줄이지 않음
+#   -> 종가가 선 근처여도 compute_indicators 결과와 같은 판단
+# - 갱신은 새 버전 파일을 다 쓴 뒤 참조만 교체 -> 읽는 쪽은 항상 완성된 프레임만 봅니다
+# - 배열은 쓰기 금지라 실수로 값을 바꾸려 하면 바로 에러
+FLOAT_COLS = ['T_Close', 'L_Close', 'Q_Close', 'USDKRW', 'Q_MA50', 'Q_MA200', 'ExitLine', 'Q_RSI3']
+BOOL_COLS = ['Slope_Accel']
+FILE_RE = re.compile(r"(?:frame|close)_v(\d+)\.npy$")  # close_v: 예전 버전이 남긴 파일 (정리 대상)
+MIN_ROWS = 200  # 메모리 한도로 자르더라도 MA200 한 구간은 남김
+
+
+class MarketFrame:
+    """한 버전의 시장 데이터. df 는 memory-map 배열 위의 view 라 만들 때 복사가 없습니다."""
+
+    def __init__(self, version, values, index, columns, flags, info, engine):
+        self.version = version
+        self.info = info
+        self.engine = engine
+        # 컬럼별 dict 로 넘기면 pandas 가 블록을 합치지 않음 -> 컬럼마다 memory-map 행 하나의 view
+        cols = {c: values[i] for i, c in enumerate(columns)}
+        cols.update(flags)
+        self.df = pd.DataFrame(cols, index=index, copy=False)
+
+    def __len__(self):
+        return len(self.df)
+
+
+class SharedMarket:
+    """
+    프로세스에 하나 두고 (st.cache_resource) 모든 세션이 get() 으로 같은 MarketFrame 을 받습니다.
+    ttl 이 지나면 먼저 들어온 한 스레드만 다시 만들고, 나머지는 그동안 이전 버전을 그대로 씁니다.
+    get_nowait() 는 기다리지 않습니다 - 처음엔 fallback(로컬 저장분)으로 바로 만들고 다운로드는 백그라운드에서.
+    """
+
+    def __init__(self, loader, root=os.path.join(MARKET_DIR, "frame"), ttl=MARKET_TTL_SEC, budget_mb=MARKET_MEM_MB,
+                 fallback=None):
+        self.loader = loader  # () -> (지표 포함 DataFrame, daily_info, engine)
+        self.fallback = fallback  # loader 와 같은 형식, 네트워크 없이 (없으면 get_nowait 도 처음엔 None)
+        self.root = root
+        self.ttl = ttl
+        self.budget = int(budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._current = None
+        self._built_at = 0.0
+        self._thread = None  # 백그라운드 갱신 스레드
+        self._thread_lock = threading.Lock()
+        self._version = max((v for v, _ in self._files()), default=0)  # 재시작해도 번호는 계속 증가
+
+    def _files(self):
+        for p in glob.glob(os.path.join(self.root, "*_v*.npy")):
+            m = FILE_RE.match(os.path.basename(p))
+            if m:
+                yield int(m.group(1)), p
+
+    def get(self):
+        cur = self._current
+        if cur is not None and time.time() - self._built_at < self.ttl:
+            return cur
+        # 처음이면 만들어질 때까지 기다리고, 갱신 중이면 이전 버전을 바로 돌려줌
+        if not self._lock.acquire(blocking=cur is None):
+            return cur
+        try:
+            if self._current is cur:
+                self.refresh()
+            return self._current
+        finally:
+            self._lock.release()
+
+    def get_nowait(self):
+        """
+        기다리지 않는 get -> (MarketFrame 또는 None, 갱신 중 여부).
+        만료/처음이면 백그라운드 갱신을 시작하고 지금 가진 것(처음이면 fallback 으로 만든 것)을 바로 돌려줍니다.
+        """
+        cur = self._current
+        if cur is not None and time.time() - self._built_at < self.ttl:
+            return cur, False
+        if cur is None and self.fallback is not None and self._lock.acquire(blocking=False):
+            try:
+                if self._current is None:
+                    df, info, engine = self.fallback()
+                    if not df.empty:
+                        self._current = self._build(df, info, engine)  # _built_at 은 그대로 -> 만료 상태
+            finally:
+                self._lock.release()
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.get, daemon=True, name="market-refresh")
+                self._thread.start()
+        return self._current, True
+
+    def wait(self, timeout=None):
+        """백그라운드 갱신이 끝날 때까지 기다린 뒤 현재 프레임"""
+        t = self._thread
+        if t is not None:
+            t.join(timeout)
+        return self._current
+
+    def refresh(self):
+        df, info, engine = self.loader()
+        self._built_at = time.time()
+        if df.empty:
+            # 다운로드/계산 실패 -> 이전 버전 유지 (처음이면 빈 프레임)
+            if self._current is None:
+                self._current = MarketFrame(0, np.empty((0, 0)), df.index, [], {}, info, engine)
+            return self._current
+        frame = self._build(df, info, engine)
+        self._current = frame  # 참조 교체 한 번 -> 읽는 쪽은 이전 것 아니면 새 것
+        self._cleanup()
+        return frame
+
+    def _build(self, df, info, engine):
+        cols = [c for c in FLOAT_COLS if c in df.columns]
+        row_bytes = 8 * len(cols) + len(BOOL_COLS)
+        keep = max(MIN_ROWS, self.budget // row_bytes)
+        if len(df) > keep:
+            log.warning("시장 데이터 %d행이 메모리 한도 %.1fMB 초과 -> 최근 %d행만 사용", len(df), self.budget / 2**20, keep)
+            df = df.iloc[-keep:]
+
+        values = np.ascontiguousarray(df[cols].to_numpy(dtype=np.float64).T)  # 컬럼 x 날짜 (컬럼별 연속)
+        self._version += 1
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"frame_v{self._version}.npy")
+        atomic_write(path, lambda f: np.save(f, values))
+
+        mapped = np.load(path, mmap_mode='r')
+        flags = {}
+        for c in BOOL_COLS:
+            a = df[c].to_numpy(dtype=bool, copy=True)
+            a.flags.writeable = False
+            flags[c] = a
+        return MarketFrame(self._version, mapped, df.index, cols, flags, info, engine)
+
+    def _cleanup(self):
+        """현재/직전 버전만 남기고 삭제 (아직 열려 있는 파일은 다음 갱신 때 다시 시도)"""
+        for v, p in list(self._files()):
+            if v < self._version - 1:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
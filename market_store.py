@@ -0,0 +1,186 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+import timing
+from config import MARKET_DIR
+
+# ==========================================
+# 일봉 저장소 (티커별 배열 파일 + 증분 업데이트)
+# ==========================================
+OVERLAP_DAYS = 10  # 벤더 수정(배당/분할 보정 등) 재검증 구간 (달력일)
+
+BAR_DTYPE = np.dtype([
+    ('date', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'),
+    ('close', '<f8'), ('adj_close', '<f8'), ('volume', '<f8'),
+])
+# yfinance 컬럼명 -> 저장 필드명
+FIELDS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Adj Close': 'adj_close', 'Volume': 'volume'}
+
+
+def atomic_write(path, write, mode='wb', encoding=None):
+    """
+    같은 폴더의 고유 임시 파일에 write(f) 로 쓰고 교체 -> 읽는 쪽은 항상 완성된 파일만 봅니다.
+    앱 세션/스크리너/신호 워커가 같은 파일을 동시에 써도 임시 파일이 섞이지 않음 (마지막 교체가 남음).
+    """
+    d, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(prefix=name + ".", suffix=".tmp", dir=d or ".")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class YahooProvider:
+    """yfinance 일봉 공급자. {티커: DataFrame(Open/High/Low/Close/...)} 를 돌려줍니다."""
+
+    def fetch(self, tickers, start):
+        import yfinance as yf
+        df = yf.download(list(tickers), start=start, progress=False, group_by='ticker', auto_adjust=False)
+        if df is None or df.empty:
+            raise RuntimeError("yfinance 응답 없음")
+        out = {}
+        for t in tickers:
+            if t in df.columns.get_level_values(0):
+                out[t] = df[t].dropna(how='all')
+        return out
+
+
+class StubProvider:
+    """오프라인용 공급자 - 미리 준비한 일봉에서 start 이후만 잘라 돌려줍니다. delay 초만큼 느린 네트워크 흉내."""
+
+    def __init__(self, frames, fail=False, delay=0.0):
+        self.frames = frames
+        self.fail = fail
+        self.delay = delay
+        self.calls = []
+
+    def fetch(self, tickers, start):
+        self.calls.append((tuple(tickers), str(start)))
+        if self.delay: time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("stub provider offline")
+        ts = pd.Timestamp(start)
+        return {t: self.frames[t][self.frames[t].index >= ts] for t in tickers if t in self.frames}
+
+
+def frame_to_bars(df):
+    """yfinance 형식 DataFrame -> BAR_DTYPE 배열"""
+    df = df.dropna(subset=['Close'])
+    bars = np.zeros(len(df), dtype=BAR_DTYPE)
+    bars['date'] = pd.DatetimeIndex(df.index).tz_localize(None).normalize().values.astype('datetime64[D]').astype('<i8')
+    for col, field in FIELDS.items():
+        bars[field] = df[col].to_numpy(dtype='f8') if col in df.columns else np.nan
+    return bars
+
+
+def bars_to_frame(bars):
+    """BAR_DTYPE 배열 -> yfinance 형식 DataFrame (DatetimeIndex)"""
+    idx = pd.DatetimeIndex(bars['date'].astype('datetime64[D]').astype('datetime64[ns]'), name='Date')
+    return pd.DataFrame({col: bars[field] for col, field in FIELDS.items()}, index=idx)
+
+
+class BarStore:
+    """
+    티커별 일봉을 .npy 파일로 보관하고, 마지막 저장일 이후(+겹침 구간)만 새로 받아옵니다.
+    다운로드가 실패하면 디스크의 마지막 정상 스냅샷을 그대로 씁니다.
+    """
+
+    def __init__(self, root=MARKET_DIR, provider=None, overlap_days=OVERLAP_DAYS):
+        self.root = root
+        self.provider = provider or YahooProvider()
+        self.overlap_days = overlap_days
+        self.last_error = None
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, ticker):
+        safe = "".join(c if c.isalnum() else "_" for c in ticker)
+        return os.path.join(self.root, f"{safe}.npy")
+
+    def read(self, ticker):
+        p = self.path(ticker)
+        if not os.path.exists(p):
+            return np.zeros(0, dtype=BAR_DTYPE)
+        return np.load(p)
+
+    def write(self, ticker, bars):
+        atomic_write(self.path(ticker), lambda f: np.save(f, bars))
+
+    def last_date(self, ticker):
+        bars = self.read(ticker)
+        if len(bars) == 0:
+            return None
+        return pd.Timestamp(bars['date'][-1].astype('datetime64[D]'))
+
+    def merge(self, old, new):
+        """겹치는 구간은 새 데이터로 덮어씁니다 (벤더 수정 반영)"""
+        if len(new) == 0:
+            return old
+        new = np.sort(new, order='date')
+        keep = old[old['date'] < new['date'][0]]
+        return np.concatenate([keep, new])
+
+    def update(self, tickers, start):
+        """
+        새 봉만 받아와 저장합니다. 성공하면 True, 실패하면 False (저장본 유지).
+        저장본이 있는 티커는 가장 늦은 마지막 저장일(-겹침 구간)부터 한 번에 요청하고 (앞선 티커의 겹치는 봉은 merge 가 덮어씀),
+        저장본이 없는 티커만 start 부터 따로 한 번 요청합니다.
+        """
+        lasts = {t: self.last_date(t) for t in tickers}
+        known = [t for t in tickers if lasts[t] is not None]
+        groups = {}
+        if known:
+            groups[min(lasts[t] for t in known) - pd.Timedelta(days=self.overlap_days)] = known
+        new = [t for t in tickers if lasts[t] is None]
+        if new:
+            groups.setdefault(pd.Timestamp(start), []).extend(new)
+
+        ok = True
+        for fetch_from, group in groups.items():
+            try:
+                with timing.stage("bars_fetch", symbols=len(group), start=fetch_from.strftime("%Y-%m-%d")):
+                    fetched = self.provider.fetch(group, fetch_from.strftime("%Y-%m-%d"))
+            except Exception as e:
+                self.last_error = e
+                ok = False
+                continue
+            for t in group:
+                if t in fetched and not fetched[t].empty:
+                    self.write(t, self.merge(self.read(t), frame_to_bars(fetched[t])))
+        if ok:
+            self.last_error = None
+        return ok
+
+    def frame(self, ticker):
+        return bars_to_frame(self.read(ticker))
+
+    def close_matrix(self, tickers):
+        """
+        (날짜 합집합 int64 일수 배열, 날짜 x 티커 종가 2D 배열, 데이터 있는 티커 목록).
+        종목별 DataFrame 을 만들지 않고 배열끼리 바로 맞춥니다 (없는 날은 NaN).
+        """
+        bars = {t: self.read(t) for t in tickers}
+        bars = {t: b for t, b in bars.items() if len(b)}
+        if not bars:
+            return np.zeros(0, dtype='<i8'), np.zeros((0, 0)), []
+        dates = np.unique(np.concatenate([b['date'] for b in bars.values()]))
+        mat = np.full((len(dates), len(bars)), np.nan)
+        for j, b in enumerate(bars.values()):
+            mat[np.searchsorted(dates, b['date']), j] = b['close']
+        return dates, mat, list(bars)
+
+    def closes(self, tickers):
+        """티커별 종가를 날짜 합집합 기준으로 붙인 DataFrame"""
+        dates, mat, cols = self.close_matrix(tickers)
+        if not cols:
+            return pd.DataFrame()
+        idx = pd.DatetimeIndex(dates.astype('datetime64[D]').astype('datetime64[ns]'), name='Date')
+        return pd.DataFrame(mat, index=idx, columns=cols)
@@ -0,0 +1,263 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import timing
+from journal_store import OPEN_STATUS
+
+# ==========================================
+# 포지션 / 손익 엔진 (단기 로트 + 장기 계좌를 한 표로, 요약은 미리 계산해 보관)
+# ==========================================
+# - 종목은 정수 코드, 가격은 종목 순서의 벡터 하나 -> 평가 = prices[code] 한 번
+# - 거래가 기록되면 해당 포지션만 갱신 (일지 재조회 없음)
+# - 시세가 바뀌면 전체 포지션을 O(positions) 한 번만 다시 평가
+SHORT, LONG = 'short', 'long'
+BOOKS = (SHORT, LONG)
+POSITION_COLS = ['Book', 'Key', 'Account', 'Ticker', 'Shares', 'Avg_Price', 'Cost', 'Price', 'Value', 'Unrealized',
+                 'Return(%)', 'Value_KRW', 'Unrealized_KRW', 'Date', 'Status', 'Level']
+
+
+class PositionBook:
+    """
+    materialized 포트폴리오 요약.
+    DB 에 쓰는 동작은 record_* 를 거치게 해서 DB 와 요약이 같이 바뀌게 합니다.
+    다른 경로로 DB 가 바뀌었으면 (revision 불일치) sync() 에서 보유분만 다시 읽습니다.
+    """
+
+    def __init__(self, symbols=("TQQQ", "QLD", "QQQ")):
+        self._lock = threading.RLock()
+        self.symbols = list(symbols)
+        self.sym_code = {s: i for i, s in enumerate(self.symbols)}
+        self.prices = np.full(len(self.symbols), np.nan)
+        self.fx = np.nan
+        self.cash_krw = 0.0
+        self.rev = None
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}      # (book, key) -> 행 번호
+        self.meta = {}      # 행 번호 -> {'Date', 'Status', 'Level'}
+        self.book = np.empty(0, dtype=object)
+        self.key = np.empty(0, dtype=object)
+        self.account = np.empty(0, dtype=np.int64)
+        self.code = np.empty(0, dtype=np.int64)
+        self.shares = np.empty(0)
+        self.avg = np.empty(0)
+        self.realized = {}  # (book, account, ticker) -> 실현손익 USD
+        self._summary = None
+        self._grouped = None  # (포지션 표, 계좌 x 종목 집계) - 포지션 표가 바뀌면 다시 집계
+
+    # --- 가격 ---
+    def _code(self, ticker):
+        if ticker not in self.sym_code:
+            self.sym_code[ticker] = len(self.symbols)
+            self.symbols.append(ticker)
+            self.prices = np.append(self.prices, np.nan)
+        return self.sym_code[ticker]
+
+    def set_quotes(self, prices, fx):
+        """시세 갱신 (모르는 종목은 NaN 그대로 -> 다른 종목 가격으로 대신하지 않음)"""
+        with self._lock:
+            new = self.prices.copy()
+            for t, p in prices.items():
+                new[self._code(t)] = np.nan if p is None else float(p)
+            if not np.array_equal(new, self.prices, equal_nan=True) or fx != self.fx:
+                self.prices, self.fx = new, float(fx)
+                self._summary = None
+
+    # --- 포지션 변경 (증분) ---
+    def _upsert(self, book, key, account, ticker, shares, avg, **meta):
+        self._upsert_many(book, [(key, account, ticker, shares, avg, meta)])
+
+    def _upsert_many(self, book, entries):
+        """[(key, account, ticker, shares, avg, meta)] -> 있는 행은 갱신, 새 행은 배열 끝에 한 번에 붙임"""
+        new = []
+        for key, account, ticker, shares, avg, meta in entries:
+            i = self.rows.get((book, key))
+            if i is None:
+                new.append((key, account, ticker, shares, avg, meta))
+                continue
+            self.shares[i] = float(shares)
+            self.avg[i] = float(avg)
+            self.meta[i].update(meta)
+        if new:
+            n = len(self.shares)
+            keys = np.empty(len(new), dtype=object); keys[:] = [e[0] for e in new]
+            self.book = np.concatenate([self.book, np.full(len(new), book, dtype=object)])
+            self.key = np.concatenate([self.key, keys])
+            self.account = np.concatenate([self.account, np.array([int(e[1]) for e in new], dtype=np.int64)])
+            self.code = np.concatenate([self.code, np.array([self._code(e[2]) for e in new], dtype=np.int64)])
+            self.shares = np.concatenate([self.shares, np.array([float(e[3]) for e in new])])
+            self.avg = np.concatenate([self.avg, np.array([float(e[4]) for e in new])])
+            for j, e in enumerate(new):
+                self.rows[(book, e[0])] = n + j
+                self.meta[n + j] = dict(e[5])
+        self._summary = None
+
+    def _reduce(self, book, key, sold, status=None):
+        i = self.rows.get((book, key))
+        if i is None: return
+        self.shares[i] = max(self.shares[i] - sold, 0)
+        if status: self.meta[i]['Status'] = status
+        self._summary = None
+
+    def _drop(self, book, key):
+        i = self.rows.get((book, key))
+        if i is None: return
+        self.shares[i] = 0.0
+        self.meta[i]['Status'] = 'Closed'
+        self._summary = None
+
+    def _add_realized(self, book, account, ticker, amount):
+        k = (book, int(account), ticker)
+        self.realized[k] = self.realized.get(k, 0.0) + float(amount)
+        self._summary = None
+
+    def _load_long(self, pf_df):
+        for k in [k for k in self.rows if k[0] == LONG]:
+            self._drop(*k)
+        pf = pf_df.dropna(subset=['Account', 'Ticker']).fillna({'Shares': 0, 'Avg_Price': 0, 'Level': 0})
+        self._upsert_many(LONG, [(key, r.Account, str(r.Ticker), r.Shares, r.Avg_Price, {'Level': int(r.Level), 'Status': 'Open'})
+                                 for key, r in enumerate(pf.itertuples(index=False))])
+
+    # --- DB 와 동기화 ---
+    def sync(self, db):
+        """DB revision 이 요약과 다르면 보유분/실현합계/포트폴리오/현금만 다시 읽습니다"""
+        rev = db.revision()
+        if rev == self.rev:
+            return False
+        with self._lock:
+            self._reset()
+            self._upsert_many(SHORT, [(int(r.ID), 0, "TQQQ", r.Shares, r.Price, {'Date': r.Date, 'Status': r.Status})
+                                      for r in db.open_trades().itertuples(index=False)])
+            self._add_realized(SHORT, 0, "TQQQ", db.realized_profit())
+            self._load_long(db.portfolio())
+            self.cash_krw = db.cash()
+            self.rev = rev
+        return True
+
+    def _committed(self, db):
+        self.rev = db.revision()
+
+    def record_buy(self, db, row):
+        with self._lock, timing.stage("journal_write", op="buy"):
+            tid = db.add_short(row)
+            self._upsert(SHORT, tid, 0, "TQQQ", row['Shares'], row['Price'], Date=str(row['Date']), Status='Open')
+            self._committed(db)
+            return tid
+
+    def record_sell(self, db, row):
+        with self._lock, timing.stage("journal_write", op="sell"):
+            tid = db.add_short(row)
+            self._add_realized(SHORT, 0, "TQQQ", row.get('Profit', 0.0))
+            self._committed(db)
+            return tid
+
+    def record_close(self, db, trade_id, status, sold_shares, exec_price):
+        with self._lock, timing.stage("journal_write", op="close"):
+            profit = db.close_short(trade_id, status, sold_shares, exec_price)
+            if profit is None:  # 화면을 그린 뒤 다른 세션에서 삭제/청산됨 -> DB 를 그대로 다시 읽고 손익 0
+                self.rev = None
+                self.sync(db)
+                return 0.0
+            self._reduce(SHORT, int(trade_id), sold_shares, status)
+            self._add_realized(SHORT, 0, "TQQQ", profit)
+            self._committed(db)
+            return profit
+
+    def record_delete(self, db, trade_id):
+        """거래 삭제 - 실현손익은 DB 에서 실제로 지워진 행의 값만큼 뺌 (이미 지워졌으면 0)"""
+        with self._lock, timing.stage("journal_write", op="delete"):
+            profit = db.delete_short(trade_id)
+            self._drop(SHORT, int(trade_id))
+            self._add_realized(SHORT, 0, "TQQQ", -(profit or 0.0))
+            self._committed(db)
+            return profit
+
+    def record_portfolio(self, db, pf_df):
+        with self._lock, timing.stage("journal_write", op="portfolio"):
+            db.save_portfolio(pf_df)
+            self._load_long(pf_df.reset_index(drop=True))
+            self._committed(db)
+
+    def record_cash(self, db, delta):
+        with self._lock, timing.stage("journal_write", op="cash"):
+            db.add_cash(delta)
+            self.cash_krw += float(delta)
+            self._summary = None
+            self._committed(db)
+
+    def record_long_log(self, db, row=None):
+        """장기 일지 추가(row) / 마지막 기록 삭제(None) - 포지션 변화 없음"""
+        with self._lock, timing.stage("journal_write", op="long_log"):
+            if row is None: db.delete_last_long()
+            else: db.add_long(row)
+            self._committed(db)
+
+    # --- 평가 / 요약 ---
+    def _evaluate(self):
+        with self._lock:
+            if self._summary is not None:
+                return self._summary
+            price = self.prices[self.code]  # 벡터 한 번으로 전 포지션 가격 조회
+            cost = self.shares * self.avg
+            value = self.shares * price
+            unreal = value - cost
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ret = np.where(self.avg > 0, (price - self.avg) / self.avg * 100, 0.0)
+            n = len(self.shares)
+            pos = pd.DataFrame({
+                'Book': self.book, 'Key': self.key, 'Account': self.account,
+                'Ticker': np.array(self.symbols, dtype=object)[self.code] if n else np.empty(0, dtype=object),
+                'Shares': self.shares, 'Avg_Price': self.avg, 'Cost': cost, 'Price': price, 'Value': value,
+                'Unrealized': unreal, 'Return(%)': ret, 'Value_KRW': value * self.fx, 'Unrealized_KRW': unreal * self.fx,
+                'Date': [self.meta[i].get('Date') for i in range(n)],
+                'Status': [self.meta[i].get('Status') for i in range(n)],
+                'Level': [self.meta[i].get('Level', 0) for i in range(n)],
+            }, columns=POSITION_COLS)
+            self._summary = pos
+            return pos
+
+    def positions(self, book):
+        """보유 중인 포지션 (평가 포함)"""
+        pos = self._evaluate()
+        keep = (pos['Book'] == book) & pos['Status'].isin(OPEN_STATUS)
+        return pos[keep].reset_index(drop=True)
+
+    def summary(self, book=None):
+        """
+        계좌 x 종목별 원가/평가/미실현/실현 손익 (USD, KRW). 보유 수량도 실현손익도 없는 행은 제외.
+        실현손익은 단기 장부만 - 장기 일지에는 매도 당시 평단이 없어 계산하지 않으므로 LONG 행은 NaN.
+        포지션 표가 바뀔 때(거래/시세/환율)만 다시 집계합니다.
+        """
+        with self._lock:
+            pos = self._evaluate()
+            if self._grouped is None or self._grouped[0] is not pos:
+                self._grouped = (pos, self._group(pos))
+            g = self._grouped[1]
+        return g if book is None else g[g['Book'] == book].reset_index(drop=True)
+
+    def _group(self, pos):
+        g = pos.groupby(['Book', 'Account', 'Ticker'], as_index=False)[['Shares', 'Cost', 'Value', 'Unrealized']].sum(min_count=1)
+        real = pd.DataFrame([(b, a, t, v) for (b, a, t), v in self.realized.items()], columns=['Book', 'Account', 'Ticker', 'Realized'])
+        g = g.merge(real, on=['Book', 'Account', 'Ticker'], how='outer').fillna({'Realized': 0.0})
+        g.loc[g['Book'] == LONG, 'Realized'] = np.nan
+        for c in ['Cost', 'Value', 'Unrealized', 'Realized']:
+            g[f'{c}_KRW'] = g[c] * self.fx
+        return g[(g['Shares'].fillna(0) > 0) | (g['Realized'].fillna(0) != 0)].reset_index(drop=True)
+
+    def totals(self, book):
+        """한 장부의 합계 dict (USD/KRW)"""
+        pos = self.positions(book)
+        cost = float(pos['Cost'].sum())
+        value = float(pos['Value'].sum())  # 시세 없는 종목(NaN)은 평가/미실현에서 빠짐
+        unreal = float(pos['Unrealized'].sum())
+        realized = float(sum(v for (b, _, _), v in self.realized.items() if b == book))
+        priced_cost = float(pos.loc[pos['Price'].notna(), 'Cost'].sum())
+        return {
+            'cost': cost, 'value': value, 'unrealized': unreal, 'realized': realized,
+            'return_pct': unreal / priced_cost * 100 if priced_cost > 0 else 0.0,
+            'cost_krw': cost * self.fx, 'value_krw': value * self.fx, 'unrealized_krw': unreal * self.fx,
+            'cash_krw': self.cash_krw if book == LONG else 0.0,
+        }
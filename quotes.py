@@ -0,0 +1,116 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass
+
+import pandas as pd
+
+# ==========================================
+# 실시간 시세 서비스 (일괄 조회 + 짧은 TTL + 동시 요청 병합)
+# ==========================================
+log = logging.getLogger(__name__)
+
+QUOTE_TTL = 15       # 초 - 일봉 캐시(5분)와 별개
+QUOTE_TIMEOUT = 5    # 초 - 업스트림 요청 타임아웃
+QUOTE_RETRIES = 3
+QUOTE_BACKOFF = 0.5  # 초 - 재시도마다 2배
+
+
+@dataclass
+class Quote:
+    symbol: str
+    price: float
+    as_of: pd.Timestamp  # 마지막 체결 분봉 시각 (거래소 기준)
+    fetched_at: float    # 받아온 시각 (time.time())
+
+    def age(self, now=None):
+        """받아온 지 몇 초 지났는지"""
+        return (time.time() if now is None else now) - self.fetched_at
+
+
+class StubQuoteProvider:
+    """오프라인용 - 고정 가격을 돌려주고 호출 기록을 남깁니다. fail 횟수만큼 먼저 실패합니다."""
+
+    def __init__(self, prices, delay=0.0, fail=0):
+        self.prices = prices
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+
+    def fetch(self, symbols):
+        self.calls.append(tuple(symbols))
+        if self.delay: time.sleep(self.delay)
+        if self.fail > 0:
+            self.fail -= 1
+            raise ConnectionError("stub quote provider offline")
+        now = pd.Timestamp.now()
+        return {s: (self.prices[s], now) for s in symbols if s in self.prices}
+
+
+class QuoteService:
+    """
+    프로세스 전체에서 하나만 두고 쓰는 시세 캐시.
+    - 종목별 TTL 안이면 캐시 반환
+    - 같은 종목을 이미 누가 받아오는 중이면 새 요청 없이 그 결과를 기다림
+    - 실패 시 지수 백오프로 재시도, 끝내 실패하면 이전 시세(있으면)를 그대로 둠
+    """
+
+    def __init__(self, provider, ttl=QUOTE_TTL, retries=QUOTE_RETRIES, backoff=QUOTE_BACKOFF):
+        self.provider = provider  # fetch(symbols) -> {symbol: (가격, 체결 시각)} - 앱/워커는 IntradayQuoteProvider
+        self.ttl = ttl
+        self.retries = retries
+        self.backoff = backoff
+        self._cache = {}     # symbol -> Quote
+        self._inflight = {}  # symbol -> threading.Event
+        self._retry_at = {}  # symbol -> 실패 후 다음 조회 가능 시각 (TTL 동안 재요청 안 함)
+        self._lock = threading.Lock()
+
+    def _fetch_with_retry(self, symbols):
+        for attempt in range(self.retries):
+            try:
+                return self.provider.fetch(symbols)
+            except Exception as e:
+                log.warning("시세 조회 실패 (%d/%d) %s: %s", attempt + 1, self.retries, symbols, e)
+                if attempt + 1 < self.retries:
+                    time.sleep(self.backoff * (2 ** attempt))
+        return {}
+
+    def peek(self, symbols):
+        """캐시에 있는 시세만 (오래됐어도 그대로, 조회 없음) - 첫 화면용"""
+        with self._lock:
+            return {s: self._cache[s] for s in symbols if s in self._cache}
+
+    def get(self, symbols):
+        """{symbol: Quote} - 한 번도 못 받아온 종목은 빠집니다"""
+        now = time.time()
+        with self._lock:
+            need = [s for s in symbols
+                    if (s not in self._cache or now - self._cache[s].fetched_at > self.ttl)
+                    and self._retry_at.get(s, 0) <= now]
+            waits = {self._inflight[s] for s in need if s in self._inflight}
+            mine = [s for s in need if s not in self._inflight]
+            done = threading.Event()
+            for s in mine:
+                self._inflight[s] = done
+
+        if mine:
+            try:
+                got = self._fetch_with_retry(mine)
+                fetched_at = time.time()
+                with self._lock:
+                    for s, (price, as_of) in got.items():
+                        self._cache[s] = Quote(s, price, as_of, fetched_at)
+                        self._retry_at.pop(s, None)
+                    for s in mine:
+                        if s not in got: self._retry_at[s] = fetched_at + self.ttl
+            finally:
+                with self._lock:
+                    for s in mine:
+                        self._inflight.pop(s, None)
+                done.set()
+
+        for ev in waits:
+            ev.wait(self.retries * (QUOTE_TIMEOUT + self.backoff * 2 ** self.retries))
+
+        with self._lock:
+            return {s: self._cache[s] for s in symbols if s in self._cache}
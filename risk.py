@@ -0,0 +1,212 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import EXIT_RATIO, DEFAULT_USDKRW, LADDER_STEP
+from long_plan import TICKER_COLS, ladder_target, position_status
+
+# ==========================================
+# 장기 포트폴리오 몬테카를로 리스크 (KRW 기준, 블록 부트스트랩)
+# ==========================================
+# - 과거 TQQQ/QLD/QQQ/USDKRW 일간 로그수익률을 같은 날짜끼리 묶어(상관관계 유지) block 일 단위로 뽑아 이어 붙임
+# - 경로마다 장기 플랜 규칙(long_plan.simulate_plan 과 동일)을 그대로 적용:
+#   ExitLine 붕괴 전량 매도 / 익절 사다리 / MA50+MA200 위 빈 계좌 매수
+# - 경로는 (계좌 수 x 경로 수) 배열로 하루씩 한꺼번에 진행, chunk 단위로 나눠 프로세스 풀에서 실행
+# - 전체 경로 값은 보관하지 않고 월(21거래일) 단위 표본과 경로별 요약만 남겨 메모리를 묶어 둠
+RET_COLS = ['T_Close', 'L_Close', 'Q_Close', 'USDKRW']
+RET_IDX = {t: RET_COLS.index(c) for t, c in TICKER_COLS.items()}
+TRADING_DAYS = 252
+SAMPLE_EVERY = 21  # 월 단위 표본 (팬 차트 / 1년 VaR)
+MA_LONG, MA_SHORT = 200, 50
+
+
+def joint_returns(df):
+    """지표 프레임 -> (날짜 x 4) 일간 로그수익률 (네 값이 모두 있는 날만)"""
+    px = df[RET_COLS].to_numpy(dtype='f8')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.diff(np.log(px), axis=0)
+    return r[np.isfinite(r).all(axis=1)]
+
+
+# --- 워커 (프로세스마다 과거 수익률/초기 상태를 한 번만 받음) ---
+_W = {}
+
+
+def _init_worker(returns, q_hist, state):
+    growth = np.exp(returns)                               # 일간 배수 (경로 진행은 곱셈만)
+    _W['g_acc'] = np.ascontiguousarray(growth[:, state['col']].T)  # 계좌 x 날짜
+    _W['g_q'] = growth[:, RET_COLS.index('Q_Close')].copy()
+    _W['g_fx'] = growth[:, RET_COLS.index('USDKRW')].copy()
+    _W['q_hist'] = q_hist
+    _W['state'] = state
+
+
+def _run_chunk(seed, n_paths, horizon, block, target):
+    """
+    n_paths 개 경로 -> dict(start, final, max_dd, hit_day, samples[경로 x 월], trades)
+    hit_day: 총자산이 target 에 처음 도달한 거래일 (못 하면 -1).
+    배열은 (계좌 x 경로) 모양 -> 계좌 합계가 연속 메모리 덧셈이 됨
+    """
+    g_acc, g_q, g_fx, s = _W['g_acc'], _W['g_q'], _W['g_fx'], _W['state']
+    rng = np.random.default_rng(seed)
+    P = n_paths
+    n_hist = g_acc.shape[1]
+
+    def per_path(v):
+        return np.repeat(np.asarray(v, dtype='f8')[:, None], P, axis=1)
+    px, sh, av, lv, cs = (per_path(s[k]) for k in ('prices', 'shares', 'avg', 'level', 'cash'))
+    fx = np.full(P, s['fx'])
+    # 다음 익절 사다리 가격 - 이 가격 아래면 ladder_target 을 부를 필요가 없음
+    ladder_px = np.where(sh > 0, av * (1 + (lv + 1) * LADDER_STEP / 100), np.inf)
+    px_, sh_, av_, lv_, cs_, ladder_ = (v.reshape(-1) for v in (px, sh, av, lv, cs, ladder_px))  # 같은 메모리의 1차원 뷰
+
+    # QQQ 이동평균용 최근 200일 링버퍼 (날짜 x 경로) + 구간 합
+    ring = np.repeat(_W['q_hist'][-MA_LONG:, None], P, axis=1)
+    ptr = 0
+    sum200 = ring.sum(axis=0)
+    sum50 = ring[-MA_SHORT:].sum(axis=0)
+    q = ring[-1].copy()
+
+    total = start_total = (cs + sh * px * fx).sum(axis=0)
+    peak = start_total.copy()
+    max_dd = np.zeros(P)
+    hit_day = np.full(P, -1, dtype=np.int32)
+    if target: hit_day[start_total >= target] = 0
+    samples = np.empty((horizon // SAMPLE_EVERY, P), dtype=np.float32)
+    trades = np.zeros(3, dtype=np.int64)  # Buy, Ladder, Exit
+
+    for t in range(horizon):
+        if t % block == 0:
+            starts = rng.integers(0, n_hist - block + 1, P)
+        rows = starts + t % block                     # 경로별로 뽑힌 과거 날짜 (네 수익률을 같은 날짜로)
+        px *= g_acc.take(rows, axis=1)                # take 가 팬시 인덱싱보다 훨씬 빠름
+        fx *= g_fx.take(rows)
+        q *= g_q.take(rows)
+
+        # 이동평균 갱신 (가장 오래된 값을 빼고 새 값을 더함)
+        sum50 += q - ring[(ptr - MA_SHORT) % MA_LONG]
+        sum200 += q - ring[ptr]
+        ring[ptr] = q
+        ptr = (ptr + 1) % MA_LONG
+        ma200 = sum200 / MA_LONG
+        attack, above200, breach = position_status(q, sum50 / MA_SHORT, ma200, ma200 * EXIT_RATIO)
+
+        # ExitLine 붕괴 -> 보유 전량 매도
+        i = np.flatnonzero(breach & (sh > 0))     # (계좌 x 경로) 를 펼친 위치 - 경로는 i % P
+        if len(i):
+            cs_[i] += sh_[i] * px_[i] * fx[i % P]
+            sh_[i] = 0; av_[i] = 0; lv_[i] = 0; ladder_[i] = np.inf
+            trades[2] += len(i)
+        # 익절 사다리 (붕괴가 아닌 경로, 다음 단계 가격 근처까지 온 계좌만 정확히 판정)
+        i = np.flatnonzero((px >= ladder_px * (1 - 1e-9)) & ~breach)
+        if len(i):
+            _, new_lv, hit, qty = ladder_target(px_[i], av_[i], lv_[i], sh_[i])
+            i, qty = i[hit], qty[hit]
+            cs_[i] += qty * px_[i] * fx[i % P]
+            sh_[i] -= qty
+            lv_[i] = new_lv[hit]
+            ladder_[i] = np.where(sh_[i] > 0, av_[i] * (1 + (lv_[i] + 1) * LADDER_STEP / 100), np.inf)
+            trades[1] += int((qty > 0).sum())
+        # MA50 + MA200 위 -> 빈 계좌 매수 (1주도 못 사는 계좌는 제외)
+        i = np.flatnonzero((attack & above200 & ~breach) & (sh == 0) & (cs >= px * fx))
+        if len(i):
+            cost = px_[i] * fx[i % P]
+            buy_qty = np.floor(cs_[i] / cost)
+            cs_[i] -= buy_qty * cost
+            sh_[i] = buy_qty; av_[i] = px_[i]; lv_[i] = 0
+            ladder_[i] = px_[i] * (1 + LADDER_STEP / 100)
+            trades[0] += len(i)
+
+        total = (cs + sh * px * fx).sum(axis=0)
+        np.maximum(peak, total, out=peak)
+        np.minimum(max_dd, total / peak - 1, out=max_dd)
+        if target:
+            hit_day[(hit_day < 0) & (total >= target)] = t + 1
+        if (t + 1) % SAMPLE_EVERY == 0:
+            samples[(t + 1) // SAMPLE_EVERY - 1] = total
+
+    return {'start': start_total, 'final': total, 'max_dd': max_dd,
+            'hit_day': hit_day, 'samples': samples.T, 'trades': trades}
+
+
+def _finite(v, default):
+    """시세가 없거나 NaN 이면 일봉 종가로 대체"""
+    return float(v) if v is not None and np.isfinite(v) else float(default)
+
+
+def initial_state(df, tickers, shares, avg, level, cash_krw, prices=None, fx=None):
+    """현재 보유(계좌별) + 현금 -> 워커 상태 dict. 현금은 계좌 수로 균등 분배 (simulate_plan 과 같음)"""
+    last = df.iloc[-1]
+    prices = prices or {}
+    col = np.array([RET_IDX[t] for t in tickers])
+    px = np.array([_finite(prices.get(t), last[RET_COLS[RET_IDX[t]]]) for t in tickers])
+    fx = _finite(fx, last.get('USDKRW', DEFAULT_USDKRW))
+    n = len(tickers)
+    return {
+        'col': col, 'prices': px, 'fx': fx,
+        'shares': np.asarray(shares, dtype='f8'), 'avg': np.asarray(avg, dtype='f8'),
+        'level': np.asarray(level, dtype='f8'), 'cash': np.full(n, float(cash_krw) / n),
+    }
+
+
+def simulate_risk(df, tickers, shares, avg, level, cash_krw, prices=None, fx=None, years=5, n_paths=50000,
+                  block=20, target_krw=None, chunk=5000, workers=None, seed=0):
+    """
+    현재 장기 포트폴리오로 미래 경로 n_paths 개를 시뮬레이션합니다.
+    반환: (요약 dict, 월별 분위 DataFrame, 경로별 결과 DataFrame[final, max_dd, years_to_target])
+    """
+    returns = joint_returns(df)
+    if len(df) < MA_LONG or len(returns) < block:
+        raise ValueError(f"리스크 시뮬레이션에는 최소 {MA_LONG}일 데이터가 필요합니다")
+    q_hist = df['Q_Close'].to_numpy(dtype='f8')[-MA_LONG:]
+    state = initial_state(df, tickers, shares, avg, level, cash_krw, prices, fx)
+    horizon = int(years * TRADING_DAYS)
+    block = max(1, min(block, len(returns)))
+    sizes = [min(chunk, n_paths - i) for i in range(0, n_paths, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))  # 워커 수와 무관하게 같은 결과
+    tasks = [(sd, n, horizon, block, target_krw) for sd, n in zip(seeds, sizes)]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) == 1:
+        _init_worker(returns, q_hist, state)
+        results = [_run_chunk(*t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(returns, q_hist, state)) as ex:
+            results = list(ex.map(_run_chunk, *zip(*tasks)))
+
+    cat = {k: np.concatenate([res[k] for res in results]) for k in ('start', 'final', 'max_dd', 'hit_day')}
+    samples = np.vstack([res['samples'] for res in results])
+    trades = sum(res['trades'] for res in results)
+    start = float(cat['start'][0])
+    ret = cat['final'] / start - 1
+
+    def var_cvar(x, a):
+        q = np.quantile(x, a)
+        return float(-q * 100), float(-x[x <= q].mean() * 100)
+
+    summary = {'paths': n_paths, 'years': years, 'start_krw': start,
+               'median_final': float(np.median(cat['final'])), 'p5_final': float(np.quantile(cat['final'], 0.05)),
+               'p95_final': float(np.quantile(cat['final'], 0.95)), 'loss_prob': float((ret < 0).mean() * 100),
+               'median_dd': float(np.median(cat['max_dd']) * 100), 'p95_dd': float(np.quantile(cat['max_dd'], 0.05) * 100),
+               'trades_per_path': {k: float(v) / n_paths for k, v in zip(['buy', 'ladder', 'exit'], trades)}}
+    for a in (0.05, 0.01):
+        summary[f'var{int((1 - a) * 100)}'], summary[f'cvar{int((1 - a) * 100)}'] = var_cvar(ret, a)
+    if samples.shape[1] >= TRADING_DAYS // SAMPLE_EVERY:  # 1년 보유 VaR
+        r1 = samples[:, TRADING_DAYS // SAMPLE_EVERY - 1].astype('f8') / start - 1
+        summary['var95_1y'], summary['cvar95_1y'] = var_cvar(r1, 0.05)
+
+    ttt = np.where(cat['hit_day'] >= 0, cat['hit_day'] / TRADING_DAYS, np.nan)
+    if target_krw:
+        reached = ~np.isnan(ttt)
+        summary['target_krw'] = float(target_krw)
+        summary['target_prob'] = float(reached.mean() * 100)
+        summary['target_median_years'] = float(np.median(ttt[reached])) if reached.any() else None
+
+    months = np.arange(1, samples.shape[1] + 1) * SAMPLE_EVERY / TRADING_DAYS
+    fan = pd.DataFrame(np.quantile(samples, [0.05, 0.25, 0.5, 0.75, 0.95], axis=0).T,
+                       index=pd.Index(months.round(2), name='Years'), columns=['P5', 'P25', 'P50', 'P75', 'P95'])
+    paths = pd.DataFrame({'final': cat['final'], 'max_dd': cat['max_dd'] * 100, 'years_to_target': ttt})
+    return summary, fan, paths
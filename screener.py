@@ -0,0 +1,111 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from config import MARKET_DIR, START_DATE, RSI_P, SLOPE_LAG, SCREEN_PAIRS
+from indicators import indicator_values
+from market_store import BarStore
+
+# ==========================================
+# 멀티 종목 스크리너 (기초지수 -> 레버리지 ETF 쌍)
+# ==========================================
+# - 종가는 날짜 x 종목 2D 배열 하나 -> 지표/신호를 모든 종목에 한 번에 계산
+# - 종목이 많으면 종목 열을 나눠 스레드로 병렬 계산 (rolling 계산은 GIL 을 풀고 돌아감)
+# - 신호 규칙은 단일 종목(QQQ -> TQQQ)과 같음: MA200 위면 RSI 기준 90, 아래면 80 / 기울기 가속
+SCREEN_COLS = ['Underlying', 'Leveraged', 'Date', 'Close', 'Lev_Close', 'Bull', 'RSI', 'RSI_Th', 'Slope_Accel',
+               'Entry', 'MA50', 'MA200', 'ExitLine', 'Above_MA50', 'Above_MA200', 'Exit_Breach', 'Exit_Gap(%)', 'Score']
+PARALLEL_MIN = 64  # 종목 수가 이보다 적으면 한 번에 계산 (스레드 비용이 더 큼)
+FFILL_LIMIT = 5    # 휴장/누락일 종가는 최대 5일까지 앞 값으로 채움
+
+
+def parse_pairs(text):
+    """'SPY:UPRO, SOXX:SOXL' -> {'SPY': 'UPRO', 'SOXX': 'SOXL'} (레버리지 생략 가능: 'IWM')"""
+    pairs = {}
+    for item in text.replace("\n", ",").split(","):
+        item = item.strip().upper()
+        if not item: continue
+        u, _, lev = item.partition(":")
+        pairs[u.strip()] = lev.strip() or None
+    return pairs
+
+
+def _last_signals(closes, rsi_p, slope_lag):
+    """날짜 x 종목 종가 -> 종목별 마지막 날 지표/신호 DataFrame (index = 종목)"""
+    ind = indicator_values(closes, rsi_p, slope_lag)
+    last = pd.DataFrame({k: v.iloc[-1] for k, v in ind.items()})
+    last['Close'] = closes.iloc[-1]
+    valid = closes.notna().to_numpy()
+    last['Date'] = closes.index[len(closes) - 1 - valid[::-1].argmax(axis=0)]  # 종목별 마지막 실제 종가일
+    return last
+
+
+def evaluate(closes, rsi_p=RSI_P, slope_lag=SLOPE_LAG, workers=4):
+    """모든 종목의 마지막 날 지표 (종목이 많으면 열을 나눠 병렬)"""
+    n = closes.shape[1]
+    if n < PARALLEL_MIN or workers <= 1:
+        return _last_signals(closes, rsi_p, slope_lag)
+    chunks = np.array_split(np.arange(n), workers)
+    with ThreadPoolExecutor(workers) as ex:
+        parts = ex.map(lambda idx: _last_signals(closes.iloc[:, idx], rsi_p, slope_lag), chunks)
+        return pd.concat(list(parts))
+
+
+def rank_setups(last, pairs, lev_close=None):
+    """
+    진입 신호 종목을 위로, 그 안에서는 RSI 가 기준보다 많이 낮을수록 위로.
+    Score = 진입 여부 x 100 + (기준 - RSI), ExitLine 붕괴 종목은 -100
+    """
+    bull = last['Close'] >= last['Q_MA200']
+    th = np.where(bull, 90, 80)
+    valid = last['Q_MA200'].notna()
+    entry = (last['Q_RSI3'] < th) & last['Slope_Accel'].astype(bool) & valid
+    breach = last['Close'] < last['ExitLine']
+    out = pd.DataFrame({
+        'Underlying': last.index, 'Leveraged': [pairs.get(u) for u in last.index], 'Date': last['Date'],
+        'Close': last['Close'], 'Lev_Close': np.nan if lev_close is None else lev_close.reindex(last.index).to_numpy(),
+        'Bull': bull, 'RSI': last['Q_RSI3'], 'RSI_Th': th, 'Slope_Accel': last['Slope_Accel'].astype(bool), 'Entry': entry,
+        'MA50': last['Q_MA50'], 'MA200': last['Q_MA200'], 'ExitLine': last['ExitLine'],
+        'Above_MA50': last['Close'] > last['Q_MA50'], 'Above_MA200': last['Close'] > last['Q_MA200'], 'Exit_Breach': breach,
+        'Exit_Gap(%)': (last['Close'] / last['ExitLine'] - 1) * 100,
+    })
+    out['Score'] = entry * 100.0 + (th - last['Q_RSI3']) - breach * 100.0
+    out.loc[~valid, 'Score'] = np.nan  # MA200 계산 전(상장 200일 미만)은 순위에서 제외
+    return out.sort_values('Score', ascending=False, na_position='last').reset_index(drop=True)[SCREEN_COLS]
+
+
+class Screener:
+    """기초지수/레버리지 종가를 BarStore 에서 일괄 갱신하고 날짜 x 종목 배열로 평가합니다"""
+
+    def __init__(self, pairs=None, store=None):
+        self.pairs = dict(SCREEN_PAIRS if pairs is None else pairs)
+        self.store = store or BarStore(MARKET_DIR)
+        self._closes = None  # refresh() 전까지 메모리에 보관
+
+    def symbols(self):
+        lev = [v for v in self.pairs.values() if v]
+        return list(dict.fromkeys(list(self.pairs) + lev))
+
+    def refresh(self, start=START_DATE):
+        """모든 종목 새 봉만 일괄 조회 (시작일이 같은 종목끼리 한 번에) -> 성공 여부"""
+        self._closes = None
+        return self.store.update(self.symbols(), start=start)
+
+    def closes(self):
+        """(기초지수 날짜 x 종목 종가, 레버리지 마지막 종가 Series)"""
+        if self._closes is None:
+            df = self.store.closes(self.symbols())
+            if df.empty:
+                return df, pd.Series(dtype='f8')
+            df = df.ffill(limit=FFILL_LIMIT)
+            under = df[[u for u in self.pairs if u in df.columns]]
+            lev = {u: df[l].iloc[-1] for u, l in self.pairs.items() if l and l in df.columns}
+            self._closes = (under, pd.Series(lev, dtype='f8'))
+        return self._closes
+
+    def run(self, rsi_p=RSI_P, slope_lag=SLOPE_LAG, workers=4):
+        """순위표 DataFrame (SCREEN_COLS)"""
+        under, lev = self.closes()
+        if under.empty:
+            return pd.DataFrame(columns=SCREEN_COLS)
+        return rank_setups(evaluate(under, rsi_p, slope_lag, workers), self.pairs, lev)
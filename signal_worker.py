@@ -0,0 +1,119 @@
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from config import (DEFAULT_USDKRW, JOURNAL_DB, SIGNAL_SNAPSHOT, WORKER_OPEN_SEC, WORKER_CLOSED_SEC,
+                    ALERT_FILE, ALERT_WEBHOOK, ALERT_DESKTOP, ALERT_TICK_SEC)
+from alerts import AlertEngine, position_triggers, default_sinks, sent_keys
+from journal_store import JournalDB
+from portfolio import PositionBook
+from quotes import QuoteService
+from intraday import IntradayStore, IntradayQuoteProvider
+from signals import load_market_frame, live_prices, build_snapshot, SnapshotStore
+
+# ==========================================
+# 백그라운드 신호 워커 (python signal_worker.py)
+# ==========================================
+# 시세 조회 / 지표 / 신호 / 익절 체크를 여기서 한 번만 계산해 스냅샷으로 내보내고,
+# 대시보드(app.py)는 스냅샷을 읽기만 합니다 -> 접속 세션이 늘어도 계산량은 그대로.
+# 스냅샷 사이에는 장중에 ALERT_TICK_SEC 마다 보유 종목 시세만 받아 익절/손절 알림을 확인합니다.
+log = logging.getLogger("signal_worker")
+
+FRAME_REFRESH_SEC = 300  # 일봉/지표 다시 읽는 주기 (app.py 일봉 캐시와 동일)
+
+
+def market_session(now=None):
+    """미국 동부 기준 평일 04:00~20:00 (프리마켓~애프터마켓) 이면 True"""
+    now = now or pd.Timestamp.now(tz="America/New_York")
+    if now.weekday() >= 5:
+        return False
+    minutes = now.hour * 60 + now.minute
+    return 4 * 60 <= minutes < 20 * 60
+
+
+class AlertLoop:
+    """포지션/ExitLine 이 바뀌었을 때만 트리거 인덱스를 다시 만들고, 시세 틱을 알림 엔진에 넘깁니다"""
+
+    def __init__(self, engine, db, book, quotes):
+        self.engine, self.db, self.book, self.quotes = engine, db, book, quotes
+        self.exit_line = None
+        self.day = None
+        self._built = None
+
+    def set_exit_line(self, exit_line, day):
+        """day: ExitLine 을 계산한 거래일 - 시장 알림은 거래일마다 한 번"""
+        self.exit_line, self.day = exit_line, day
+
+    def refresh(self):
+        self.book.sync(self.db)
+        state = (self.book.rev, self.exit_line, self.day)
+        if state != self._built:
+            self.engine.rebuild(position_triggers(self.book, self.exit_line, self.day))
+            self._built = state
+
+    def tick(self, prices=None):
+        """prices 가 없으면 트리거가 걸린 종목 시세만 조회"""
+        self.refresh()
+        if prices is None:
+            got = self.quotes.get(list(self.engine.index))
+            prices = {s: q.price for s, q in got.items()}
+        for a in self.engine.on_prices(prices):
+            log.info("알림: %s", a.message())
+
+
+def run(once=False, open_sec=WORKER_OPEN_SEC, closed_sec=WORKER_CLOSED_SEC, path=SIGNAL_SNAPSHOT, tick_sec=ALERT_TICK_SEC):
+    store = SnapshotStore(path)
+    quotes = QuoteService(IntradayQuoteProvider(IntradayStore()), ttl=0)  # 주기마다 새 분봉만 조회
+    db = JournalDB(JOURNAL_DB)
+    book = PositionBook()
+    alerts = AlertLoop(AlertEngine(default_sinks(ALERT_FILE, ALERT_WEBHOOK, ALERT_DESKTOP), sent=sent_keys(ALERT_FILE)),
+                       db, book, quotes)
+    df, daily_info, engine, loaded_at = None, {}, None, 0.0
+
+    while True:
+        started = time.time()
+        try:
+            if df is None or df.empty or started - loaded_at >= FRAME_REFRESH_SEC:
+                df, daily_info, engine = load_market_frame()
+                loaded_at = started
+            if df.empty:
+                log.warning("일봉 데이터 없음 - 다음 주기에 재시도")
+            else:
+                last = df.iloc[-1]
+                book.sync(db)
+                prices, _, stale = live_prices(quotes, last, book.symbols)
+                usd_krw = daily_info.get('KRW', DEFAULT_USDKRW)
+                book.set_quotes(prices, usd_krw)
+                snap = build_snapshot(last, engine, prices, stale, usd_krw, book, daily_info.get('Stale', False))
+                version = store.publish(snap)
+                log.info("스냅샷 v%d 발행 (%.2f초)", version, time.time() - started)
+                alerts.set_exit_line(snap['signal']['exit_line'], snap['signal']['date'])
+                alerts.tick(prices)
+        except Exception:
+            log.exception("스냅샷 생성 실패")
+
+        if once:
+            alerts.engine.flush()
+            return
+        is_open = market_session()
+        next_at = started + (open_sec if is_open else closed_sec)
+        while (left := next_at - time.time()) > 0:
+            time.sleep(min(left, tick_sec) if is_open else left)
+            if is_open and time.time() < next_at:
+                try:
+                    alerts.tick()
+                except Exception:
+                    log.exception("알림 확인 실패")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TQQQ 신호 스냅샷 워커")
+    parser.add_argument("--once", action="store_true", help="한 번만 계산하고 종료")
+    parser.add_argument("--open-sec", type=float, default=WORKER_OPEN_SEC, help="장중 갱신 주기(초)")
+    parser.add_argument("--closed-sec", type=float, default=WORKER_CLOSED_SEC, help="장외 갱신 주기(초)")
+    parser.add_argument("--tick-sec", type=float, default=ALERT_TICK_SEC, help="장중 알림 확인 주기(초)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run(args.once, args.open_sec, args.closed_sec, tick_sec=args.tick_sec)
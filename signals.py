@@ -0,0 +1,223 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import (MARKET_DIR, START_DATE, TICKERS, DEFAULT_USDKRW, QUOTE_STALE_SEC, RSI_P, SLOPE_LAG,
+                    TP_HALF, TP_FULL, SL_PCT, SIGNAL_SNAPSHOT, SNAPSHOT_STALE_SEC)
+from indicators import compute_indicators, IndicatorEngine
+from long_plan import ladder_target, position_status
+from market_store import BarStore, atomic_write
+from portfolio import SHORT, LONG
+
+# ==========================================
+# 신호 계산 + 스냅샷 저장 (app.py 와 signal_worker.py 가 같이 사용)
+# ==========================================
+
+
+def load_market_frame(store=None, fetch=True):
+    """
+    일봉 저장소 -> (지표 포함 DataFrame, {'KRW', 'Stale'}, 스트리밍 엔진).
+    fetch=False 면 다운로드 없이 로컬 저장소만 (첫 화면용, Stale 로 표시). 실패하면 (빈 DataFrame, {}, None)
+    """
+    try:
+        # 지표 계산용 일봉 데이터 (로컬 저장소 + 새 봉만 증분 다운로드)
+        store = store or BarStore(MARKET_DIR)
+        fetched_ok = store.update(TICKERS, start=START_DATE) if fetch else False
+        df = store.closes(TICKERS)
+        if df.empty: return pd.DataFrame(), {}, None
+
+        data = pd.DataFrame(index=df.index)
+        try:
+            data['T_Close'] = df['TQQQ']; data['Q_Close'] = df['QQQ']
+            if 'QLD' in df.columns: data['L_Close'] = df['QLD'].ffill()
+
+            # 환율
+            if 'KRW=X' in df.columns:
+                data['USDKRW'] = df['KRW=X']
+            else: data['USDKRW'] = DEFAULT_USDKRW
+        except: return pd.DataFrame(), {}, None
+
+        data['USDKRW'] = data['USDKRW'].ffill().fillna(DEFAULT_USDKRW)
+        data.dropna(subset=['T_Close', 'Q_Close'], inplace=True)
+
+        # 지표 계산
+        data = compute_indicators(data, RSI_P, SLOPE_LAG)
+        final_df = data.dropna()
+
+        # 장중 가상 신호용 스트리밍 엔진 (진행 중인 오늘 봉은 빼고 확정 봉만 반영)
+        today_ny = pd.Timestamp.now(tz="America/New_York").tz_localize(None).normalize()
+        done = data['Q_Close'][data.index < today_ny]
+        engine = IndicatorEngine.warm(done.values, RSI_P, SLOPE_LAG)
+
+        daily_info = {
+            'KRW': data['USDKRW'].iloc[-1],
+            'Stale': not fetched_ok  # 다운로드 실패 -> 저장된 마지막 데이터 사용 중
+        }
+        return final_df, daily_info, engine
+
+    except Exception as e:
+        return pd.DataFrame(), {}, None
+
+
+def live_prices(service, last, extra=(), fetch=True):
+    """
+    실시간 시세 (장중, 프리마켓, 애프터마켓 포함).
+    못 가져온 종목은 일봉 종가로 대체하고 stale 로 표시합니다. (일봉 없는 extra 종목은 NaN)
+    fetch=False 면 조회 없이 서비스 캐시에 있는 시세만 씁니다.
+    """
+    fallback = {'TQQQ': last['T_Close'], 'QLD': last.get('L_Close', np.nan), 'QQQ': last['Q_Close']}
+    fallback.update({s: np.nan for s in extra if s not in fallback})
+    quotes = service.get(list(fallback)) if fetch else service.peek(list(fallback))
+    prices, stale = {}, []
+    for sym, daily_close in fallback.items():
+        q = quotes.get(sym)
+        if q is not None and q.age() <= QUOTE_STALE_SEC:
+            prices[sym] = q.price
+        else:
+            prices[sym] = q.price if q is not None else daily_close
+            stale.append(sym)
+    return prices, quotes, stale
+
+
+def evaluate_signal(last, engine, q_live):
+    """오늘 판독기 / 위치 판독에 쓰는 값 (일봉 지표 + 실시간 QQQ 위치 + 장중 가상 신호)"""
+    is_bull = bool(last['Q_Close'] >= last['Q_MA200'])
+    rsi_th = 90 if is_bull else 80
+    above_ma50, above_ma200, exit_breach = position_status(q_live, last['Q_MA50'], last['Q_MA200'], last['ExitLine'])
+    sig = {
+        'date': str(pd.Timestamp(last.name).date()),
+        'is_bull': is_bull,
+        'rsi_th': rsi_th,
+        'rsi': float(last['Q_RSI3']),
+        'slope_accel': bool(last['Slope_Accel']),
+        'entry': bool(last['Q_RSI3'] < rsi_th and last['Slope_Accel']),
+        'q_live': float(q_live),
+        'ma50': float(last['Q_MA50']), 'ma200': float(last['Q_MA200']), 'exit_line': float(last['ExitLine']),
+        'above_ma50': bool(above_ma50), 'above_ma200': bool(above_ma200), 'exit_breach': bool(exit_breach),
+        'preview': None,
+    }
+    if engine is not None:
+        pv = engine.preview(float(q_live))
+        pv_th = 90 if q_live >= pv['Q_MA200'] else 80
+        sig['preview'] = {
+            'rsi': float(pv['Q_RSI3']), 'rsi_th': pv_th, 'slope_accel': bool(pv['Slope_Accel']),
+            'entry': bool(pv['Q_RSI3'] < pv_th and pv['Slope_Accel']),
+        }
+    return sig
+
+
+def take_profit_checks(book):
+    """단기 로트 반익/완익/손절 도달 + 장기 익절 사다리 발동 목록"""
+    checks = []
+    pos = book.positions(SHORT)
+    if not pos.empty:
+        ret = pos['Return(%)'].to_numpy()
+        half = (pos['Status'] == 'Open').to_numpy() & (ret >= TP_HALF)
+        kind = np.select([ret <= SL_PCT, ret >= TP_FULL, half], ['SL', 'TP_Full', 'TP_Half'], '')
+        for i in np.flatnonzero(kind != ''):
+            checks.append({'book': SHORT, 'key': int(pos['Key'].iloc[i]), 'kind': str(kind[i]),
+                           'return_pct': float(ret[i]), 'shares': float(pos['Shares'].iloc[i])})
+    pos = book.positions(LONG)
+    if not pos.empty:
+        cur_px = pos['Price'].where(pos['Ticker'].isin(['TQQQ', 'QLD'])).fillna(0)
+        pnl, _, hit, qty = ladder_target(cur_px, pos['Avg_Price'], pos['Level'], pos['Shares'])
+        for i in np.flatnonzero(hit):
+            checks.append({'book': LONG, 'key': int(pos['Account'].iloc[i]), 'kind': 'Ladder',
+                           'return_pct': float(pnl[i]), 'shares': float(qty[i])})
+    return checks
+
+
+def build_snapshot(last, engine, prices, stale, usd_krw, book, daily_stale=False):
+    """UI 가 그대로 그릴 수 있는 JSON 직렬화 가능한 dict (숫자는 float/bool, 시세 없음은 None)"""
+    return {
+        'as_of': time.time(),
+        'prices': {k: (None if v is None or pd.isna(v) else float(v)) for k, v in prices.items()},
+        'stale': list(stale),
+        'daily_stale': bool(daily_stale),
+        'usd_krw': float(usd_krw),
+        'signal': evaluate_signal(last, engine, prices['QQQ']),
+        'checks': take_profit_checks(book),
+    }
+
+
+def first_view(market, snap, service, book, max_age=SNAPSHOT_STALE_SEC):
+    """
+    첫 화면에 바로 그릴 값 (네트워크 조회 없음). source 에 따라:
+    - 'snapshot': 신호 워커 스냅샷이 최신 -> 그대로
+    - 'local': 일봉 프레임(로컬 저장분일 수 있음) + 서비스 캐시 시세 (없거나 오래된 종목은 종가, stale)
+    - 'old_snapshot': 일봉이 아직 없음 -> 오래된 스냅샷이라도 (전 종목 stale)
+    - 'none': 아무것도 없음 (signal=None)
+    반환 dict: source, date, snap_age, prices, quotes, stale, usd_krw, signal, checks. book 시세도 갱신합니다.
+    """
+    df = None if market is None or market.df.empty else market.df
+    snap_age = time.time() - snap['as_of'] if snap else None
+    date = str(df.index[-1].date()) if df is not None else (snap['signal']['date'] if snap else None)
+    fresh = snap is not None and snap_age <= max_age and snap['signal']['date'] == date
+    view = {'date': date, 'snap_age': snap_age, 'quotes': {}}
+    if fresh or (df is None and snap is not None):
+        prices = {s: (np.nan if p is None else p) for s, p in snap['prices'].items()}
+        prices.update({s: np.nan for s in book.symbols if s not in prices})
+        usd_krw = snap.get('usd_krw', DEFAULT_USDKRW)
+        book.set_quotes(prices, usd_krw)
+        view.update(source='snapshot' if fresh else 'old_snapshot', prices=prices, usd_krw=usd_krw,
+                    stale=list(snap['stale']) if fresh else list(prices), signal=snap['signal'], checks=snap['checks'])
+    elif df is not None:
+        last = df.iloc[-1]
+        usd_krw = market.info.get('KRW', DEFAULT_USDKRW)
+        prices, quotes, stale = live_prices(service, last, book.symbols, fetch=False)
+        book.set_quotes(prices, usd_krw)
+        view.update(source='local', prices=prices, quotes=quotes, stale=stale, usd_krw=usd_krw,
+                    signal=evaluate_signal(last, market.engine, prices['QQQ']), checks=take_profit_checks(book))
+    else:
+        prices = {s: np.nan for s in ['TQQQ', 'QLD', 'QQQ', *book.symbols]}
+        book.set_quotes(prices, DEFAULT_USDKRW)
+        view.update(source='none', prices=prices, stale=list(prices), usd_krw=DEFAULT_USDKRW, signal=None, checks=[])
+    return view
+
+
+def late_data(shared, market, service, book, wait_market=True):
+    """
+    첫 화면을 그린 뒤 (스크립트 맨 끝): 백그라운드 일봉 갱신을 기다리고 실시간 시세를 받아옵니다.
+    반환: 다시 그릴 게 있는지 (새 프레임 또는 이번에 새로 조회한 시세) - 오프라인이면 False 라 rerun 이 반복되지 않음
+    """
+    late_at = time.time()
+    fresh = shared.wait() if wait_market else market
+    if fresh is None or fresh.df.empty:
+        return False
+    _, quotes, _ = live_prices(service, fresh.df.iloc[-1], book.symbols)
+    return fresh is not market or any(q.fetched_at >= late_at for q in quotes.values())
+
+
+class SnapshotStore:
+    """
+    스냅샷 JSON 파일 하나. 쓸 때마다 version 을 1 올리고 임시 파일 -> 교체로 한 번에 바꿉니다.
+    읽는 쪽은 파일 수정 시각이 바뀌었을 때만 다시 파싱합니다.
+    """
+
+    def __init__(self, path=SIGNAL_SNAPSHOT):
+        self.path = path
+        self._mtime = None
+        self._snap = None
+
+    def read(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._mtime:
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    self._snap = json.load(f)
+                self._mtime = mtime
+            except (OSError, ValueError):
+                return self._snap
+        return self._snap
+
+    def publish(self, snap):
+        prev = self.read()
+        snap = dict(snap, version=(prev or {}).get('version', 0) + 1)
+        atomic_write(self.path, lambda f: json.dump(snap, f, ensure_ascii=False), 'w', 'utf-8')
+        return snap['version']
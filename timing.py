@@ -0,0 +1,69 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from config import TIMING, TIMING_LOG
+
+log = logging.getLogger("timing")
+
+# ==========================================
+# 구간별 소요 시간 측정 (켜져 있을 때만 기록, 꺼져 있으면 거의 비용 없음)
+# ==========================================
+# - Streamlit 은 세션마다 다른 스레드에서 rerun 을 돌리므로 기록/스위치는 스레드별
+# - 켜져 있으면 구간마다 JSON 한 줄을 'timing' 로거로 남김
+#   (Streamlit 은 로그 설정을 하지 않으므로 처음 켤 때 TIMING_LOG 파일 핸들러를 직접 붙임)
+_local = threading.local()
+_handler_lock = threading.Lock()
+_handler = None
+
+
+def _ensure_handler():
+    """'timing' 로거에 INFO 레벨 + JSONL 파일 핸들러를 한 번만 붙입니다"""
+    global _handler
+    if _handler is not None or not TIMING_LOG:
+        return
+    with _handler_lock:
+        if _handler is None:
+            h = logging.FileHandler(TIMING_LOG, encoding='utf-8')
+            h.setFormatter(logging.Formatter("%(message)s"))
+            log.addHandler(h)
+            log.setLevel(logging.INFO)
+            _handler = h
+
+
+def enable(flag=True):
+    """현재 스레드(세션 rerun)에서 측정 켜기/끄기"""
+    _local.enabled = bool(flag)
+
+
+def enabled():
+    return getattr(_local, 'enabled', TIMING)
+
+
+def begin_run():
+    """rerun 시작 - 이전 기록을 비웁니다"""
+    _local.records = []
+
+
+def records():
+    """이번 rerun 의 [{'stage', 'ms', ...}] (측정 순서)"""
+    return list(getattr(_local, 'records', []))
+
+
+@contextmanager
+def stage(name, **fields):
+    if not enabled():
+        yield
+        return
+    _ensure_handler()
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        rec = {'stage': name, 'ms': round((time.perf_counter() - t0) * 1000, 3), **fields}
+        if not hasattr(_local, 'records'):
+            _local.records = []
+        _local.records.append(rec)
+        log.info(json.dumps(dict(rec, ts=round(time.time(), 3)), ensure_ascii=False, default=str))